@@ -0,0 +1,3 @@
+"""
+Benchmarks of the Braze client hot paths, run with ``make benchmark``.
+"""
@@ -0,0 +1,110 @@
+"""
+The benchmarked operations of the Braze client.
+
+Each case takes an ExitStack for its cleanup and returns a zero-argument callable running
+one operation. Cases other than
+``request_throughput`` replace the network with canned responses, so they only measure
+the client's own work.
+"""
+import json
+
+import requests
+
+from braze.client import BrazeClient
+from braze.constants import REQUEST_TYPE_POST, BrazeAPIEndpoints
+from braze.fake_server import FakeBrazeServer
+
+NUM_ITEMS = 1000
+ALIAS_LABEL = 'Enterprise'
+
+
+def _emails(count=NUM_ITEMS):
+    return [f'user{i}@example.com' for i in range(count)]
+
+
+def _response(body):
+    """
+    Return a 201 requests.Response with a json ``body``.
+    """
+    response = requests.Response()
+    response.status_code = 201
+    response._content = json.dumps(body).encode('utf-8')  # pylint: disable=protected-access
+    return response
+
+
+class _CannedClient(BrazeClient):
+    """
+    A Braze client answering every request with a canned response instead of calling Braze.
+    """
+
+    def __init__(self, responses_by_endpoint=None, **kwargs):
+        super().__init__(
+            api_key='api_key', api_url='http://braze-api-url.com', app_id='app_id', max_workers=1, **kwargs
+        )
+        self.responses_by_endpoint = responses_by_endpoint or {}
+
+    def _send(self, body, data, endpoint, request_type, timeout, attempt, timings):
+        return _response(self.responses_by_endpoint.get(endpoint, {'message': 'success'}))
+
+
+def bench_chunks(stack):  # pylint: disable=unused-argument
+    client = _CannedClient()
+    items = list(range(NUM_ITEMS * 10))
+    return lambda: list(client._chunks(items, 50))  # pylint: disable=protected-access
+
+
+def bench_track_user_payloads(stack):  # pylint: disable=unused-argument
+    client = _CannedClient()
+    attributes = [{'external_id': str(i), 'email': email} for i, email in enumerate(_emails())]
+    events = [{'external_id': str(i), 'name': 'event', 'time': '2024-01-01T00:00:00Z'} for i in range(NUM_ITEMS)]
+    return lambda: client.track_user(attributes=attributes, events=events)
+
+
+def bench_create_recipients(stack):  # pylint: disable=unused-argument
+    client = _CannedClient()
+    user_id_by_email = {email: i for i, email in enumerate(_emails())}
+    trigger_properties_by_email = {email: {'course': 'course-v1:edX+DemoX'} for email in user_id_by_email}
+    return lambda: client.create_recipients(ALIAS_LABEL, user_id_by_email, trigger_properties_by_email)
+
+
+def bench_external_id_batch_parsing(stack):  # pylint: disable=unused-argument
+    """
+    Look up the external ids of a batch of emails, answered from memory.
+    """
+    emails = _emails()
+    # Each chunk answers with the users of the first chunk, parsing cost is the same for every chunk.
+    users = [{'external_id': str(i), 'email': email} for i, email in enumerate(emails[:50])]
+    client = _CannedClient({BrazeAPIEndpoints.EXPORT_IDS: {'users': users, 'message': 'success'}})
+    return lambda: client.get_braze_external_id_batch(emails, ALIAS_LABEL)
+
+
+def bench_make_request_json(stack):  # pylint: disable=unused-argument
+    """
+    Serialize a request and parse its response, answered from memory.
+    """
+    users = [{'external_id': str(i), 'email': email, 'user_aliases': []} for i, email in enumerate(_emails(50))]
+    client = _CannedClient({BrazeAPIEndpoints.EXPORT_IDS: {'users': users, 'message': 'success'}})
+    payload = {
+        'user_aliases': [{'alias_label': ALIAS_LABEL, 'alias_name': email} for email in _emails(50)],
+        'fields_to_export': ['external_id', 'email'],
+    }
+    return lambda: client._make_request(  # pylint: disable=protected-access
+        payload, BrazeAPIEndpoints.EXPORT_IDS, REQUEST_TYPE_POST
+    )
+
+
+def bench_request_throughput(stack):
+    server = stack.enter_context(FakeBrazeServer())
+    client = BrazeClient(api_key='api_key', api_url=server.url, app_id='app_id')
+    attributes = [{'external_id': str(i), 'email': email} for i, email in enumerate(_emails())]
+    return lambda: client.track_user(attributes=attributes)
+
+
+BENCHMARKS = {
+    'chunks': bench_chunks,
+    'track_user_payloads': bench_track_user_payloads,
+    'create_recipients': bench_create_recipients,
+    'external_id_batch_parsing': bench_external_id_batch_parsing,
+    'make_request_json': bench_make_request_json,
+    'request_throughput': bench_request_throughput,
+}
@@ -0,0 +1,122 @@
+"""
+Run the Braze client benchmarks and compare them to the stored baseline.
+
+Usage:
+    python -m benchmarks.run                     # fail if a benchmark regressed
+    python -m benchmarks.run --update-baseline   # store the current timings as the baseline
+    python -m benchmarks.run --only chunks --only create_recipients
+
+Timings are the fastest time of one operation over several repeats, slower repeats measure
+other load on the machine rather than the client. Baselines depend on the
+machine they were recorded on, update them when comparing on another one.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from contextlib import ExitStack
+
+from .cases import BENCHMARKS
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# A benchmark regressed when it is this much slower than its baseline.
+DEFAULT_REGRESSION_THRESHOLD = 0.25
+DEFAULT_REPEAT = 5
+# Each repeat runs the operation enough times to take at least this long.
+MIN_REPEAT_TIME_S = 0.2
+
+
+def measure(func, repeat=DEFAULT_REPEAT, min_repeat_time_s=MIN_REPEAT_TIME_S):
+    """
+    Return the fastest time in seconds of one call to ``func``.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_repeat_time_s and number < 10 ** 6:
+        number *= 2
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run_benchmarks(names, repeat=DEFAULT_REPEAT, min_repeat_time_s=MIN_REPEAT_TIME_S):
+    """
+    Return the timings of the named benchmarks, in seconds per operation by name.
+    """
+    timings = {}
+    for name in names:
+        with ExitStack() as stack:
+            timings[name] = measure(BENCHMARKS[name](stack), repeat, min_repeat_time_s)
+    return timings
+
+
+def find_regressions(timings, baseline, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """
+    Return the names of the benchmarks more than ``threshold`` slower than their baseline.
+    """
+    return [
+        name for name, seconds in timings.items()
+        if name in baseline and seconds > baseline[name] * (1 + threshold)
+    ]
+
+
+def load_baseline(path=BASELINE_PATH):
+    """
+    Return the stored baseline timings, empty if there are none.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(timings, path=BASELINE_PATH):
+    """
+    Store ``timings`` as the baseline, keeping the baselines of benchmarks that were not run.
+    """
+    baseline = {**load_baseline(path), **timings}
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+
+
+def main(argv=None):
+    """
+    Run the benchmarks, returning a non-zero exit code if any regressed.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the Braze client hot paths.')
+    parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS), help='Benchmark to run, repeatable')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    args = parser.parse_args(argv)
+
+    timings = run_benchmarks(args.only or list(BENCHMARKS), repeat=args.repeat)
+    baseline = load_baseline(args.baseline)
+    # Regressions are measured a second time before being reported, so a burst of load on
+    # the machine does not fail the run.
+    for name, seconds in run_benchmarks(find_regressions(timings, baseline, args.threshold), args.repeat).items():
+        timings[name] = min(timings[name], seconds)
+    regressions = find_regressions(timings, baseline, args.threshold)
+
+    for name, seconds in timings.items():
+        line = f'{name:<30} {seconds * 1000:>12.4f} ms'
+        if name in baseline:
+            line += f' {(seconds / baseline[name] - 1) * 100:>+8.1f}% vs baseline'
+        if name in regressions:
+            line += '  REGRESSION'
+        print(line)
+
+    if args.update_baseline:
+        save_baseline(timings, args.baseline)
+        print(f'Baseline updated: {args.baseline}')
+        return 0
+
+    if regressions:
+        print(f'{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}.')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,11 +2,13 @@
 Channel for sending push notifications using braze.
 """
 import logging
+import threading
 
 from django.conf import settings
 from edx_ace.channel import Channel, ChannelType
 
 from braze.client import BrazeClient
+from braze.outbox import BrazeOutbox, OutboxDrainer
 
 LOG = logging.getLogger(__name__)
 
@@ -14,9 +16,15 @@ LOG = logging.getLogger(__name__)
 class BrazePushNotificationChannel(Channel):
     """
     A channel for sending push notifications using braze.
+
+    When ``ACE_CHANNEL_BRAZE_OUTBOX_PATH`` is set, notifications are queued in a BrazeOutbox at that
+    path instead of being sent, and are delivered by the ``drain_braze_outbox`` management command.
     """
     channel_type = ChannelType.PUSH
     _CAMPAIGNS_SETTING = 'ACE_CHANNEL_BRAZE_PUSH_CAMPAIGNS'
+    _OUTBOX_PATH_SETTING = 'ACE_CHANNEL_BRAZE_OUTBOX_PATH'
+    _outboxes = {}
+    _outboxes_lock = threading.Lock()
 
     @classmethod
     def enabled(cls):
@@ -44,6 +52,17 @@ class BrazePushNotificationChannel(Channel):
             return
 
         try:
+            outbox = self.get_braze_outbox()
+            if outbox:
+                outbox.enqueue(
+                    'send_campaign_message',
+                    campaign_id=campaign_id,
+                    trigger_properties=message.context.get('post_data'),
+                    emails=emails
+                )
+                LOG.info('Queued push notification for %s with Braze', notification_type)
+                return
+
             braze_client = self.get_braze_client()
             braze_client.send_campaign_message(
                 campaign_id=campaign_id,
@@ -63,6 +82,31 @@ class BrazePushNotificationChannel(Channel):
         """Returns the campaign ID for a given ACE message name or None if no match is found"""
         return getattr(settings, cls._CAMPAIGNS_SETTING, {}).get(notification_type)
 
+    @classmethod
+    def get_braze_outbox(cls):
+        """
+        Returns the braze outbox push notifications are queued in, or None to send them directly
+        """
+        outbox_path = getattr(settings, cls._OUTBOX_PATH_SETTING, None)
+        if not outbox_path:
+            return None
+
+        with cls._outboxes_lock:
+            if outbox_path not in cls._outboxes:
+                cls._outboxes[outbox_path] = BrazeOutbox(outbox_path)
+            return cls._outboxes[outbox_path]
+
+    @classmethod
+    def get_outbox_drainer(cls):
+        """
+        Returns the drainer delivering the queued push notifications, or None if they are sent directly
+        """
+        outbox = cls.get_braze_outbox()
+        braze_client = cls.get_braze_client()
+        if not (outbox and braze_client):
+            return None
+        return OutboxDrainer(braze_client, outbox)
+
     @classmethod
     def get_braze_client(cls):
         """Returns the braze client object"""
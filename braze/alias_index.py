@@ -0,0 +1,125 @@
+"""
+Local indexes of Braze user aliases that are known to exist.
+"""
+import json
+import os
+import threading
+
+
+class AliasIndex:
+    """
+    In-memory index of ``(alias_label, alias_name)`` pairs already created in or resolved from Braze.
+
+    ``BrazeClient`` consults the index to skip aliases it has already created,
+    so repeated imports only pay for new users.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty index.
+        """
+        self._pairs = set()
+        self._lock = threading.Lock()
+
+    def __contains__(self, pair):
+        """
+        Return True if the ``(alias_label, alias_name)`` pair is known.
+        """
+        return tuple(pair) in self._pairs
+
+    def __len__(self):
+        """
+        Return the number of known aliases.
+        """
+        return len(self._pairs)
+
+    def unknown(self, alias_label, alias_names):
+        """
+        Return the alias names that are not yet known for ``alias_label``, in their original order.
+        """
+        return [alias_name for alias_name in alias_names if (alias_label, alias_name) not in self._pairs]
+
+    def add(self, alias_label, alias_names):
+        """
+        Record that the given alias names exist for ``alias_label``.
+        """
+        with self._lock:
+            new_pairs = [
+                (alias_label, alias_name)
+                for alias_name in dict.fromkeys(alias_names)
+                if (alias_label, alias_name) not in self._pairs
+            ]
+            self._pairs.update(new_pairs)
+            self._persist(new_pairs)
+
+    def discard(self, alias_label, alias_names):
+        """
+        Record that the given alias names no longer exist for ``alias_label``, e.g. once their users are deleted.
+        """
+        with self._lock:
+            removed_pairs = [
+                (alias_label, alias_name)
+                for alias_name in dict.fromkeys(alias_names)
+                if (alias_label, alias_name) in self._pairs
+            ]
+            self._pairs.difference_update(removed_pairs)
+            self._persist_removal(removed_pairs)
+
+    def _persist(self, pairs):
+        """
+        Store newly added pairs, the in-memory index keeps nothing beyond the process.
+        """
+
+    def _persist_removal(self, pairs):
+        """
+        Store the removal of pairs, the in-memory index keeps nothing beyond the process.
+        """
+
+
+class FileAliasIndex(AliasIndex):
+    """
+    Alias index persisted to an append-only file of JSON lines.
+
+    Each line holds one ``[alias_label, alias_name]`` pair, or ``{"removed": [alias_label, alias_name]}``
+    for a discarded one, so the file can be shared by successive runs of an import and is safe to
+    truncate to reset the index.
+    """
+
+    def __init__(self, path):
+        """
+        Load any pairs already recorded at ``path``.
+
+        Arguments:
+            path (str): Location of the index file, created on first write
+        """
+        super().__init__()
+        self.path = path
+        if os.path.exists(path):
+            with open(path, encoding='utf8') as index_file:
+                for line in index_file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        if isinstance(entry, dict):
+                            self._pairs.discard(tuple(entry['removed']))
+                        else:
+                            self._pairs.add(tuple(entry))
+
+    def _persist(self, pairs):
+        """
+        Append the new pairs to the index file.
+        """
+        if not pairs:
+            return
+
+        with open(self.path, 'a', encoding='utf8') as index_file:
+            index_file.writelines(json.dumps(list(pair)) + '\n' for pair in pairs)
+
+    def _persist_removal(self, pairs):
+        """
+        Append the removed pairs to the index file.
+        """
+        if not pairs:
+            return
+
+        with open(self.path, 'a', encoding='utf8') as index_file:
+            index_file.writelines(json.dumps({'removed': list(pair)}) + '\n' for pair in pairs)
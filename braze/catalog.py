@@ -0,0 +1,119 @@
+"""
+Snapshots of the catalog items synced to Braze, to only send the items that changed.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from .exceptions import BrazeClientError
+
+
+def item_hash(item):
+    """
+    Return a stable hash of a catalog item's content.
+    """
+    canonical = json.dumps(item, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class CatalogSnapshot:
+    """
+    In-memory record of the hash of each item last synced to a Braze catalog, by item id.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty snapshot, every item is new to it.
+        """
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def hashes(self):
+        """
+        Return a copy of the item hashes by item id.
+        """
+        with self._lock:
+            return dict(self._hashes)
+
+    def update(self, hashes_by_id):
+        """
+        Record that the given items were synced with the given hashes.
+        """
+        with self._lock:
+            self._hashes.update(hashes_by_id)
+
+    def remove(self, item_ids):
+        """
+        Record that the given items were deleted from the catalog.
+        """
+        with self._lock:
+            for item_id in item_ids:
+                self._hashes.pop(item_id, None)
+
+    def save(self):
+        """
+        Store the snapshot, the in-memory snapshot keeps nothing beyond the process.
+        """
+
+
+class FileCatalogSnapshot(CatalogSnapshot):
+    """
+    Catalog snapshot persisted to a JSON file of item hashes by item id.
+
+    The file is replaced atomically on ``save``, so an interrupted sync leaves the previous
+    snapshot in place. Deleting the file makes the next sync send every item.
+    """
+
+    def __init__(self, path):
+        """
+        Load the snapshot saved at ``path``, if any.
+
+        Arguments:
+            path (str): Location of the snapshot file, created on first save
+        """
+        super().__init__()
+        self.path = path
+        if os.path.exists(path):
+            with open(path, encoding='utf8') as snapshot_file:
+                self._hashes = json.load(snapshot_file)
+
+    def save(self):
+        """
+        Write the snapshot to its file.
+        """
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf8') as snapshot_file:
+            json.dump(self.hashes(), snapshot_file, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def diff_catalog(items, snapshot_hashes):
+    """
+    Compare a full set of catalog items with the hashes of the items last synced.
+
+    Arguments:
+        items (iterable(dict)): Every item of the catalog, each with a unique 'id'
+        snapshot_hashes (dict): Item hashes by item id, as returned by CatalogSnapshot.hashes
+    Returns:
+        diff (tuple): The items to create, the items to update, the ids of the items to delete,
+        and the hashes of every item by item id
+    Raises:
+        BrazeClientError: If an item has no id, or the same id as another
+    """
+    hashes = {}
+    created = []
+    updated = []
+    for item in items:
+        if item.get('id') is None:
+            raise BrazeClientError(f'Bad arguments, catalog item without an id: {item}.')
+        item_id = str(item['id'])
+        if item_id in hashes:
+            raise BrazeClientError(f'Bad arguments, duplicate catalog item id {item_id}.')
+        hashes[item_id] = item_hash(item)
+        if item_id not in snapshot_hashes:
+            created.append(item)
+        elif snapshot_hashes[item_id] != hashes[item_id]:
+            updated.append(item)
+    deleted = [item_id for item_id in snapshot_hashes if item_id not in hashes]
+    return created, updated, deleted, hashes
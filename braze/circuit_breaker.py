@@ -0,0 +1,150 @@
+"""
+Per-endpoint circuit breaker for the Braze client.
+"""
+import threading
+import time
+from collections import deque
+
+import requests
+
+from .exceptions import BrazeCircuitOpenError, BrazeInternalServerError
+
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+
+
+class _Circuit:
+    """
+    The state of a single endpoint's circuit.
+    """
+
+    def __init__(self):
+        self.state = CIRCUIT_CLOSED
+        self.outcomes = deque()
+        self.opened_at = 0.0
+        self.trials_in_flight = 0
+
+
+class CircuitBreaker:
+    """
+    Fail fast on endpoints that are failing, instead of waiting out every request's timeout.
+
+    A closed circuit opens once at least ``minimum_requests`` requests were made to the endpoint
+    in the last ``window_s`` seconds and ``failure_rate_threshold`` of them failed. An open circuit
+    refuses requests with BrazeCircuitOpenError for ``recovery_timeout_s`` seconds, then goes half
+    open and lets up to ``half_open_max_requests`` trial requests through: a successful trial closes
+    the circuit and a failed one opens it again.
+
+    Timeouts, connection errors and 5xx responses count as failures, any other response shows
+    the endpoint is up and counts as a success.
+    """
+
+    def __init__(
+            self,
+            failure_rate_threshold=0.5,
+            minimum_requests=10,
+            window_s=60.0,
+            recovery_timeout_s=30.0,
+            half_open_max_requests=1,
+            failure_errors=(requests.exceptions.RequestException, BrazeInternalServerError),
+    ):
+        """
+        Arguments:
+            failure_rate_threshold (float): The share of failed requests that opens the circuit
+            minimum_requests (int): The number of requests in the window needed to open the circuit
+            window_s (float): How far back requests are counted
+            recovery_timeout_s (float): How long the circuit stays open before trial requests
+            half_open_max_requests (int): The number of concurrent trial requests while half open
+            failure_errors (tuple): Exception types counted as failures
+        """
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_requests = minimum_requests
+        self.window_s = window_s
+        self.recovery_timeout_s = recovery_timeout_s
+        self.half_open_max_requests = half_open_max_requests
+        self.failure_errors = failure_errors
+        self._lock = threading.Lock()
+        self._circuits = {}
+
+    def state(self, endpoint):
+        """
+        Return the state of the endpoint's circuit: 'closed', 'open' or 'half_open'.
+        """
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == CIRCUIT_OPEN and self._retry_after_s(circuit) == 0:
+                return CIRCUIT_HALF_OPEN
+            return circuit.state
+
+    def before_request(self, endpoint):
+        """
+        Admit a request to ``endpoint``.
+
+        Raises:
+            BrazeCircuitOpenError: If the circuit is open, or half open with enough trials in flight
+        """
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == CIRCUIT_CLOSED:
+                return
+
+            retry_after_s = self._retry_after_s(circuit)
+            if retry_after_s > 0:
+                raise BrazeCircuitOpenError(endpoint, retry_after_s)
+
+            circuit.state = CIRCUIT_HALF_OPEN
+            if circuit.trials_in_flight >= self.half_open_max_requests:
+                raise BrazeCircuitOpenError(endpoint, 0.0)
+            circuit.trials_in_flight += 1
+
+    def after_request(self, endpoint, error=None):
+        """
+        Record the outcome of an admitted request.
+
+        Arguments:
+            endpoint (str): The endpoint called
+            error (Exception): The exception the request raised, None if it succeeded
+        """
+        failed = isinstance(error, self.failure_errors)
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == CIRCUIT_HALF_OPEN:
+                circuit.trials_in_flight = max(circuit.trials_in_flight - 1, 0)
+                if failed:
+                    self._open(circuit, now)
+                else:
+                    circuit.state = CIRCUIT_CLOSED
+                    circuit.outcomes.clear()
+                return
+
+            if circuit.state == CIRCUIT_OPEN:
+                return
+
+            circuit.outcomes.append((now, failed))
+            while circuit.outcomes and circuit.outcomes[0][0] < now - self.window_s:
+                circuit.outcomes.popleft()
+            failures = sum(1 for _, outcome_failed in circuit.outcomes if outcome_failed)
+            if (
+                len(circuit.outcomes) >= self.minimum_requests
+                and failures >= self.failure_rate_threshold * len(circuit.outcomes)
+            ):
+                self._open(circuit, now)
+
+    def _circuit(self, endpoint):
+        circuit = self._circuits.get(endpoint)
+        if circuit is None:
+            circuit = self._circuits[endpoint] = _Circuit()
+        return circuit
+
+    def _open(self, circuit, now):
+        circuit.state = CIRCUIT_OPEN
+        circuit.opened_at = now
+        circuit.trials_in_flight = 0
+        circuit.outcomes.clear()
+
+    def _retry_after_s(self, circuit):
+        if circuit.state != CIRCUIT_OPEN:
+            return 0.0
+        return max(circuit.opened_at + self.recovery_timeout_s - time.monotonic(), 0.0)
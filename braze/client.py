@@ -1,19 +1,45 @@
 """
 Braze API Client.
 """
+import contextvars
 import datetime
+import functools
 import json
 import logging
+import os
+import re
+import time
 from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
 from urllib.parse import urljoin
 
 import requests
 
 from braze.constants import (
+    CATALOG_ITEMS_CHUNK_SIZE,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_TIMEOUT,
+    DELETE_OUTCOME_DEAD_LETTERED,
+    DELETE_OUTCOME_DELETED,
+    DELETE_USERS_CHUNK_SIZE,
+    ENDPOINT_TIMEOUTS,
     GET_EXTERNAL_IDS_CHUNK_SIZE,
+    LOGGED_SAMPLE_SIZE,
+    LOOKUP_TIMEOUT_KEY,
     MAX_NUM_IDENTIFY_USERS_ALIASES,
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    REQUEST_TYPE_DELETE,
     REQUEST_TYPE_GET,
     REQUEST_TYPE_POST,
+    REQUEST_TYPE_PUT,
+    SCHEDULE_RECIPIENTS_CHUNK_SIZE,
+    SEGMENT_EXPORT_POLL_INTERVAL_S,
+    SEGMENT_EXPORT_TIMEOUT_S,
+    SUBSCRIBED_STATE,
+    SUBSCRIPTION_IDENTIFIER_KEYS,
+    SUBSCRIPTION_STATUS_CHUNK_SIZE,
     TRACK_USER_COMPONENT_CHUNK_SIZE,
     UNSUBSCRIBED_EMAILS_API_LIMIT,
     UNSUBSCRIBED_EMAILS_API_SORT_DIRECTION,
@@ -22,18 +48,45 @@ from braze.constants import (
     BrazeAPIEndpoints,
 )
 
+from .catalog import CatalogSnapshot, diff_catalog
+from .concurrency import MicroBatcher, SingleFlight
 from .exceptions import (
     BrazeBadRequestError,
+    BrazeCircuitOpenError,
     BrazeClientError,
+    BrazeDeadlineExceededError,
     BrazeForbiddenError,
     BrazeInternalServerError,
     BrazeNotFoundError,
     BrazeRateLimitError,
     BrazeUnauthorizedError,
 )
+from .hooks import HOOK_AFTER_RESPONSE, HOOK_BEFORE_SEND, HOOK_EVENTS, HOOK_ON_ERROR, RequestTimings
+from .metrics import RequestMetric
+from .plan import DEFAULT_PLAN_LATENCY_S, PLANNED_EXTERNAL_ID, RequestPlan
+from .rate_limit import RateLimitTracker
+from .segment_export import download_export, iter_export_records
 
 logger = logging.getLogger(__name__)
 
+_request_priority = contextvars.ContextVar('braze_request_priority', default=PRIORITY_LOW)
+# The RequestPlan collecting requests instead of sending them, set by BrazeClient.plan.
+_request_plan = contextvars.ContextVar('braze_request_plan', default=None)
+# The (connect, read) timeout override and monotonic deadline set by BrazeClient.timeout.
+_request_timeout = contextvars.ContextVar('braze_request_timeout', default=((None, None), None))
+
+
+def _high_priority(method):
+    """
+    Send every request made by a transactional client method at high priority.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.priority(PRIORITY_HIGH):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
 
 class BrazeClient:
     """
@@ -44,15 +97,84 @@ class BrazeClient:
             self,
             api_key,
             api_url,
-            app_id
+            app_id,
+            max_workers=DEFAULT_MAX_WORKERS,
+            alias_index=None,
+            lookup_alias_label=None,
+            lookup_batch_window_s=None,
+            metrics_sink=None,
+            concurrency_limiter=None,
+            scheduler=None,
+            dead_letter_store=None,
+            circuit_breaker=None,
+            timeouts=None,
+            transport=None,
     ):
         """
         Initialize the Braze Client with configuration values.
+
+        Arguments:
+            api_key (str): The Braze REST API key
+            api_url (str): The Braze REST endpoint, e.g. 'https://rest.iad-01.braze.com'
+            app_id (str): The Braze app identifier
+            max_workers (int): The maximum number of requests a single bulk operation
+            may have in flight at once, 1 disables concurrency
+            alias_index (AliasIndex): Optional index of aliases known to exist in Braze,
+            used by ``create_braze_alias`` to skip aliases it has already created
+            lookup_alias_label (str): The alias label emails are registered under, e.g. 'Enterprise'
+            lookup_batch_window_s (float): When set along with ``lookup_alias_label``, concurrent
+            ``get_braze_external_id`` calls arriving within this many seconds are resolved together
+            through the 50-per-request alias export, e.g. 0.005
+            metrics_sink (MetricsSink): Optional sink receiving a RequestMetric for every request
+            concurrency_limiter (AdaptiveConcurrencyLimiter): Optional limiter adjusting how many
+            requests bulk operations keep in flight, replacing the fixed ``max_workers``
+            scheduler (PriorityScheduler): Optional scheduler admitting requests by priority, so
+            ``send_email``, ``send_campaign_message`` and ``send_canvas_message`` are served
+            ahead of bulk operations and keep a reserved share of the rate limit
+            dead_letter_store (DeadLetterStore): Optional store for the chunks of bulk writes
+            rejected with a 400, the remaining chunks are still sent instead of the error being raised
+            circuit_breaker (CircuitBreaker): Optional per-endpoint circuit breaker failing requests
+            fast with BrazeCircuitOpenError while an endpoint is failing
+            timeouts (dict): (connect, read) timeouts in seconds by endpoint, endpoint template
+            such as BrazeAPIEndpoints.CATALOG_ITEMS, or LOOKUP_TIMEOUT_KEY for single-user
+            lookups, overriding the defaults in ``braze.constants.ENDPOINT_TIMEOUTS``
+            transport (requests.adapters.BaseAdapter): Optional adapter the requests to ``api_url``
+            are sent through, e.g. a RecordingTransport or ReplayTransport
         """
         self.api_key = api_key
         self.api_url = api_url
         self.app_id = app_id
+        self.max_workers = max_workers
+        self.alias_index = alias_index
+        self.metrics_sink = metrics_sink
+        self.concurrency_limiter = concurrency_limiter
+        self.scheduler = scheduler
+        self.dead_letter_store = dead_letter_store
+        self.circuit_breaker = circuit_breaker
+        self.endpoint_timeouts = {**ENDPOINT_TIMEOUTS, **(timeouts or {})}
+        # Timeouts of templated endpoints, matched against the formatted endpoints requests are made to.
+        self._templated_timeouts = [
+            (re.compile(re.sub(r'\{\w+\}', '[^/]+', endpoint)), timeout)
+            for endpoint, timeout in self.endpoint_timeouts.items()
+            if '{' in endpoint
+        ]
+        self.hooks = {event: [] for event in HOOK_EVENTS}
+        self.rate_limits = RateLimitTracker()
         self.session = requests.Session()
+        # Set once, the session is shared by the worker threads of bulk operations.
+        self.session.headers.update(
+            {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        )
+        if transport is not None:
+            self.session.mount(api_url, transport)
+        self._external_id_lookups = SingleFlight()
+        self._external_id_batcher = None
+        if lookup_alias_label and lookup_batch_window_s:
+            self._external_id_batcher = MicroBatcher(
+                lambda emails: self._export_external_ids_chunk(emails, lookup_alias_label, LOOKUP_TIMEOUT_KEY),
+                GET_EXTERNAL_IDS_CHUNK_SIZE,
+                lookup_batch_window_s,
+            )
 
     def _chunks(self, a_list, chunk_size):
         """
@@ -61,14 +183,209 @@ class BrazeClient:
         for i in range(0, len(a_list), chunk_size):
             yield a_list[i:i + chunk_size]
 
-    def _make_request(self, data, endpoint, request_type):
+    def _pool_size(self):
+        """
+        Return the number of threads bulk operations may use.
+        """
+        if self.concurrency_limiter is not None:
+            return self.concurrency_limiter.max_limit
+        return self.max_workers
+
+    def _run_concurrently(self, func, items):
+        """
+        Call ``func`` on every item using a pool of at most ``max_workers`` threads.
+
+        Results are returned in the same order as ``items``. A single item, or a
+        client configured with ``max_workers=1``, is processed inline.
+        """
+        items = list(items)
+        pool_size = self._pool_size()
+        if len(items) <= 1 or pool_size <= 1:
+            return [func(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=min(pool_size, len(items))) as executor:
+            futures = [self._submit(executor, func, item) for item in items]
+            return [future.result() for future in futures]
+
+    def _submit(self, executor, func, *args):
+        """
+        Submit ``func(*args)`` to ``executor``, running it in a copy of the caller's context.
+        """
+        return executor.submit(contextvars.copy_context().run, func, *args)
+
+    @contextmanager
+    def priority(self, priority):
+        """
+        Send the requests made inside the block, including from worker threads, at ``priority``.
+
+        Only takes effect when the client has a scheduler.
+
+        Arguments:
+            priority (int): e.g. PRIORITY_HIGH or PRIORITY_LOW, lower values are served first
+        """
+        token = _request_priority.set(priority)
+        try:
+            yield
+        finally:
+            _request_priority.reset(token)
+
+    @contextmanager
+    def timeout(self, connect_s=None, read_s=None, deadline_s=None):
+        """
+        Override the timeouts of the requests made inside the block, including from worker threads.
+
+        Example:
+            with client.timeout(read_s=0.5):
+                client.get_braze_external_id(email)
+            with client.timeout(deadline_s=30):
+                client.create_braze_alias(emails, 'Enterprise')
+
+        Arguments:
+            connect_s (float): The connect timeout of every request, replacing the endpoint's default
+            read_s (float): The read timeout of every request, replacing the endpoint's default
+            deadline_s (float): Seconds within which all the requests must complete, each
+            request's timeouts are capped to the time left, and requests are no longer sent
+            once it has passed. Nested deadlines cannot extend an enclosing one.
+        """
+        (outer_connect_s, outer_read_s), outer_deadline = _request_timeout.get()
+        deadline = outer_deadline
+        if deadline_s is not None:
+            deadline = time.monotonic() + deadline_s
+            if outer_deadline is not None:
+                deadline = min(deadline, outer_deadline)
+
+        token = _request_timeout.set((
+            (connect_s if connect_s is not None else outer_connect_s, read_s if read_s is not None else outer_read_s),
+            deadline,
+        ))
+        try:
+            yield
+        finally:
+            _request_timeout.reset(token)
+
+    @contextmanager
+    def plan(self, latency_s=DEFAULT_PLAN_LATENCY_S):
+        """
+        Plan the requests made inside the block, including from worker threads, without sending them.
+
+        All chunking and payload construction runs as usual, but each request is recorded in the
+        yielded RequestPlan and answered as if Braze had nothing to report: exports find no users,
+        and messages to emails are planned for a placeholder external id. Hooks, metrics, the alias
+        index, the concurrency limiter, the scheduler and the circuit breaker are left untouched.
+
+        Example:
+            with client.plan() as plan:
+                client.create_braze_alias(emails, 'Enterprise')
+            plan.summary()['requests_by_endpoint']
+
+        Arguments:
+            latency_s (float): The latency assumed for each request when estimating the duration
+        """
+        request_plan = RequestPlan(self.rate_limits, self._pool_size(), latency_s)
+        token = _request_plan.set(request_plan)
+        try:
+            yield request_plan
+        finally:
+            _request_plan.reset(token)
+
+    def _timeout_for(self, endpoint, timeout_key=None):
+        """
+        Return the (connect, read) timeout of a request to ``endpoint``.
+
+        The defaults are those of ``timeout_key`` if given, else of the endpoint or of its template.
+
+        Raises:
+            BrazeDeadlineExceededError: If the deadline set by ``timeout`` has passed
+        """
+        key = timeout_key or endpoint
+        endpoint_timeout = self.endpoint_timeouts.get(key)
+        if endpoint_timeout is None:
+            endpoint_timeout = next(
+                (timeout for pattern, timeout in self._templated_timeouts if pattern.fullmatch(key)), DEFAULT_TIMEOUT
+            )
+        connect_s, read_s = endpoint_timeout
+        (override_connect_s, override_read_s), deadline = _request_timeout.get()
+        connect_s = override_connect_s if override_connect_s is not None else connect_s
+        read_s = override_read_s if override_read_s is not None else read_s
+        if deadline is None:
+            return connect_s, read_s
+
+        remaining_s = deadline - time.monotonic()
+        if remaining_s <= 0:
+            raise BrazeDeadlineExceededError(f'Deadline exceeded before calling {endpoint}.')
+        return min(connect_s, remaining_s), min(read_s, remaining_s)
+
+    def _make_bulk_request(self, data, endpoint, request_type, dead_letter=True, timeout_key=None):
+        """
+        Make one request of a bulk operation, within the limits of the concurrency limiter if any.
+
+        When the client has a dead-letter store and ``dead_letter`` is True, a request rejected
+        with a 400 is stored there and None is returned, so the other chunks are still sent.
+        """
+        try:
+            # Planned requests are not sent, so they take no part in the concurrency limit.
+            if self.concurrency_limiter is not None and _request_plan.get() is None:
+                return self.concurrency_limiter.run(
+                    self._make_request, data, endpoint, request_type, timeout_key=timeout_key, latency_key=endpoint
+                )
+            return self._make_request(data, endpoint, request_type, timeout_key=timeout_key)
+        except BrazeBadRequestError as exc:
+            if not (dead_letter and self.dead_letter_store is not None):
+                raise
+            logger.error('Braze rejected a %s request, storing it as a dead letter: %s', endpoint, exc)
+            self.dead_letter_store.add(endpoint, request_type, data, exc)
+            return None
+
+    def rate_limit_budget(self, endpoint):
+        """
+        Return the rate limit budget Braze last reported for ``endpoint``.
+
+        Arguments:
+            endpoint (str): e.g. BrazeAPIEndpoints.TRACK_USER
+        Returns:
+            budget (RateLimitBudget): The remaining calls and reset time, or None if the
+            endpoint has not been called yet
+        """
+        return self.rate_limits.budget(endpoint)
+
+    def register_hook(self, event, callback):
+        """
+        Register a callback to run at a point in the lifecycle of every request.
+
+        See ``braze.hooks`` for the arguments each event's callbacks receive. Exceptions
+        raised by callbacks are logged and do not affect the request.
+
+        Arguments:
+            event (str): One of 'before_send', 'after_response' or 'on_error'
+            callback (callable): The function to call
+        """
+        if event not in self.hooks:
+            msg = f'Bad arguments, unknown hook event {event}.'
+            raise BrazeClientError(msg)
+
+        self.hooks[event].append(callback)
+
+    def _run_hooks(self, event, *args):
+        """
+        Call every callback registered for ``event``.
+        """
+        for callback in self.hooks[event]:
+            try:
+                callback(*args)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Braze %s hook %r failed', event, callback)
+
+    def _make_request(self, data, endpoint, request_type, attempt=1, timeout_key=None):
         """
         Http posts the message body with associated headers.
 
         Arguments:
             data (dict): The request body for post request or params for get request
             endpoint (str): The endpoint for the API e.g. /messages/send
-            request_type (str): The request_type for the API e.g. 'post or 'get'
+            request_type (str): The request_type for the API e.g. 'post', 'get', 'put' or 'delete'
+            attempt (int): The attempt number when the request is being retried, reported to the metrics sink
+            timeout_key (str): The key of the request's timeouts in ``endpoint_timeouts``, e.g.
+            LOOKUP_TIMEOUT_KEY, the endpoint by default
         Returns:
             resp (json): The http response in json format
         Raises:
@@ -79,16 +396,90 @@ class BrazeClient:
             BrazeNotFoundError: If a 404 status code is returned
             BrazeRateLimitError: If a 429 status code is returned
             BrazeInternalServerError: If a 5XX status code is returned
+            BrazeCircuitOpenError: If the endpoint's circuit is open
+            BrazeDeadlineExceededError: If the deadline set by ``timeout`` has passed
         """
-        self.session.headers.update(
-            {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
-        )
-
-        if request_type == 'post':
-            resp = self.session.post(urljoin(self.api_url, endpoint), data=json.dumps(data), timeout=2)
-        else:
-            resp = self.session.get(urljoin(self.api_url, endpoint), params=data, timeout=2)
+        timings = RequestTimings()
+        start = time.perf_counter()
+        body = json.dumps(data) if request_type != REQUEST_TYPE_GET else None
+        timings.serialization_s = time.perf_counter() - start
+        request_plan = _request_plan.get()
+        if request_plan is not None:
+            return request_plan.record(endpoint, data, body)
+
+        self._run_hooks(HOOK_BEFORE_SEND, endpoint, request_type, body if body is not None else data)
+
+        with ExitStack() as slot:
+            try:
+                if self.scheduler is not None:
+                    # The wait for a slot counts against the deadline, and the timeouts are what is left of it.
+                    slot.enter_context(self.scheduler.slot(
+                        _request_priority.get(), endpoint, self.rate_limits, deadline=_request_timeout.get()[1]
+                    ))
+                timeout = self._timeout_for(endpoint, timeout_key)
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.before_request(endpoint)
+            except (BrazeCircuitOpenError, BrazeDeadlineExceededError) as exc:
+                self._run_hooks(HOOK_ON_ERROR, endpoint, request_type, exc, timings)
+                raise
+
+            try:
+                resp = self._send(body, data, endpoint, request_type, timeout, attempt, timings)
+                start = time.perf_counter()
+                response_json = self._parse_response(resp)
+                timings.deserialization_s = time.perf_counter() - start
+            except Exception as exc:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.after_request(endpoint, exc)
+                self._run_hooks(HOOK_ON_ERROR, endpoint, request_type, exc, timings)
+                raise
+
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.after_request(endpoint)
+
+        self._run_hooks(HOOK_AFTER_RESPONSE, endpoint, request_type, resp, timings)
+        return response_json
+
+    def _send(self, body, data, endpoint, request_type, timeout, attempt, timings):
+        """
+        Send a serialized request, recording its network time and metrics.
+        """
+        resp = None
+        start = time.perf_counter()
+        try:
+            if request_type == REQUEST_TYPE_GET:
+                resp = self.session.get(urljoin(self.api_url, endpoint), params=data, timeout=timeout)
+            else:
+                resp = self.session.request(request_type, urljoin(self.api_url, endpoint), data=body, timeout=timeout)
+            return resp
+        finally:
+            timings.network_s = time.perf_counter() - start
+            if resp is not None:
+                self.rate_limits.update(endpoint, resp.headers)
+            if self.metrics_sink is not None:
+                self._record_metric(RequestMetric(
+                    endpoint=endpoint,
+                    request_type=request_type,
+                    latency_s=timings.network_s,
+                    payload_bytes=len(body) if body else 0,
+                    response_bytes=len(resp.content) if resp is not None else 0,
+                    status_code=resp.status_code if resp is not None else None,
+                    attempt=attempt,
+                ))
+
+    def _record_metric(self, metric):
+        """
+        Record a request metric, a failing sink being logged rather than failing the request.
+        """
+        try:
+            self.metrics_sink.record(metric)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('Braze metrics sink %r failed', self.metrics_sink)
 
+    def _parse_response(self, resp):
+        """
+        Return the json body of a successful response, or raise the matching Braze error.
+        """
         try:
             resp.raise_for_status()
             return resp.json()
@@ -126,16 +517,52 @@ class BrazeClient:
 
         https://www.braze.com/docs/api/endpoints/export/user_data/post_users_identifier/
 
+        Concurrent lookups of the same email share a single in-flight request. When the client
+        is configured with a lookup batch window, concurrent lookups of different emails are
+        first resolved together through their aliases, falling back to one request per email
+        for any that are not found.
+
         Arguments:
             email (str): e.g. 'test1@example.com'
         Returns:
             external_id (int): external_id if account exists
         """
+        if _request_plan.get() is not None:
+            # Planned lookups must not join the shared lookups of requests being sent.
+            return self._export_external_id(email)
+        return self._external_id_lookups.do(email, self._get_braze_external_id, email)
+
+    def _recipient_external_id(self, email):
+        """
+        Look up the external id of a message recipient, a placeholder one when planning.
+        """
+        external_id = self.get_braze_external_id(email)
+        if not external_id and _request_plan.get() is not None:
+            return PLANNED_EXTERNAL_ID
+        return external_id
+
+    def _get_braze_external_id(self, email):
+        """
+        Look up the external id of a single email, through the micro-batcher when there is one.
+        """
+        if self._external_id_batcher is not None:
+            external_id = self._external_id_batcher.submit(email)
+            if external_id:
+                return external_id
+
+        return self._export_external_id(email)
+
+    def _export_external_id(self, email):
+        """
+        Export the external id of a single email via /users/export/ids.
+        """
         payload = {
             'email_address': email,
             'fields_to_export': ['external_id']
         }
-        response = self._make_request(payload, BrazeAPIEndpoints.EXPORT_IDS, REQUEST_TYPE_POST)
+        response = self._make_request(
+            payload, BrazeAPIEndpoints.EXPORT_IDS, REQUEST_TYPE_POST, timeout_key=LOOKUP_TIMEOUT_KEY
+        )
         if response['users'] and 'external_id' in response['users'][0]:
             return response['users'][0].get('external_id')
 
@@ -161,30 +588,72 @@ class BrazeClient:
             external_id (dict(str -> str): external_ids (string of lms_user_id) by email,
               for any existing external ids.
         """
+        email_batches = list(self._chunks(emails, GET_EXTERNAL_IDS_CHUNK_SIZE))
+        logger.info(
+            'batch identify braze users: %d emails in %d requests', len(emails), len(email_batches)
+        )
+
+        # Chunks are exported concurrently, but merged in input order.
         external_ids_by_email = {}
-        for email_batch in self._chunks(emails, GET_EXTERNAL_IDS_CHUNK_SIZE):
-            user_aliases = [
-                {
-                    'alias_label': alias_label,
-                    'alias_name': email,
-                }
-                for email in email_batch
-            ]
-            payload = {
-                'user_aliases': user_aliases,
-                'fields_to_export': ['external_id', 'email']
-            }
-            logger.info('batch identify braze users request payload: %s', payload)
+        for batch_external_ids in self._run_concurrently(
+            lambda email_batch: self._export_external_ids_chunk(email_batch, alias_label),
+            email_batches,
+        ):
+            external_ids_by_email.update(batch_external_ids)
 
-            response = self._make_request(payload, BrazeAPIEndpoints.EXPORT_IDS, REQUEST_TYPE_POST)
+        if self.alias_index is not None:
+            self.alias_index.add(alias_label, external_ids_by_email)
 
-            for identified_user in response['users']:
-                identified_email = identified_user.get('email')
-                external_id = identified_user.get('external_id')
-                if identified_email and external_id:
-                    external_ids_by_email[identified_email] = external_id
+        logger.info(
+            'batch identify braze users resolved %d of %d external ids', len(external_ids_by_email), len(emails)
+        )
+        return external_ids_by_email
 
-        logger.info(f'external ids from batch identify braze users response: {external_ids_by_email}')
+    def _export_external_ids_chunk(self, email_batch, alias_label, timeout_key=None):
+        """
+        Export the external ids of up to 50 alias-identified emails.
+
+        ``timeout_key`` is LOOKUP_TIMEOUT_KEY when the chunk batches single-user lookups.
+
+        Returns:
+            external_id (dict(str -> str)): external ids by email, ordered as ``email_batch``
+        """
+        user_aliases = [
+            {
+                'alias_label': alias_label,
+                'alias_name': email,
+            }
+            for email in email_batch
+        ]
+        payload = {
+            'user_aliases': user_aliases,
+            'fields_to_export': ['external_id', 'email']
+        }
+        # Only a sample of the batch is logged, formatting every payload dominates large exports.
+        logger.debug(
+            'batch identify braze users request: %d aliases, starting with %s',
+            len(email_batch),
+            email_batch[:LOGGED_SAMPLE_SIZE],
+        )
+
+        response = self._make_bulk_request(
+            payload, BrazeAPIEndpoints.EXPORT_IDS, REQUEST_TYPE_POST, dead_letter=False, timeout_key=timeout_key
+        )
+
+        identified_external_ids = {}
+        for identified_user in response['users']:
+            identified_email = identified_user.get('email')
+            external_id = identified_user.get('external_id')
+            if identified_email and external_id:
+                identified_external_ids[identified_email] = external_id
+
+        external_ids_by_email = {
+            email: identified_external_ids.pop(email)
+            for email in email_batch
+            if email in identified_external_ids
+        }
+        # Keep anything Braze returned under a different spelling of the email.
+        external_ids_by_email.update(identified_external_ids)
         return external_ids_by_email
 
     def identify_users(self, aliases_to_identify):
@@ -221,7 +690,8 @@ class BrazeClient:
         The user_alias objects requires a passed in alias_label.
 
         https://www.braze.com/docs/api/endpoints/user_data/post_user_identify/
-        The maximum email/user_id dictionary limit is 50, any length beyond 50 will raise an error.
+        Any number of emails is supported, the aliases are identified in concurrent
+        batches of 50, the maximum accepted by the endpoint.
 
         The trigger properties default to None and return as an empty dictionary if no individualized
         trigger property is set based on the email.
@@ -235,7 +705,7 @@ class BrazeClient:
                                                 Default is None
 
         Raises:
-        - `BrazeClientError`: if the number of entries in `user_id_by_email` exceeds 50.
+        - `BrazeClientError`: if `user_id_by_email` is empty.
 
         Returns:
         - Dict: A dictionary where the key is the `user_email` (str) and the value is the metadata
@@ -255,50 +725,47 @@ class BrazeClient:
                     },
                 )
         """
-        if len(user_id_by_email) > MAX_NUM_IDENTIFY_USERS_ALIASES:
-            msg = "Max recipient limit reached."
+        if not user_id_by_email:
+            msg = 'Bad arguments, user_id_by_email is required.'
             raise BrazeClientError(msg)
 
         if trigger_properties_by_email is None:
             trigger_properties_by_email = {}
 
-        user_aliases_by_email = {
-                email: {
-                    "alias_label": alias_label,
-                    "alias_name": email,
-                }
-                for email in user_id_by_email
-        }
-        # Identify the user alias in case it already exists. This is necessary so
-        # we don't accidently create a duplicate Braze profile.
-        self.identify_users([
-            {
-                'external_id': lms_user_id,
-                'user_alias': user_aliases_by_email.get(email)
-            }
-            for email, lms_user_id in user_id_by_email.items()
-        ])
-
-        attributes_by_email = {
-            email: {
-                "user_alias": user_aliases_by_email.get(email),
-                "email": email,
-                "is_enterprise_learner": True,
-                "_update_existing_only": False,
+        aliases_to_identify = []
+        recipients = {}
+        for email, lms_user_id in user_id_by_email.items():
+            user_alias = {
+                "alias_label": alias_label,
+                "alias_name": email,
             }
-            for email in user_id_by_email
-        }
-
-        return {
-            email: {
+            aliases_to_identify.append({
+                'external_id': lms_user_id,
+                'user_alias': user_alias,
+            })
+            recipients[email] = {
                 'external_user_id': lms_user_id,
-                'attributes': attributes_by_email.get(email),
+                'attributes': {
+                    "user_alias": user_alias,
+                    "email": email,
+                    "is_enterprise_learner": True,
+                    "_update_existing_only": False,
+                },
                 # If a profile does not already exist, Braze will create a new profile before sending a message.
                 'send_to_existing_only': False,
                 'trigger_properties': trigger_properties_by_email.get(email, {}),
             }
-            for email, lms_user_id in user_id_by_email.items()
-        }
+
+        # Identify the user alias in case it already exists. This is necessary so
+        # we don't accidently create a duplicate Braze profile.
+        self._run_concurrently(
+            lambda alias_chunk: self._make_bulk_request(
+                {'aliases_to_identify': alias_chunk}, BrazeAPIEndpoints.IDENTIFY_USERS, REQUEST_TYPE_POST
+            ),
+            self._chunks(aliases_to_identify, MAX_NUM_IDENTIFY_USERS_ALIASES),
+        )
+
+        return recipients
 
     def track_user(
         self,
@@ -310,6 +777,7 @@ class BrazeClient:
         Record custom events, purchases, and update user profile attributes.
 
         https://www.braze.com/docs/api/endpoints/user_data/post_user_track/
+        Items are sent in concurrent requests of up to 75 attributes, 75 events and 75 purchases.
 
         Arguments:
             attributes (list): The list of attribute objects
@@ -331,39 +799,36 @@ class BrazeClient:
         events_chunks = deque(self._chunks(events, TRACK_USER_COMPONENT_CHUNK_SIZE))
         purchase_chunks = deque(self._chunks(purchases, TRACK_USER_COMPONENT_CHUNK_SIZE))
 
+        payloads = []
         while attribute_chunks or events_chunks or purchase_chunks:
             payload = {}
 
             if attribute_chunks:
                 payload['attributes'] = attribute_chunks.popleft()
 
-            if events:
+            if events_chunks:
                 payload['events'] = events_chunks.popleft()
 
-            if purchases:
+            if purchase_chunks:
                 payload['purchases'] = purchase_chunks.popleft()
 
-            self._make_request(payload, BrazeAPIEndpoints.TRACK_USER, REQUEST_TYPE_POST)
-
-    def create_braze_alias(self, emails, alias_label, attributes=None):
-        """
-        Create a Braze anonymous user for each email and assign it an alias.
+            payloads.append(payload)
 
-        https://www.braze.com/docs/api/endpoints/user_data/post_user_alias/
+        # The requests are sent concurrently, Braze may apply them in any order.
+        self._run_concurrently(self._track_user_chunk, payloads)
 
-        Arguments:
-            emails (list): e.g. ['test1@example.com', 'test2@example.com']
-            alias_label (str): The type of alias
-            attributes (list): The list of attributes to add to the user
+    def _track_user_chunk(self, payload):
         """
-        if not (emails and alias_label):
-            msg = 'Bad arguments, please check that emails, and alias_label are non-empty.'
-            raise BrazeClientError(msg)
+        Send a single /users/track request of at most 75 items of each kind.
+        """
+        return self._make_bulk_request(payload, BrazeAPIEndpoints.TRACK_USER, REQUEST_TYPE_POST)
 
+    def _user_aliases_and_attributes(self, emails, alias_label, external_ids_by_email):
+        """
+        Build the /users/alias/new alias objects and matching email attributes for ``emails``.
+        """
         user_aliases = []
-        attributes = attributes or []
-
-        external_ids_by_email = self.get_braze_external_id_batch(emails, alias_label)
+        attributes = []
         for email in emails:
             user_alias = {
                 'alias_label': alias_label,
@@ -382,16 +847,253 @@ class BrazeClient:
             }
             attributes.append(attribute)
 
+        return user_aliases, attributes
+
+    def _create_aliases(self, user_aliases, alias_label):
+        """
+        Create up to 50 aliases via /users/alias/new and record them in the alias index.
+        """
+        alias_payload = {
+            'user_aliases': user_aliases,
+        }
+        response = self._make_bulk_request(alias_payload, BrazeAPIEndpoints.NEW_ALIAS, REQUEST_TYPE_POST)
+        # A chunk stored as a dead letter was not created, nor was a planned one.
+        if self.alias_index is not None and response is not None and _request_plan.get() is None:
+            self.alias_index.add(alias_label, [user_alias['alias_name'] for user_alias in user_aliases])
+
+    def _create_alias_chunk(self, emails, alias_label):
+        """
+        Look up and create the aliases for a single chunk of emails.
+
+        Returns:
+            attributes (list): The email attributes to track for the chunk
+        """
+        external_ids_by_email = self.get_braze_external_id_batch(emails, alias_label)
+        user_aliases, attributes = self._user_aliases_and_attributes(emails, alias_label, external_ids_by_email)
+        self._create_aliases(user_aliases, alias_label)
+        return attributes
+
+    def _create_braze_alias_pipelined(self, emails, alias_label, attributes):
+        """
+        Run the lookup, alias creation and track stages of ``create_braze_alias`` concurrently.
+
+        Each chunk of emails is looked up and aliased independently, and its attributes are
+        sent to /users/track as soon as enough have accumulated to fill a request. Alias chunks
+        are submitted only as workers free up, so a ready track chunk is queued ahead of the
+        remaining lookups instead of waiting for all of them.
+        """
+        pending_attributes = list(attributes)
+        track_futures = []
+        pool_size = max(self._pool_size(), 1)
+        email_chunks = iter(self._chunks(emails, min(GET_EXTERNAL_IDS_CHUNK_SIZE, USER_ALIAS_CHUNK_SIZE)))
+
+        def submit_track_chunk(chunk_size):
+            payload = {
+                'attributes': pending_attributes[:chunk_size],
+            }
+            del pending_attributes[:chunk_size]
+            track_futures.append(
+                self._submit(executor, self._track_user_chunk, payload)
+            )
+
+        def submit_alias_chunks(alias_futures):
+            for email_chunk in email_chunks:
+                alias_futures.add(self._submit(executor, self._create_alias_chunk, email_chunk, alias_label))
+                if len(alias_futures) >= pool_size:
+                    break
+            return alias_futures
+
+        executor = ThreadPoolExecutor(max_workers=pool_size)
+        try:
+            alias_futures = submit_alias_chunks(set())
+            while alias_futures:
+                done, alias_futures = wait(alias_futures, return_when=FIRST_COMPLETED)
+                for alias_future in done:
+                    pending_attributes.extend(alias_future.result())
+                while len(pending_attributes) >= TRACK_USER_COMPONENT_CHUNK_SIZE:
+                    submit_track_chunk(TRACK_USER_COMPONENT_CHUNK_SIZE)
+                submit_alias_chunks(alias_futures)
+
+            if pending_attributes:
+                submit_track_chunk(len(pending_attributes))
+
+            for track_future in track_futures:
+                track_future.result()
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def create_braze_alias(self, emails, alias_label, attributes=None, pipelined=False):
+        """
+        Create a Braze anonymous user for each email and assign it an alias.
+
+        https://www.braze.com/docs/api/endpoints/user_data/post_user_alias/
+
+        Arguments:
+            emails (list): e.g. ['test1@example.com', 'test2@example.com']
+            alias_label (str): The type of alias
+            attributes (list): The list of attributes to add to the user
+            pipelined (bool): Overlap the lookup, alias creation and track requests of
+            different chunks instead of running each stage to completion, defaults to False
+        """
+        if not (emails and alias_label):
+            msg = 'Bad arguments, please check that emails, and alias_label are non-empty.'
+            raise BrazeClientError(msg)
+
+        if self.alias_index is not None:
+            # Aliases created by a previous run already exist, only new users need a round trip.
+            emails = self.alias_index.unknown(alias_label, emails)
+
+        if pipelined:
+            self._create_braze_alias_pipelined(emails, alias_label, attributes or [])
+            return
+
+        attributes = attributes or []
+
+        external_ids_by_email = self.get_braze_external_id_batch(emails, alias_label) if emails else {}
+        user_aliases, email_attributes = self._user_aliases_and_attributes(emails, alias_label, external_ids_by_email)
+        attributes.extend(email_attributes)
+
         # Each request can support up to 50 aliases.
         for user_alias_chunk in self._chunks(user_aliases, USER_ALIAS_CHUNK_SIZE):
-            alias_payload = {
-                'user_aliases': user_alias_chunk,
-            }
-            self._make_request(alias_payload, BrazeAPIEndpoints.NEW_ALIAS, REQUEST_TYPE_POST)
+            self._create_aliases(user_alias_chunk, alias_label)
 
         if attributes:
             self.track_user(attributes=attributes)
 
+    def sync_catalog(self, catalog_name, items, snapshot=None):
+        """
+        Make a Braze catalog match a full set of items, sending only the items that changed.
+
+        https://www.braze.com/docs/api/endpoints/catalogs/catalog_items/asynchronous/
+
+        The items are compared with the hashes in ``snapshot``: new and changed items are
+        replaced, which creates the items Braze does not have, and items missing from ``items``
+        are deleted, in concurrent requests of up to 50 items. Items new to the snapshot may
+        already exist in Braze, e.g. after the snapshot was lost, so they are never sent as
+        creates. The snapshot is updated for every request Braze accepts and saved even if some
+        fail, so the next sync retries only what was not sent.
+
+        Example:
+            snapshot = FileCatalogSnapshot('courses_snapshot.json')
+            client.sync_catalog('courses', courses, snapshot)
+
+        Arguments:
+            catalog_name (str): The name of an existing catalog, e.g. 'courses'
+            items (iterable(dict)): Every item of the catalog, each with a unique 'id'
+            snapshot (CatalogSnapshot): The items last synced, every item is sent without one
+        Returns:
+            summary (dict): The number of items 'created', 'updated', 'deleted' and 'unchanged'
+        """
+        snapshot = snapshot if snapshot is not None else CatalogSnapshot()
+        created, updated, deleted, hashes = diff_catalog(items, snapshot.hashes())
+        endpoint = BrazeAPIEndpoints.CATALOG_ITEMS.format(catalog_name=catalog_name)
+
+        batches = [(REQUEST_TYPE_PUT, chunk) for chunk in self._chunks(created + updated, CATALOG_ITEMS_CHUNK_SIZE)]
+        batches.extend(
+            (REQUEST_TYPE_DELETE, [{'id': item_id} for item_id in chunk])
+            for chunk in self._chunks(deleted, CATALOG_ITEMS_CHUNK_SIZE)
+        )
+        logger.info(
+            'sync braze catalog %s: %d created, %d updated, %d deleted in %d requests',
+            catalog_name, len(created), len(updated), len(deleted), len(batches),
+        )
+
+        try:
+            self._run_concurrently(
+                lambda batch: self._sync_catalog_batch(endpoint, batch, hashes, snapshot),
+                batches,
+            )
+        finally:
+            if _request_plan.get() is None:
+                snapshot.save()
+
+        return {
+            'created': len(created),
+            'updated': len(updated),
+            'deleted': len(deleted),
+            'unchanged': len(hashes) - len(created) - len(updated),
+        }
+
+    def _sync_catalog_batch(self, endpoint, batch, hashes, snapshot):
+        """
+        Send a single replace or delete request of up to 50 catalog items, recording it in the snapshot.
+        """
+        request_type, items = batch
+        response = self._make_bulk_request({'items': items}, endpoint, request_type)
+        # A batch stored as a dead letter was not synced, nor was a planned one.
+        if response is None or _request_plan.get() is not None:
+            return
+
+        item_ids = [str(item['id']) for item in items]
+        if request_type == REQUEST_TYPE_DELETE:
+            snapshot.remove(item_ids)
+        else:
+            snapshot.update({item_id: hashes[item_id] for item_id in item_ids})
+
+    def delete_users(self, external_ids=None, user_aliases=None):
+        """
+        Delete users via /users/delete.
+
+        https://www.braze.com/docs/api/endpoints/user_data/post_user_delete/
+
+        Any number of users can be passed, they are deleted in concurrent requests of up to 50.
+        A failed request does not stop the others, its users report the error as their outcome.
+        Deleted aliases are discarded from the alias index.
+
+        Arguments:
+            external_ids (iterable(str)): e.g. ['1', '2']
+            user_aliases (iterable(dict)): e.g. [{'alias_label': 'Enterprise', 'alias_name': 'test@example.com'}]
+        Returns:
+            outcomes (dict): The outcome of each user, keyed by external id or by (alias_label, alias_name):
+            DELETE_OUTCOME_DELETED, DELETE_OUTCOME_DEAD_LETTERED when the request was rejected and stored
+            in the dead-letter store, or the exception that failed the request
+        """
+        users = [('external_ids', str(external_id)) for external_id in dict.fromkeys(external_ids or [])]
+        users.extend(
+            ('user_aliases', user_alias) for user_alias in dict.fromkeys(
+                (user_alias['alias_label'], user_alias['alias_name']) for user_alias in user_aliases or []
+            )
+        )
+        if not users:
+            msg = 'Bad arguments, please check that external_ids or user_aliases are non-empty.'
+            raise BrazeClientError(msg)
+
+        user_chunks = list(self._chunks(users, DELETE_USERS_CHUNK_SIZE))
+        logger.info('delete braze users: %d users in %d requests', len(users), len(user_chunks))
+
+        outcomes = {}
+        for chunk_outcomes in self._run_concurrently(self._delete_users_chunk, user_chunks):
+            outcomes.update(chunk_outcomes)
+        return outcomes
+
+    def _delete_users_chunk(self, users):
+        """
+        Delete up to 50 users, returning their outcomes instead of raising.
+        """
+        payload = {}
+        for kind, user in users:
+            if kind == 'user_aliases':
+                user = {'alias_label': user[0], 'alias_name': user[1]}
+            payload.setdefault(kind, []).append(user)
+
+        try:
+            response = self._make_bulk_request(payload, BrazeAPIEndpoints.DELETE_USERS, REQUEST_TYPE_POST)
+        except (BrazeClientError, requests.exceptions.RequestException) as exc:
+            logger.warning('delete braze users: request of %d users failed: %r', len(users), exc)
+            return {user: exc for _, user in users}
+
+        if response is None:
+            return {user: DELETE_OUTCOME_DEAD_LETTERED for _, user in users}
+
+        if self.alias_index is not None and _request_plan.get() is None:
+            alias_names_by_label = {}
+            for alias_label, alias_name in (user for kind, user in users if kind == 'user_aliases'):
+                alias_names_by_label.setdefault(alias_label, []).append(alias_name)
+            for alias_label, alias_names in alias_names_by_label.items():
+                self.alias_index.discard(alias_label, alias_names)
+        return {user: DELETE_OUTCOME_DELETED for _, user in users}
+
+    @_high_priority
     def send_email(
         self,
         emails,
@@ -427,7 +1129,7 @@ class BrazeClient:
 
         external_ids = []
         for email in emails:
-            external_id = self.get_braze_external_id(email)
+            external_id = self._recipient_external_id(email)
             if not external_id:
                 raise BrazeClientError(f'Braze user with email {email} was not found.')
 
@@ -456,6 +1158,7 @@ class BrazeClient:
         }
         return self._make_request(payload, BrazeAPIEndpoints.SEND_MESSAGE, REQUEST_TYPE_POST)
 
+    @_high_priority
     def send_campaign_message(
         self,
         campaign_id,
@@ -493,7 +1196,7 @@ class BrazeClient:
         }
 
         for email in emails:
-            external_user_id = self.get_braze_external_id(email)
+            external_user_id = self._recipient_external_id(email)
 
             recipient = {
                 'external_user_id': external_user_id,
@@ -509,6 +1212,7 @@ class BrazeClient:
 
         return self._make_request(message, BrazeAPIEndpoints.SEND_CAMPAIGN, REQUEST_TYPE_POST)
 
+    @_high_priority
     def send_canvas_message(
         self,
         canvas_id,
@@ -539,7 +1243,7 @@ class BrazeClient:
         recipients = recipients or []
 
         for email in emails:
-            external_user_id = self.get_braze_external_id(email)
+            external_user_id = self._recipient_external_id(email)
 
             recipient = {
                 'external_user_id': external_user_id,
@@ -562,6 +1266,137 @@ class BrazeClient:
 
         return self._make_request(message, BrazeAPIEndpoints.SEND_CANVAS, REQUEST_TYPE_POST)
 
+    def schedule_campaign_message(
+        self,
+        campaign_id,
+        send_at,
+        emails=None,
+        recipients=None,
+        trigger_properties=None,
+        in_local_time=False,
+        at_optimal_time=False,
+    ):
+        """
+        Schedule a campaign message via API-triggered delivery, for Braze to send at ``send_at``.
+
+        https://www.braze.com/docs/api/endpoints/messaging/schedule_messages/post_schedule_triggered_campaigns/
+
+        Any number of recipients is supported, they are scheduled in concurrent requests of 50,
+        the maximum accepted by the endpoint. A failed request does not stop the others, its
+        outcome is the error, so the schedule_ids of the accepted requests are never lost.
+
+        Arguments:
+            campaign_id (str): The campaign identifier, the campaign must
+            be an API-triggered campaign (set up via delivery settings)
+            send_at (datetime or str): When to send, a timezone-aware datetime or an ISO 8601 string
+            emails (list): e.g. ['test1@example.com', 'test2@example.com']
+            recipients (list): The recipients objects
+            trigger_properties: Personalization key-value pairs that will
+            apply to all users
+            in_local_time (bool): Send at ``send_at`` in each user's local time
+            at_optimal_time (bool): Send on the day of ``send_at`` at each user's optimal time
+        Returns:
+            outcomes (list): The outcome of each request of up to 50 recipients, in order: its response
+            object holding its schedule_id, or the exception that failed it
+        """
+        message = {
+            'campaign_id': campaign_id,
+            'trigger_properties': trigger_properties or {},
+            'broadcast': False,
+        }
+        return self._schedule_message(
+            message, BrazeAPIEndpoints.SCHEDULE_CAMPAIGN, send_at, emails, recipients, in_local_time, at_optimal_time
+        )
+
+    def schedule_canvas_message(
+        self,
+        canvas_id,
+        send_at,
+        emails=None,
+        recipients=None,
+        canvas_entry_properties=None,
+        in_local_time=False,
+        at_optimal_time=False,
+    ):
+        """
+        Schedule a canvas message via API-triggered delivery, for Braze to send at ``send_at``.
+
+        https://www.braze.com/docs/api/endpoints/messaging/schedule_messages/post_schedule_triggered_canvases/
+
+        Any number of recipients is supported, they are scheduled in concurrent requests of 50,
+        the maximum accepted by the endpoint. A failed request does not stop the others, its
+        outcome is the error, so the schedule_ids of the accepted requests are never lost.
+
+        Arguments:
+            canvas_id (str): The canvas identifier, the canvas must
+            be an API-triggered campaign (set up via delivery settings)
+            send_at (datetime or str): When to send, a timezone-aware datetime or an ISO 8601 string
+            emails (list): e.g. ['test1@example.com', 'test2@example.com']
+            recipients (list): The recipients objects
+            canvas_entry_properties: Personalization key-value pairs that will
+            apply to all users
+            in_local_time (bool): Send at ``send_at`` in each user's local time
+            at_optimal_time (bool): Send on the day of ``send_at`` at each user's optimal time
+        Returns:
+            outcomes (list): The outcome of each request of up to 50 recipients, in order: its response
+            object holding its schedule_id, or the exception that failed it
+        """
+        message = {
+            'canvas_id': canvas_id,
+            'canvas_entry_properties': canvas_entry_properties or {},
+            'broadcast': False,
+        }
+        return self._schedule_message(
+            message, BrazeAPIEndpoints.SCHEDULE_CANVAS, send_at, emails, recipients, in_local_time, at_optimal_time
+        )
+
+    def _schedule_message(self, message, endpoint, send_at, emails, recipients, in_local_time, at_optimal_time):
+        """
+        Schedule ``message`` for the recipients and emails, in concurrent requests of up to 50 recipients.
+        """
+        if not (emails or recipients):
+            msg = 'Bad arguments, please check that emails or recipients are non-empty.'
+            raise BrazeClientError(msg)
+        if isinstance(send_at, datetime.datetime):
+            if send_at.tzinfo is None:
+                raise BrazeClientError('Bad arguments, send_at must be a timezone-aware datetime.')
+            send_at = send_at.isoformat()
+        if not send_at:
+            raise BrazeClientError('Bad arguments, please check that send_at is non-empty.')
+
+        recipients = list(recipients or [])
+        for email in emails or []:
+            external_user_id = self._recipient_external_id(email)
+            if not external_user_id:
+                raise BrazeClientError(
+                    f'Braze user with email {email} was not found. Please pass in custom recipients '
+                    'if you wish to schedule messages to anonymous users.'
+                )
+            recipients.append({'external_user_id': external_user_id})
+
+        schedule = {
+            'time': send_at,
+            'in_local_time': in_local_time,
+            'at_optimal_time': at_optimal_time,
+        }
+        logger.info('schedule braze message to %d recipients at %s via %s', len(recipients), send_at, endpoint)
+        return self._run_concurrently(
+            lambda chunk: self._schedule_chunk(dict(message, recipients=chunk, schedule=schedule), endpoint),
+            self._chunks(recipients, SCHEDULE_RECIPIENTS_CHUNK_SIZE),
+        )
+
+    def _schedule_chunk(self, payload, endpoint):
+        """
+        Schedule a message for up to 50 recipients, returning the exception that failed it instead of raising.
+        """
+        try:
+            return self._make_bulk_request(payload, endpoint, REQUEST_TYPE_POST, dead_letter=False)
+        except (BrazeClientError, requests.exceptions.RequestException) as exc:
+            logger.warning(
+                'schedule braze message: request of %d recipients failed: %r', len(payload['recipients']), exc
+            )
+            return exc
+
     def unsubscribe_user_email(
         self,
         email
@@ -592,6 +1427,66 @@ class BrazeClient:
 
         return self._make_request(payload, BrazeAPIEndpoints.UNSUBSCRIBE_USER_EMAIL, REQUEST_TYPE_POST)
 
+    def set_subscription_status(self, updates):
+        """
+        Set the subscription group state of any number of users via /subscription/status/set.
+
+        https://www.braze.com/docs/api/endpoints/subscription_groups/post_update_user_subscription_group_status/
+
+        Users are grouped by subscription group, state and identifier kind so each request
+        updates up to 50 of them, and the requests are sent concurrently. When a user has
+        several updates for the same group, the last one wins.
+
+        Arguments:
+            updates (iterable(dict)): e.g.
+            [
+                {'subscription_group_id': 'group_id', 'subscription_state': 'subscribed', 'external_id': '1'},
+                {'subscription_group_id': 'group_id', 'subscription_state': 'unsubscribed', 'email': 'a@example.com'},
+            ]
+            each update identifies its user by one of 'external_id', 'email' or 'phone'
+        """
+        states = {}
+        for update in updates:
+            identifiers = [key for key in SUBSCRIPTION_IDENTIFIER_KEYS if update.get(key)]
+            if (
+                not update.get('subscription_group_id')
+                or update.get('subscription_state') not in (SUBSCRIBED_STATE, UNSUBSCRIBED_STATE)
+                or len(identifiers) != 1
+            ):
+                msg = f'Bad arguments, invalid subscription status update {update}.'
+                raise BrazeClientError(msg)
+
+            identifier_key = identifiers[0]
+            user_key = (update['subscription_group_id'], identifier_key, str(update[identifier_key]))
+            # Moving the user to the end keeps its last update, in the order updates were made.
+            states.pop(user_key, None)
+            states[user_key] = update['subscription_state']
+
+        if not states:
+            msg = 'Bad arguments, please check that updates are non-empty.'
+            raise BrazeClientError(msg)
+
+        users_by_group = {}
+        for (group_id, identifier_key, user), state in states.items():
+            users_by_group.setdefault((group_id, state, identifier_key), []).append(user)
+
+        payloads = [
+            {
+                'subscription_group_id': group_id,
+                'subscription_state': state,
+                identifier_key: user_chunk,
+            }
+            for (group_id, state, identifier_key), users in users_by_group.items()
+            for user_chunk in self._chunks(users, SUBSCRIPTION_STATUS_CHUNK_SIZE)
+        ]
+        logger.info('set braze subscription status: %d users in %d requests', len(states), len(payloads))
+        self._run_concurrently(
+            lambda payload: self._make_bulk_request(
+                payload, BrazeAPIEndpoints.SET_SUBSCRIPTION_STATUS, REQUEST_TYPE_POST
+            ),
+            payloads,
+        )
+
     def retrieve_unsubscribed_emails(
         self,
         start_date,
@@ -641,3 +1536,70 @@ class BrazeClient:
             unsubscribed_emails.extend(emails)
 
         return unsubscribed_emails
+
+    def export_segment(
+        self,
+        segment_id,
+        fields_to_export,
+        output_format='zip',
+        poll_interval_s=SEGMENT_EXPORT_POLL_INTERVAL_S,
+        timeout_s=SEGMENT_EXPORT_TIMEOUT_S,
+    ):
+        """
+        Export every user of a segment via /users/export/segment.
+
+        https://www.braze.com/docs/api/endpoints/export/user_data/post_users_segment/
+
+        The export is triggered right away. Iterating the result waits for the export file,
+        streams it to a temporary file and parses it one line at a time, so segments of any
+        size are exported without holding them in memory. The temporary file is removed once
+        iteration completes or the iterator is closed.
+
+        Example:
+            for user in client.export_segment(segment_id, ['external_id', 'email']):
+                ...
+
+        Arguments:
+            segment_id (str): The identifier of the segment to export
+            fields_to_export (list): e.g. ['external_id', 'email', 'custom_attributes']
+            output_format (str): 'zip' or 'gzip', the compression of the exported files
+            poll_interval_s (float): How long to wait between checks that the export is ready
+            timeout_s (float): How long to wait for the export to be ready
+        Returns:
+            users (iterator(dict)): The exported user objects
+        Raises:
+            BrazeExportNotReadyError: If the export is not ready within ``timeout_s``
+        """
+        if not segment_id or not fields_to_export:
+            msg = 'Bad arguments, please check that segment_id and fields_to_export are non-empty.'
+            raise BrazeClientError(msg)
+
+        payload = {
+            'segment_id': segment_id,
+            'fields_to_export': fields_to_export,
+            'output_format': output_format,
+        }
+        response = self._make_request(payload, BrazeAPIEndpoints.EXPORT_SEGMENT, REQUEST_TYPE_POST)
+        if _request_plan.get() is not None:
+            return iter(())
+
+        url = response.get('url')
+        if not url:
+            # Workspaces with cloud storage credentials receive the export in their bucket instead.
+            raise BrazeClientError(
+                f"Segment export written to cloud storage under {response.get('object_prefix')}, not downloadable."
+            )
+        logger.info('segment %s export triggered, waiting for %s', segment_id, url)
+        return self._iter_segment_export(url, poll_interval_s, timeout_s)
+
+    def _iter_segment_export(self, url, poll_interval_s, timeout_s):
+        """
+        Download an export file and yield its user objects, removing the file afterwards.
+        """
+        # The export url is presigned, the Braze API key must not be sent with it.
+        with requests.Session() as download_session:
+            path = download_export(download_session, url, poll_interval_s, timeout_s)
+        try:
+            yield from iter_export_records(path)
+        finally:
+            os.remove(path)
@@ -0,0 +1,262 @@
+"""
+Concurrency primitives used by the Braze client.
+"""
+import threading
+import time
+
+from .exceptions import BrazeRateLimitError
+
+
+class _Call:
+    """
+    A call in flight, shared by the callers waiting on its outcome.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function, callers arriving while it is
+    in flight wait and receive the same result, or the same exception.
+    """
+
+    def __init__(self):
+        """
+        Initialize with no calls in flight.
+        """
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Return ``func(*args, **kwargs)``, sharing the call with concurrent callers for ``key``.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class _Batch:
+    """
+    A batch of keys collected by a MicroBatcher.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.full = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Collect concurrent single-key lookups for a short window and resolve them in one batch.
+
+    The first caller to arrive opens a batch and waits up to ``window_s`` seconds, or
+    until ``max_batch_size`` distinct keys have joined, before resolving every key in the
+    batch with a single call to ``resolve_batch``.
+    """
+
+    def __init__(self, resolve_batch, max_batch_size, window_s):
+        """
+        Arguments:
+            resolve_batch (callable): Takes a list of keys and returns a dict of results by key,
+            keys missing from the dict resolve to None
+            max_batch_size (int): The maximum number of keys resolved together
+            window_s (float): How long the first caller waits for others to join its batch
+        """
+        self.resolve_batch = resolve_batch
+        self.max_batch_size = max_batch_size
+        self.window_s = window_s
+        self._lock = threading.Lock()
+        self._batch = None
+
+    def submit(self, key):
+        """
+        Return the result for ``key`` once the batch it joined has been resolved.
+        """
+        with self._lock:
+            batch = self._batch
+            is_leader = batch is None
+            if is_leader:
+                batch = self._batch = _Batch()
+            call = batch.calls.get(key)
+            if call is None:
+                call = batch.calls[key] = _Call()
+            if len(batch.calls) >= self.max_batch_size:
+                # Close the batch, the next caller opens a new one.
+                self._batch = None
+                batch.full.set()
+
+        if is_leader:
+            batch.full.wait(self.window_s)
+            with self._lock:
+                if self._batch is batch:
+                    self._batch = None
+            self._resolve(batch)
+
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _resolve(self, batch):
+        """
+        Resolve every key in a closed batch and wake up its callers.
+        """
+        try:
+            results = self.resolve_batch(list(batch.calls))
+            for key, call in batch.calls.items():
+                call.result = results.get(key)
+        except Exception as exc:  # pylint: disable=broad-except
+            for call in batch.calls.values():
+                call.error = exc
+        finally:
+            for call in batch.calls.values():
+                call.done.set()
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Additive-increase/multiplicative-decrease limit on the number of concurrent calls.
+
+    The limit grows by one for every ``limit`` calls that complete without congestion, and is
+    multiplied by ``backoff_factor`` when a call raises one of ``congestion_errors`` or its latency
+    exceeds ``latency_tolerance`` times the baseline latency of its kind of call. Calls that
+    started before the latest decrease do not trigger another one, so a single burst of 429s
+    only backs off once.
+
+    Baselines are kept per ``latency_key``, e.g. per endpoint, since a lookup and a bulk write
+    have very different normal latencies. Slow calls also move the baseline, at the slower
+    ``baseline_drift`` rate, so a latency that shifts and stays there becomes the new normal
+    instead of holding the limit at its minimum.
+    """
+
+    def __init__(
+            self,
+            initial_limit=2,
+            min_limit=1,
+            max_limit=16,
+            backoff_factor=0.5,
+            latency_tolerance=2.0,
+            latency_smoothing=0.2,
+            baseline_drift=0.05,
+            congestion_errors=(BrazeRateLimitError,),
+    ):
+        """
+        Arguments:
+            initial_limit (int): The number of concurrent calls allowed at first
+            min_limit (int): The limit never drops below this
+            max_limit (int): The limit never grows beyond this
+            backoff_factor (float): The limit is multiplied by this on congestion
+            latency_tolerance (float): How many times the baseline latency a call may take
+            before it is treated as congestion
+            latency_smoothing (float): The weight of each new sample in the baseline latency
+            baseline_drift (float): The weight of each slow sample in the baseline latency
+            congestion_errors (tuple): Exception types that signal congestion
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_factor = backoff_factor
+        self.latency_tolerance = latency_tolerance
+        self.latency_smoothing = latency_smoothing
+        self.baseline_drift = baseline_drift
+        self.congestion_errors = congestion_errors
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        # Baseline latencies in seconds by latency key.
+        self._baselines_s = {}
+        self._last_decrease = time.monotonic()
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self):
+        """
+        The number of calls currently allowed to run concurrently.
+        """
+        return int(self._limit)
+
+    def baseline_latency_s(self, latency_key=None):
+        """
+        Return the baseline latency of calls with ``latency_key``, None before the first one completes.
+        """
+        with self._condition:
+            return self._baselines_s.get(latency_key)
+
+    def run(self, func, *args, latency_key=None, **kwargs):
+        """
+        Call ``func(*args, **kwargs)`` once a slot is available, adjusting the limit from its outcome.
+
+        The call's latency is compared with the baseline of ``latency_key``, e.g. its endpoint.
+        """
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except self.congestion_errors:
+            self._on_congestion(start)
+            raise
+        else:
+            self._on_success(start, time.monotonic() - start, latency_key)
+            return result
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def _on_success(self, start, latency_s, latency_key):
+        """
+        Grow the limit after a fast call, or back off after a slow one, updating the baseline either way.
+        """
+        with self._condition:
+            baseline_s = self._baselines_s.get(latency_key)
+            if baseline_s is None:
+                self._baselines_s[latency_key] = latency_s
+            elif latency_s > baseline_s * self.latency_tolerance:
+                self._baselines_s[latency_key] = baseline_s + self.baseline_drift * (latency_s - baseline_s)
+                self._decrease(start)
+                return
+            else:
+                self._baselines_s[latency_key] = baseline_s + self.latency_smoothing * (latency_s - baseline_s)
+            self._limit = min(self._limit + 1 / self._limit, float(self.max_limit))
+            self._condition.notify_all()
+
+    def _on_congestion(self, start):
+        with self._condition:
+            self._decrease(start)
+
+    def _decrease(self, start):
+        """
+        Back off multiplicatively, once per congestion event. Callers hold the lock.
+        """
+        if start < self._last_decrease:
+            return
+        self._limit = max(self._limit * self.backoff_factor, float(self.min_limit))
+        self._last_decrease = time.monotonic()
@@ -10,7 +10,14 @@ class BrazeAPIEndpoints:
 
     SEND_CAMPAIGN = '/campaigns/trigger/send'
     SEND_CANVAS = '/canvas/trigger/send'
+    SCHEDULE_CAMPAIGN = '/campaigns/trigger/schedule/create'
+    SCHEDULE_CANVAS = '/canvas/trigger/schedule/create'
     EXPORT_IDS = '/users/export/ids'
+    EXPORT_SEGMENT = '/users/export/segment'
+    DELETE_USERS = '/users/delete'
+    SET_SUBSCRIPTION_STATUS = '/subscription/status/set'
+    # Formatted with the catalog name.
+    CATALOG_ITEMS = '/catalogs/{catalog_name}/items'
     SEND_MESSAGE = '/messages/send'
     NEW_ALIAS = '/users/alias/new'
     TRACK_USER = '/users/track'
@@ -19,9 +26,43 @@ class BrazeAPIEndpoints:
     UNSUBSCRIBED_EMAILS = '/email/unsubscribes'
 
 
+# Key of the timeouts of single-user lookups via /users/export/ids, which callers wait on.
+LOOKUP_TIMEOUT_KEY = 'lookup'
+
+# (connect, read) timeouts in seconds, by endpoint or endpoint template.
+DEFAULT_TIMEOUT = (2, 2)
+ENDPOINT_TIMEOUTS = {
+    # Interactive lookups fail fast, the caller is waiting on them.
+    LOOKUP_TIMEOUT_KEY: (1, 1.5),
+    # Exports of up to 50 users per request can take Braze longer to answer.
+    BrazeAPIEndpoints.EXPORT_IDS: (2, 10),
+    # Bulk writes of up to 75 items of each kind can take Braze longer to acknowledge.
+    BrazeAPIEndpoints.TRACK_USER: (2, 10),
+    BrazeAPIEndpoints.NEW_ALIAS: (2, 10),
+    BrazeAPIEndpoints.IDENTIFY_USERS: (2, 10),
+    BrazeAPIEndpoints.DELETE_USERS: (2, 10),
+    BrazeAPIEndpoints.SET_SUBSCRIPTION_STATUS: (2, 10),
+    BrazeAPIEndpoints.CATALOG_ITEMS: (2, 10),
+}
+
+# Braze's documented default rate limits as (requests, window in seconds), used to plan requests
+# until Braze reports the actual limits in the X-RateLimit-* headers.
+# https://www.braze.com/docs/api/api_limits/
+DEFAULT_RATE_LIMIT = (250000, 3600)
+ENDPOINT_RATE_LIMITS = {
+    BrazeAPIEndpoints.TRACK_USER: (3000, 3),
+    BrazeAPIEndpoints.EXPORT_IDS: (2500, 60),
+    BrazeAPIEndpoints.NEW_ALIAS: (20000, 60),
+    BrazeAPIEndpoints.IDENTIFY_USERS: (20000, 60),
+    BrazeAPIEndpoints.DELETE_USERS: (20000, 60),
+    BrazeAPIEndpoints.SET_SUBSCRIPTION_STATUS: (5000, 60),
+}
+
 # Braze enforced request size limits
 REQUEST_TYPE_GET = 'get'
 REQUEST_TYPE_POST = 'post'
+REQUEST_TYPE_PUT = 'put'
+REQUEST_TYPE_DELETE = 'delete'
 TRACK_USER_COMPONENT_CHUNK_SIZE = 75
 USER_ALIAS_CHUNK_SIZE = 50
 
@@ -31,6 +72,42 @@ GET_EXTERNAL_IDS_CHUNK_SIZE = 50
 # https://www.braze.com/docs/api/endpoints/user_data/post_user_identify/
 MAX_NUM_IDENTIFY_USERS_ALIASES = 50
 
+# https://www.braze.com/docs/api/endpoints/user_data/post_user_delete/
+DELETE_USERS_CHUNK_SIZE = 50
+# Outcomes of the users passed to delete_users, besides the error that failed their request.
+DELETE_OUTCOME_DELETED = 'deleted'
+DELETE_OUTCOME_DEAD_LETTERED = 'dead_lettered'
+
+# https://www.braze.com/docs/api/endpoints/messaging/schedule_messages/post_schedule_triggered_campaigns/
+SCHEDULE_RECIPIENTS_CHUNK_SIZE = 50
+
+# https://www.braze.com/docs/api/endpoints/catalogs/catalog_items/asynchronous/
+CATALOG_ITEMS_CHUNK_SIZE = 50
+
+# Upper bound on the number of requests a single bulk operation keeps in flight.
+DEFAULT_MAX_WORKERS = 4
+
+# Number of items from a batch included in debug logs.
+LOGGED_SAMPLE_SIZE = 3
+
+# Request priorities, lower values are served first.
+PRIORITY_HIGH = 0
+PRIORITY_LOW = 10
+
+# https://www.braze.com/docs/api/endpoints/export/user_data/post_users_segment/
+# The export file can take minutes to become available, its url is polled until it is.
+SEGMENT_EXPORT_POLL_INTERVAL_S = 10
+SEGMENT_EXPORT_TIMEOUT_S = 3600
+# (connect, read) timeout of each export file download request.
+SEGMENT_EXPORT_DOWNLOAD_TIMEOUT = (2, 60)
+SEGMENT_EXPORT_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# https://www.braze.com/docs/api/endpoints/subscription_groups/post_update_user_subscription_group_status/
+SUBSCRIPTION_STATUS_CHUNK_SIZE = 50
+# A request identifies its users by only one of these.
+SUBSCRIPTION_IDENTIFIER_KEYS = ('external_id', 'email', 'phone')
+
+SUBSCRIBED_STATE = 'subscribed'
 UNSUBSCRIBED_STATE = 'unsubscribed'
 UNSUBSCRIBED_EMAILS_API_LIMIT = 500
 UNSUBSCRIBED_EMAILS_API_SORT_DIRECTION = 'desc'
@@ -0,0 +1,189 @@
+"""
+Dead-letter store for Braze requests rejected as bad requests.
+
+When a BrazeClient has a dead-letter store, a chunk of a bulk write rejected with a 400
+is stored with its error instead of aborting the remaining chunks. ``reprocess`` later
+bisects the stored payloads to isolate the records Braze rejects and resubmits the rest.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from .exceptions import BrazeBadRequestError
+
+logger = logging.getLogger(__name__)
+
+# Payload keys holding the records of a bulk request, in the order they are bisected. The
+# subscription status keys also hold a single user in requests that are not bulk ones.
+BATCH_KEYS = (
+    'attributes', 'events', 'purchases', 'user_aliases', 'aliases_to_identify', 'external_ids', 'items',
+    'external_id', 'email', 'phone',
+)
+
+
+class DeadLetter:
+    """
+    A stored request payload and the error Braze rejected it with.
+    """
+
+    def __init__(self, dead_letter_id, endpoint, request_type, payload, error, isolated):
+        self.id = dead_letter_id
+        self.endpoint = endpoint
+        self.request_type = request_type
+        self.payload = payload
+        self.error = error
+        self.isolated = isolated
+
+    def __repr__(self):
+        return f'DeadLetter(id={self.id}, endpoint={self.endpoint!r}, isolated={self.isolated})'
+
+
+def batch_items(payload):
+    """
+    Return the records of a bulk payload as ``(key, record)`` pairs.
+    """
+    return [
+        (key, record) for key in BATCH_KEYS if isinstance(payload.get(key), list) for record in payload[key]
+    ]
+
+
+def with_batch_items(payload, items):
+    """
+    Return a copy of ``payload`` holding only the given ``(key, record)`` pairs.
+    """
+    subset = {key: value for key, value in payload.items() if key not in BATCH_KEYS or not isinstance(value, list)}
+    for key, record in items:
+        subset.setdefault(key, []).append(record)
+    return subset
+
+
+class DeadLetterStore:
+    """
+    Failed request payloads persisted in a SQLite database.
+    """
+
+    def __init__(self, path):
+        """
+        Arguments:
+            path (str): Location of the SQLite database, created if it does not exist
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS dead_letters ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' endpoint TEXT NOT NULL,'
+            ' request_type TEXT NOT NULL,'
+            ' payload TEXT NOT NULL,'
+            ' error TEXT,'
+            ' isolated INTEGER NOT NULL DEFAULT 0,'
+            ' created_at REAL NOT NULL'
+            ')'
+        )
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._connection.close()
+
+    def add(self, endpoint, request_type, payload, error, isolated=False):
+        """
+        Store a rejected request.
+
+        Arguments:
+            endpoint (str): e.g. BrazeAPIEndpoints.TRACK_USER
+            request_type (str): e.g. 'post'
+            payload (dict): The rejected request body
+            error (Exception or str): The error Braze returned
+            isolated (bool): True if the payload holds a single record known to be rejected
+        Returns:
+            dead_letter_id (int): The id of the stored entry
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                'INSERT INTO dead_letters (endpoint, request_type, payload, error, isolated, created_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (endpoint, request_type, json.dumps(payload), str(error), int(isolated), time.time()),
+            )
+        return cursor.lastrowid
+
+    def entries(self, include_isolated=True):
+        """
+        Return the stored dead letters, oldest first.
+        """
+        query = 'SELECT id, endpoint, request_type, payload, error, isolated FROM dead_letters'
+        if not include_isolated:
+            query += ' WHERE isolated = 0'
+        with self._lock:
+            rows = self._connection.execute(query + ' ORDER BY id').fetchall()
+        return [DeadLetter(row[0], row[1], row[2], json.loads(row[3]), row[4], bool(row[5])) for row in rows]
+
+    def remove(self, dead_letters):
+        """
+        Delete the given dead letters.
+        """
+        with self._lock:
+            self._connection.executemany(
+                'DELETE FROM dead_letters WHERE id = ?', [(dead_letter.id,) for dead_letter in dead_letters]
+            )
+
+    def reprocess(self, client):
+        """
+        Resubmit the stored requests, bisecting rejected ones to isolate the records Braze rejects.
+
+        Each stored payload is sent again; if it is rejected it is split in half and each half
+        is retried, down to single records. Accepted halves are submitted as they are found,
+        rejected single records are stored again as isolated dead letters, which are not
+        reprocessed. Errors other than bad requests are raised, leaving the entry in the store.
+
+        Arguments:
+            client (BrazeClient): The client the requests are sent through
+        Returns:
+            summary (dict): The number of 'reprocessed' entries, 'resubmitted' records and
+            'isolated' records
+        """
+        summary = {'reprocessed': 0, 'resubmitted': 0, 'isolated': 0}
+        for dead_letter in self.entries(include_isolated=False):
+            resubmitted, rejected = self._bisect(client, dead_letter, dead_letter.payload)
+            for payload, error in rejected:
+                self.add(dead_letter.endpoint, dead_letter.request_type, payload, error, isolated=True)
+            self.remove([dead_letter])
+            summary['reprocessed'] += 1
+            summary['resubmitted'] += resubmitted
+            summary['isolated'] += len(rejected)
+
+        logger.info('Reprocessed Braze dead letters: %s', summary)
+        return summary
+
+    def _bisect(self, client, dead_letter, payload):
+        """
+        Send ``payload``, splitting it on bad requests.
+
+        Returns:
+            (int, list): The number of records accepted, and the rejected single-record
+            payloads with their errors
+        """
+        items = batch_items(payload)
+        try:
+            client._make_request(  # pylint: disable=protected-access
+                payload, dead_letter.endpoint, dead_letter.request_type, attempt=2
+            )
+            return len(items), []
+        except BrazeBadRequestError as exc:
+            if len(items) <= 1:
+                return 0, [(payload, exc)]
+
+        middle = len(items) // 2
+        resubmitted = 0
+        rejected = []
+        for half in (items[:middle], items[middle:]):
+            half_resubmitted, half_rejected = self._bisect(client, dead_letter, with_batch_items(payload, half))
+            resubmitted += half_resubmitted
+            rejected.extend(half_rejected)
+        return resubmitted, rejected
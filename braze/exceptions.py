@@ -60,3 +60,33 @@ class BrazeInternalServerError(BrazeClientError):
     """
     Represents a 5XX internal server error.
     """
+
+
+class BrazeCircuitOpenError(BrazeClientError):
+    """
+    Represents a request refused without being sent because the endpoint's circuit is open.
+    """
+
+    def __init__(self, endpoint, retry_after_s):
+        """
+        Create a BrazeCircuitOpenError.
+
+        Arguments:
+            endpoint (str): The endpoint whose circuit is open
+            retry_after_s (float): Seconds until the circuit lets a trial request through
+        """
+        self.endpoint = endpoint
+        self.retry_after_s = retry_after_s
+        super().__init__(f'Circuit open for {endpoint}, retry in {retry_after_s:.1f}s.')
+
+
+class BrazeDeadlineExceededError(BrazeClientError):
+    """
+    Represents a request not sent because the deadline of the operation it belongs to has passed.
+    """
+
+
+class BrazeExportNotReadyError(BrazeClientError):
+    """
+    Represents an export whose file was still not available for download when polling gave up.
+    """
@@ -0,0 +1,699 @@
+"""
+A local stand-in for the Braze REST API, for load and latency testing the client without network access.
+
+Example:
+    with FakeBrazeServer(latency_s=0.05, jitter_s=0.02, error_rate=0.01, rate_limit=1000) as server:
+        client = BrazeClient(api_key='api_key', api_url=server.url, app_id='app_id')
+        client.create_braze_alias(emails, 'Enterprise')
+        print(server.stats())
+
+It can also be run on its own:
+    python -m braze.fake_server --port 8080 --latency-ms 50 --jitter-ms 20 --error-rate 0.01
+"""
+import argparse
+import functools
+import gzip
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import zipfile
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .constants import (
+    CATALOG_ITEMS_CHUNK_SIZE,
+    SCHEDULE_RECIPIENTS_CHUNK_SIZE,
+    SUBSCRIPTION_IDENTIFIER_KEYS,
+    SUBSCRIPTION_STATUS_CHUNK_SIZE,
+    UNSUBSCRIBED_STATE,
+    BrazeAPIEndpoints,
+)
+
+FAKE_SERVER_HOST = '127.0.0.1'
+# Path of the segment export files, which like Braze's are served without the API key.
+FAKE_EXPORT_PATH = '/_exports/'
+# How often the serving thread checks whether it should stop.
+FAKE_SERVER_POLL_INTERVAL_S = 0.05
+
+
+class _FakeBrazeState:
+    """
+    The users, aliases and unsubscribes the fake server has been told about.
+
+    Profiles are indexed by external id, alias and email, so lookups take constant time however
+    many users a load test creates. Profiles are changed through the methods below, which keep
+    the indexes up to date.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Profiles by external id, or by (alias_label, alias_name) for alias-only users.
+        self.profiles = {}
+        self._profiles_by_alias = {}
+        self._profiles_by_email = {}
+        self.unsubscribed_emails = []
+        # Subscription states by (subscription_group_id, identifier key, identifier).
+        self.subscriptions = {}
+        # Catalog items by catalog name, then by item id.
+        self.catalogs = {}
+        # Scheduled messages by schedule id.
+        self.schedules = {}
+
+    @staticmethod
+    def alias_key(user_alias):
+        """
+        Return the key of an alias in a profile's ``user_aliases``.
+        """
+        return (user_alias['alias_label'], user_alias['alias_name'])
+
+    def profile(self, external_id=None, user_alias=None):
+        """
+        Return the profile of a user, creating it if needed.
+        """
+        if external_id is not None:
+            # Braze stores external ids as strings.
+            external_id = str(external_id)
+        else:
+            alias_key = self.alias_key(user_alias)
+            if alias_key in self._profiles_by_alias:
+                return self._profiles_by_alias[alias_key]
+            external_id = alias_key
+
+        if external_id not in self.profiles:
+            self.profiles[external_id] = {'external_id': external_id, 'user_aliases': set()}
+        return self.profiles[external_id]
+
+    def find(self, external_id=None, user_alias=None, email=None):
+        """
+        Return the profile matching an external id, alias or email, or None.
+        """
+        if external_id is not None:
+            return self.profiles.get(str(external_id))
+        if user_alias is not None:
+            return self._profiles_by_alias.get(self.alias_key(user_alias))
+        if email is not None:
+            return self._profiles_by_email.get(email)
+        return None
+
+    def add_alias(self, profile, user_alias):
+        """
+        Add an alias to a profile.
+        """
+        alias_key = self.alias_key(user_alias)
+        profile['user_aliases'].add(alias_key)
+        self._profiles_by_alias[alias_key] = profile
+
+    def update(self, profile, attributes):
+        """
+        Set attributes of a profile, such as its email.
+        """
+        if 'email' in attributes:
+            self._unindex_email(profile)
+            self._profiles_by_email.setdefault(attributes['email'], profile)
+        profile.update(attributes)
+
+    def merge(self, alias_profile, profile):
+        """
+        Merge an alias-only profile into the profile of an identified user.
+        """
+        self.remove(alias_profile)
+        for alias_label, alias_name in alias_profile['user_aliases']:
+            self.add_alias(profile, {'alias_label': alias_label, 'alias_name': alias_name})
+        self.update(profile, {
+            key: value for key, value in alias_profile.items()
+            if key not in profile and key not in ('external_id', 'user_aliases')
+        })
+
+    def remove(self, profile):
+        """
+        Delete a profile, returning True if it existed.
+        """
+        if self.profiles.pop(profile['external_id'], None) is None:
+            return False
+        for alias_key in profile['user_aliases']:
+            if self._profiles_by_alias.get(alias_key) is profile:
+                del self._profiles_by_alias[alias_key]
+        self._unindex_email(profile)
+        return True
+
+    def _unindex_email(self, profile):
+        """
+        Remove the profile from the email index.
+        """
+        if self._profiles_by_email.get(profile.get('email')) is profile:
+            del self._profiles_by_email[profile['email']]
+
+
+class _FakeBrazeHandler(BaseHTTPRequestHandler):
+    """
+    Serves a single connection to the fake server, keeping it alive between requests.
+    """
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, Nagle's algorithm would delay every response.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        """
+        Keep the request log quiet, load tests make thousands of requests.
+        """
+
+    def setup(self):
+        super().setup()
+        self.server.fake.record_connection()
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Serve export file downloads, and the other GET endpoints with their query string as payload.
+        """
+        url = urlsplit(self.path)
+        if url.path.startswith(FAKE_EXPORT_PATH):
+            status, content = self.server.fake.download_export(url.path)
+            self._respond_bytes(status, content, 'application/zip')
+            return
+        self._handle('GET', url.path, {key: values[0] for key, values in parse_qs(url.query).items()})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self._handle_json('POST')
+
+    def do_PUT(self):  # pylint: disable=invalid-name
+        self._handle_json('PUT')
+
+    def do_DELETE(self):  # pylint: disable=invalid-name
+        self._handle_json('DELETE')
+
+    def _handle_json(self, method):
+        """
+        Handle a request with a JSON body as its payload, a 400 if the body is not JSON.
+        """
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length else b''
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            self._respond(400, {'message': 'Invalid JSON'})
+            return
+        self._handle(method, urlsplit(self.path).path, payload)
+
+    def _handle(self, method, path, payload):
+        status, body, headers = self.server.fake.handle(method, path, payload, self.headers)
+        self._respond(status, body, headers)
+
+    def _respond(self, status, body, headers=None):
+        self._respond_bytes(status, json.dumps(body).encode('utf-8'), 'application/json', headers)
+
+    def _respond_bytes(self, status, content, content_type, headers=None):
+        """
+        Write a response with ``content`` as its body.
+        """
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeBrazeServer:
+    """
+    An HTTP server answering every endpoint in BrazeAPIEndpoints like Braze would.
+
+    Each request is delayed by ``latency_s`` plus up to ``jitter_s``, fails with a 500 with
+    probability ``error_rate``, and counts against a per-endpoint rate limit of ``rate_limit``
+    requests every ``rate_limit_window_s`` seconds, reported in the X-RateLimit-* headers and
+    enforced with 429s. Users tracked, aliased and identified through it can be exported back,
+    so the client's lookups behave as they would against Braze.
+    """
+
+    def __init__(
+            self,
+            latency_s=0.0,
+            jitter_s=0.0,
+            error_rate=0.0,
+            rate_limit=None,
+            rate_limit_window_s=60.0,
+            api_key=None,
+            port=0,
+            seed=None,
+            export_delay_s=0.0,
+    ):
+        """
+        Arguments:
+            latency_s (float): The base delay of every response
+            jitter_s (float): The maximum random delay added to ``latency_s``
+            error_rate (float): The share of requests failed with a 500, between 0 and 1
+            rate_limit (int): The number of requests allowed per endpoint and window, unlimited if None
+            rate_limit_window_s (float): The length of a rate limit window
+            api_key (str): The only API key accepted, any key is if None
+            port (int): The port to listen on, any free port if 0
+            seed (int): Seed of the latency jitter and error draws, for reproducible runs
+            export_delay_s (float): How long segment export files take to become available
+        """
+        if not 0 <= error_rate <= 1:
+            raise ValueError('error_rate must be between 0 and 1.')
+
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_limit_window_s = rate_limit_window_s
+        self.api_key = api_key
+        self.export_delay_s = export_delay_s
+        self.state = _FakeBrazeState()
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._requests = Counter()
+        self._statuses = Counter()
+        self._connections = 0
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._exports = {}
+        self._thread = None
+
+        self._routes = {
+            ('POST', BrazeAPIEndpoints.SEND_CAMPAIGN): self._dispatch,
+            ('POST', BrazeAPIEndpoints.SEND_CANVAS): self._dispatch,
+            ('POST', BrazeAPIEndpoints.SEND_MESSAGE): self._dispatch,
+            ('POST', BrazeAPIEndpoints.SCHEDULE_CAMPAIGN): self._schedule,
+            ('POST', BrazeAPIEndpoints.SCHEDULE_CANVAS): self._schedule,
+            ('POST', BrazeAPIEndpoints.EXPORT_IDS): self._export_ids,
+            ('POST', BrazeAPIEndpoints.EXPORT_SEGMENT): self._export_segment,
+            ('POST', BrazeAPIEndpoints.NEW_ALIAS): self._new_alias,
+            ('POST', BrazeAPIEndpoints.TRACK_USER): self._track_user,
+            ('POST', BrazeAPIEndpoints.IDENTIFY_USERS): self._identify_users,
+            ('POST', BrazeAPIEndpoints.DELETE_USERS): self._delete_users,
+            ('POST', BrazeAPIEndpoints.SET_SUBSCRIPTION_STATUS): self._set_subscription_status,
+            ('POST', BrazeAPIEndpoints.UNSUBSCRIBE_USER_EMAIL): self._email_status,
+            ('GET', BrazeAPIEndpoints.UNSUBSCRIBED_EMAILS): self._unsubscribed_emails,
+            ('POST', BrazeAPIEndpoints.CATALOG_ITEMS): self._create_catalog_items,
+            ('PUT', BrazeAPIEndpoints.CATALOG_ITEMS): self._replace_catalog_items,
+            ('DELETE', BrazeAPIEndpoints.CATALOG_ITEMS): self._delete_catalog_items,
+        }
+        # Routes with path parameters such as {catalog_name}, matched when no exact route is.
+        self._templated_routes = [
+            (method, re.compile(re.sub(r'\{(\w+)\}', r'(?P<\1>[^/]+)', path)), route)
+            for (method, path), route in self._routes.items()
+            if '{' in path
+        ]
+
+        self._httpd = ThreadingHTTPServer((FAKE_SERVER_HOST, port), _FakeBrazeHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+
+    @property
+    def url(self):
+        """
+        The base url to pass to BrazeClient as ``api_url``.
+        """
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """
+        Serve requests from a background thread.
+        """
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            kwargs={'poll_interval': FAKE_SERVER_POLL_INTERVAL_S},
+            name='fake-braze-server',
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """
+        Serve requests from the calling thread until ``stop`` is called from another one.
+        """
+        self._httpd.serve_forever()
+
+    def stop(self):
+        """
+        Stop serving and close the listening socket.
+        """
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def record_connection(self):
+        """
+        Count a new client connection, to measure connection reuse.
+        """
+        with self._lock:
+            self._connections += 1
+
+    def stats(self):
+        """
+        Return what the server has served so far.
+
+        Returns:
+            stats (dict): ``requests`` and ``statuses`` counts by endpoint and status code, the
+            number of ``connections`` opened and the ``max_in_flight`` concurrent requests
+        """
+        with self._lock:
+            return {
+                'requests': dict(self._requests),
+                'statuses': dict(self._statuses),
+                'connections': self._connections,
+                'max_in_flight': self._max_in_flight,
+            }
+
+    def handle(self, method, path, payload, headers):
+        """
+        Answer a request like Braze would.
+
+        Returns:
+            response (tuple): The status code, json body and extra headers of the response
+        """
+        with self._lock:
+            self._requests[path] += 1
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+            delay_s = self.latency_s + self._random.uniform(0, self.jitter_s)
+            fail = self._random.random() < self.error_rate
+        status = 500
+        try:
+            time.sleep(delay_s)
+            status, body, response_headers = self._respond(method, path, payload, headers, fail)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._statuses[status] += 1
+        return status, body, response_headers
+
+    def _respond(self, method, path, payload, headers, fail):
+        """
+        Return the status code, body and headers of a request, after its latency.
+        """
+        route = self._route(method, path)
+        if route is None:
+            return 404, {'message': f'No route for {method} {path}'}, {}
+
+        if not self._authorized(headers.get('Authorization', '')):
+            return 401, {'message': 'Invalid API key'}, {}
+
+        rate_limit_headers, allowed = self._take_rate_limit(path)
+        if not allowed:
+            return 429, {'message': 'Rate limit exceeded'}, rate_limit_headers
+        if fail:
+            return 500, {'message': 'Internal server error'}, rate_limit_headers
+
+        try:
+            with self.state.lock:
+                body = route(payload)
+        except (KeyError, TypeError, ValueError) as exc:
+            return 400, {'message': f'Invalid request: {exc!r}'}, rate_limit_headers
+        return 201 if method == 'POST' else 200, body, rate_limit_headers
+
+    def _route(self, method, path):
+        """
+        Return the handler of a request, bound to the parameters of its path, or None.
+        """
+        route = self._routes.get((method, path))
+        if route is not None:
+            return route
+        for route_method, pattern, templated_route in self._templated_routes:
+            match = pattern.fullmatch(path)
+            if route_method == method and match:
+                return functools.partial(templated_route, **match.groupdict())
+        return None
+
+    def _authorized(self, authorization):
+        if not authorization.startswith('Bearer '):
+            return False
+        return self.api_key is None or authorization[len('Bearer '):] == self.api_key
+
+    def _take_rate_limit(self, path):
+        """
+        Count a request against the rate limit of ``path``.
+
+        Returns:
+            result (tuple): The X-RateLimit-* headers and whether the request is allowed
+        """
+        if self.rate_limit is None:
+            return {}, True
+
+        now = time.time()
+        with self._lock:
+            window_start, used = self._windows.get(path, (now, 0))
+            if now - window_start >= self.rate_limit_window_s:
+                window_start, used = now, 0
+            allowed = used < self.rate_limit
+            if allowed:
+                used += 1
+            self._windows[path] = (window_start, used)
+
+        headers = {
+            'X-RateLimit-Limit': str(self.rate_limit),
+            'X-RateLimit-Remaining': str(self.rate_limit - used),
+            'X-RateLimit-Reset': str(int(window_start + self.rate_limit_window_s)),
+        }
+        return headers, allowed
+
+    def _dispatch(self, payload):  # pylint: disable=unused-argument
+        return {'dispatch_id': uuid.uuid4().hex, 'message': 'success'}
+
+    def _schedule(self, payload):
+        """
+        Store a scheduled message of up to 50 recipients under a new schedule_id.
+        """
+        if len(payload['recipients']) > SCHEDULE_RECIPIENTS_CHUNK_SIZE or not payload['schedule']['time']:
+            raise ValueError(f'Expected up to {SCHEDULE_RECIPIENTS_CHUNK_SIZE} recipients and a schedule time.')
+        schedule_id = uuid.uuid4().hex
+        self.state.schedules[schedule_id] = payload
+        return {'dispatch_id': uuid.uuid4().hex, 'schedule_id': schedule_id, 'message': 'success'}
+
+    def _export_ids(self, payload):
+        """
+        Return the users matching the external ids, aliases and email of an export request.
+        """
+        profiles = []
+        for external_id in payload.get('external_ids', []):
+            profiles.append(self.state.find(external_id=external_id))
+        for user_alias in payload.get('user_aliases', []):
+            profiles.append(self.state.find(user_alias=user_alias))
+        if 'email_address' in payload:
+            profiles.append(self.state.find(email=payload['email_address']))
+
+        fields = payload.get('fields_to_export')
+        users = [self._user_object(profile, fields) for profile in profiles if profile is not None]
+        return {'users': users, 'message': 'success'}
+
+    @staticmethod
+    def _user_object(profile, fields):
+        """
+        Return the exported user object of a profile, limited to ``fields`` if any.
+        """
+        user = {key: value for key, value in profile.items() if key != 'user_aliases'}
+        if not isinstance(user['external_id'], str):
+            del user['external_id']
+        user['user_aliases'] = [
+            {'alias_label': alias_label, 'alias_name': alias_name}
+            for alias_label, alias_name in sorted(profile['user_aliases'])
+        ]
+        if fields:
+            user = {key: value for key, value in user.items() if key in fields}
+        return user
+
+    def _export_segment(self, payload):
+        """
+        Export every known user, whatever the segment, to a zip of newline-delimited JSON.
+        """
+        lines = [
+            json.dumps(self._user_object(profile, payload['fields_to_export']))
+            for profile in self.state.profiles.values()
+        ]
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as export_zip:
+            content = ''.join(line + '\n' for line in lines).encode('utf-8')
+            if payload.get('output_format') == 'gzip':
+                export_zip.writestr(f"{payload['segment_id']}-0.txt.gz", gzip.compress(content))
+            else:
+                export_zip.writestr(f"{payload['segment_id']}-0.txt", content)
+
+        object_prefix = uuid.uuid4().hex
+        with self._lock:
+            self._exports[object_prefix] = (time.monotonic() + self.export_delay_s, archive.getvalue())
+        return {'url': f'{self.url}{FAKE_EXPORT_PATH}{object_prefix}.zip', 'object_prefix': object_prefix}
+
+    def download_export(self, path):
+        """
+        Return the status code and content of an export file download, a 404 until it is ready.
+        """
+        with self._lock:
+            self._requests[FAKE_EXPORT_PATH] += 1
+            ready_at, content = self._exports.get(path[len(FAKE_EXPORT_PATH):-len('.zip')], (None, None))
+        if content is None or time.monotonic() < ready_at:
+            return 404, b''
+        return 200, content
+
+    def _new_alias(self, payload):
+        """
+        Add each alias to the user with its external id, or to a new alias-only user.
+        """
+        for user_alias in payload['user_aliases']:
+            alias = {'alias_label': user_alias['alias_label'], 'alias_name': user_alias['alias_name']}
+            profile = self.state.profile(external_id=user_alias.get('external_id'), user_alias=alias)
+            self.state.add_alias(profile, alias)
+        return {'aliases_processed': len(payload['user_aliases']), 'message': 'success'}
+
+    def _track_user(self, payload):
+        """
+        Update the attributes of each user, creating unknown users, and count the records processed.
+        """
+        processed = Counter()
+        for kind in ('attributes', 'events', 'purchases'):
+            for item in payload.get(kind, []):
+                profile = self.state.profile(external_id=item.get('external_id'), user_alias=item.get('user_alias'))
+                if kind == 'attributes':
+                    self.state.update(profile, {
+                        key: value for key, value in item.items() if key not in ('external_id', 'user_alias')
+                    })
+                processed[kind] += 1
+        return {
+            'attributes_processed': processed['attributes'],
+            'events_processed': processed['events'],
+            'purchases_processed': processed['purchases'],
+            'message': 'success',
+        }
+
+    def _identify_users(self, payload):
+        """
+        Add each alias to the user with its external id, merging alias-only users into it.
+        """
+        for alias_to_identify in payload['aliases_to_identify']:
+            external_id = alias_to_identify['external_id']
+            alias_profile = self.state.find(user_alias=alias_to_identify['user_alias'])
+            profile = self.state.profile(external_id=external_id)
+            # Identifying an alias-only user merges it into the user with the external id.
+            if alias_profile is not None and not isinstance(alias_profile['external_id'], str):
+                self.state.merge(alias_profile, profile)
+            self.state.add_alias(profile, alias_to_identify['user_alias'])
+        return {'aliases_processed': len(payload['aliases_to_identify']), 'message': 'success'}
+
+    def _delete_users(self, payload):
+        """
+        Delete the users with the external ids and aliases, counting those that existed.
+        """
+        profiles = [self.state.find(external_id=external_id) for external_id in payload.get('external_ids', [])]
+        profiles.extend(self.state.find(user_alias=user_alias) for user_alias in payload.get('user_aliases', []))
+        deleted = 0
+        for profile in profiles:
+            if profile is not None and self.state.remove(profile):
+                deleted += 1
+        return {'deleted': deleted, 'message': 'success'}
+
+    def _set_subscription_status(self, payload):
+        """
+        Set the subscription group state of up to 50 users of a single identifier kind.
+        """
+        identifier_keys = [key for key in SUBSCRIPTION_IDENTIFIER_KEYS if key in payload]
+        if len(identifier_keys) != 1 or len(payload[identifier_keys[0]]) > SUBSCRIPTION_STATUS_CHUNK_SIZE:
+            raise ValueError(f'Expected up to {SUBSCRIPTION_STATUS_CHUNK_SIZE} users of a single identifier kind.')
+        for user in payload[identifier_keys[0]]:
+            subscription_key = (payload['subscription_group_id'], identifier_keys[0], user)
+            self.state.subscriptions[subscription_key] = payload['subscription_state']
+        return {'message': 'success'}
+
+    @staticmethod
+    def _catalog_item_ids(payload):
+        """
+        Return the ids of the 1 to 50 items of a catalog items request.
+        """
+        items = payload['items']
+        if not 0 < len(items) <= CATALOG_ITEMS_CHUNK_SIZE:
+            raise ValueError(f'Expected 1 to {CATALOG_ITEMS_CHUNK_SIZE} items.')
+        return [str(item['id']) for item in items]
+
+    def _create_catalog_items(self, payload, catalog_name):
+        """
+        Add new items to a catalog, refusing items that already exist.
+        """
+        catalog = self.state.catalogs.setdefault(catalog_name, {})
+        item_ids = self._catalog_item_ids(payload)
+        existing = [item_id for item_id in item_ids if item_id in catalog]
+        if existing:
+            raise ValueError(f'Items already exist: {existing}.')
+        catalog.update(zip(item_ids, payload['items']))
+        return {'message': 'success'}
+
+    def _replace_catalog_items(self, payload, catalog_name):
+        catalog = self.state.catalogs.setdefault(catalog_name, {})
+        catalog.update(zip(self._catalog_item_ids(payload), payload['items']))
+        return {'message': 'success'}
+
+    def _delete_catalog_items(self, payload, catalog_name):
+        catalog = self.state.catalogs.setdefault(catalog_name, {})
+        for item_id in self._catalog_item_ids(payload):
+            catalog.pop(item_id, None)
+        return {'message': 'success'}
+
+    def _email_status(self, payload):
+        """
+        Subscribe or unsubscribe emails, the most recently unsubscribed listed last.
+        """
+        emails = payload['email'] if isinstance(payload['email'], list) else [payload['email']]
+        for email in emails:
+            if email in self.state.unsubscribed_emails:
+                self.state.unsubscribed_emails.remove(email)
+            if payload['subscription_state'] == UNSUBSCRIBED_STATE:
+                self.state.unsubscribed_emails.append(email)
+        return {'message': 'success'}
+
+    def _unsubscribed_emails(self, params):
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 100))
+        emails = list(reversed(self.state.unsubscribed_emails))
+        return {'emails': emails[offset:offset + limit], 'message': 'success'}
+
+
+def main(argv=None):
+    """
+    Run a fake Braze server until interrupted.
+    """
+    parser = argparse.ArgumentParser(description='Run a local fake Braze REST API.')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=None, help='Requests per endpoint and window')
+    parser.add_argument('--rate-limit-window-s', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    server = FakeBrazeServer(
+        latency_s=args.latency_ms / 1000,
+        jitter_s=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        rate_limit_window_s=args.rate_limit_window_s,
+        port=args.port,
+        seed=args.seed,
+    )
+    print(f'Fake Braze server listening on {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(json.dumps(server.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Request lifecycle hooks for the Braze client.
+
+Callbacks registered with ``BrazeClient.register_hook`` are called as:
+
+- ``before_send(endpoint, request_type, payload)`` with the serialized request body,
+  or the query params of a get request
+- ``after_response(endpoint, request_type, response, timings)`` with the successful
+  ``requests.Response`` and its RequestTimings
+- ``on_error(endpoint, request_type, exception, timings)`` with the exception about to be raised
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+HOOK_BEFORE_SEND = 'before_send'
+HOOK_AFTER_RESPONSE = 'after_response'
+HOOK_ON_ERROR = 'on_error'
+HOOK_EVENTS = (HOOK_BEFORE_SEND, HOOK_AFTER_RESPONSE, HOOK_ON_ERROR)
+
+# Name under which SpanTimer reports requests made outside any span.
+ROOT_SPAN = '<root>'
+
+_current_span = contextvars.ContextVar('braze_current_span', default=None)
+
+
+class RequestTimings:
+    """
+    Time spent, in seconds, in each phase of a single request.
+    """
+
+    def __init__(self):
+        self.serialization_s = 0.0
+        self.network_s = 0.0
+        self.deserialization_s = 0.0
+
+    @property
+    def total_s(self):
+        """
+        The time spent in all phases.
+        """
+        return self.serialization_s + self.network_s + self.deserialization_s
+
+
+class SpanTimer:
+    """
+    Attribute request time to serialization, network and deserialization, grouped by span.
+
+    Spans are opened with ``span(name)`` and nest; every request made inside a span,
+    including from the client's worker threads, is attributed to the innermost one.
+
+    Example:
+        timer = SpanTimer().install(client)
+        with timer.span('enterprise_import'):
+            client.create_braze_alias(emails, 'Enterprise')
+        timer.report()['enterprise_import']['endpoints']['/users/alias/new']['network_s']
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans = {}
+
+    def install(self, client):
+        """
+        Register the timer's hooks on ``client`` and return the timer.
+        """
+        client.register_hook(HOOK_AFTER_RESPONSE, self._after_response)
+        client.register_hook(HOOK_ON_ERROR, self._on_error)
+        return self
+
+    @contextmanager
+    def span(self, name):
+        """
+        Attribute requests made inside the block to the span ``name``, nested in any enclosing span.
+        """
+        parent = _current_span.get()
+        span_name = f'{parent}/{name}' if parent else name
+        token = _current_span.set(span_name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _current_span.reset(token)
+            with self._lock:
+                self._span_stats(span_name)['wall_s'] += time.perf_counter() - start
+
+    def report(self):
+        """
+        Return the accumulated timings.
+
+        Returns:
+            spans (dict): Timings by span name, e.g.
+            {
+                'enterprise_import': {
+                    'wall_s': 1.2, 'requests': 5, 'errors': 0,
+                    'serialization_s': 0.01, 'network_s': 1.1, 'deserialization_s': 0.02,
+                    'endpoints': {'/users/track': {'requests': 2, 'errors': 0, 'network_s': 0.4, ...}},
+                }
+            }
+        """
+        with self._lock:
+            return {
+                span_name: {
+                    **stats,
+                    'endpoints': {endpoint: dict(phases) for endpoint, phases in stats['endpoints'].items()},
+                }
+                for span_name, stats in self._spans.items()
+            }
+
+    def reset(self):
+        """
+        Discard the accumulated timings.
+        """
+        with self._lock:
+            self._spans = {}
+
+    def _span_stats(self, span_name):
+        """
+        Return the mutable stats of a span, creating them if needed. Callers hold the lock.
+        """
+        stats = self._spans.get(span_name)
+        if stats is None:
+            stats = self._spans[span_name] = {'wall_s': 0.0, 'endpoints': {}, **self._empty_phases()}
+        return stats
+
+    @staticmethod
+    def _empty_phases():
+        return {'requests': 0, 'errors': 0, 'serialization_s': 0.0, 'network_s': 0.0, 'deserialization_s': 0.0}
+
+    def _record(self, endpoint, timings, failed):
+        """
+        Add the timings of a request to the current span and to its endpoint within the span.
+        """
+        with self._lock:
+            span_stats = self._span_stats(_current_span.get() or ROOT_SPAN)
+            endpoint_stats = span_stats['endpoints'].setdefault(endpoint, self._empty_phases())
+            for stats in (span_stats, endpoint_stats):
+                stats['requests'] += 1
+                stats['errors'] += int(failed)
+                stats['serialization_s'] += timings.serialization_s
+                stats['network_s'] += timings.network_s
+                stats['deserialization_s'] += timings.deserialization_s
+
+    def _after_response(self, endpoint, request_type, response, timings):  # pylint: disable=unused-argument
+        self._record(endpoint, timings, failed=False)
+
+    def _on_error(self, endpoint, request_type, exception, timings):  # pylint: disable=unused-argument
+        self._record(endpoint, timings, failed=True)
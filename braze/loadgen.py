@@ -0,0 +1,264 @@
+"""
+Load generator for capacity planning of Braze client workloads.
+
+Drives a mix of client operations against a Braze API url, typically a FakeBrazeServer,
+and reports throughput, request latency percentiles and error and 429 rates.
+
+Example:
+    braze-loadgen --fake --fake-latency-ms 80 --records 100000 --mix track=8,alias=1,export=1 --concurrency 8
+    braze-loadgen --url http://localhost:8080 --records 5000000 --mix track --max-workers 8
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from .client import BrazeClient
+from .fake_server import FakeBrazeServer
+from .metrics import MetricsSink
+
+LOADGEN_ALIAS_LABEL = 'loadgen'
+LOADGEN_CAMPAIGN_ID = 'loadgen-campaign'
+# Braze accepts up to 50 recipients per campaign send.
+LOADGEN_MAX_SEND_RECIPIENTS = 50
+LOADGEN_PERCENTILES = (50, 90, 99)
+
+
+def _emails(first_record, count):
+    return [f'loadgen{i}@example.com' for i in range(first_record, first_record + count)]
+
+
+def _track(client, first_record, count):
+    client.track_user(attributes=[
+        {'external_id': str(i), 'loadgen_attribute': i} for i in range(first_record, first_record + count)
+    ])
+
+
+def _alias(client, first_record, count):
+    client.create_braze_alias(_emails(first_record, count), LOADGEN_ALIAS_LABEL)
+
+
+def _send(client, first_record, count):
+    for start in range(first_record, first_record + count, LOADGEN_MAX_SEND_RECIPIENTS):
+        end = min(start + LOADGEN_MAX_SEND_RECIPIENTS, first_record + count)
+        client.send_campaign_message(
+            LOADGEN_CAMPAIGN_ID,
+            recipients=[{'external_user_id': str(i)} for i in range(start, end)],
+        )
+
+
+def _export(client, first_record, count):
+    client.get_braze_external_id_batch(_emails(first_record, count), LOADGEN_ALIAS_LABEL)
+
+
+# Each operation handles ``count`` records starting at ``first_record``.
+LOADGEN_OPERATIONS = {
+    'track': _track,
+    'alias': _alias,
+    'send': _send,
+    'export': _export,
+}
+
+
+class LatencyRecorder(MetricsSink):
+    """
+    Keeps the latency and status code of every request, for exact percentiles.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies_s = []
+        self.status_codes = Counter()
+
+    def record(self, metric):
+        """
+        Record the request's latency and status code.
+        """
+        with self._lock:
+            self.latencies_s.append(metric.latency_s)
+            self.status_codes[metric.status_code] += 1
+
+
+def percentile(values, pct):
+    """
+    Return the nearest-rank ``pct`` percentile of ``values``, None if there are none.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def parse_mix(mix):
+    """
+    Parse an operation mix such as 'track=8,alias=1,export=1' into weights by operation.
+
+    An operation without a weight, e.g. 'track', has a weight of 1.
+    """
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.strip().partition('=')
+        if name not in LOADGEN_OPERATIONS:
+            raise ValueError(f'Unknown operation {name!r}, expected one of {sorted(LOADGEN_OPERATIONS)}.')
+        weights[name] = float(weight) if weight else 1.0
+        if weights[name] < 0:
+            raise ValueError(f'The weight of {name!r} must not be negative.')
+    if not any(weights.values()):
+        raise ValueError('At least one operation must have a positive weight.')
+    return weights
+
+
+def run_load(client, recorder, weights, records, batch_size, concurrency, seed=None):
+    """
+    Process ``records`` records with the client, in batches split between operations by weight.
+
+    Arguments:
+        client (BrazeClient): A client reporting its requests to ``recorder``
+        recorder (LatencyRecorder): The client's metrics sink
+        weights (dict): Weights by operation name, see ``parse_mix``
+        records (int): The total number of records to process
+        batch_size (int): The number of records handled by each operation call
+        concurrency (int): The number of operation calls in flight at once
+        seed (int): Seed of the operation draws, for reproducible mixes
+    Returns:
+        report (dict): Throughput, latency percentiles and error rates of the run
+    """
+    rng = random.Random(seed)
+    names = list(weights)
+    batches = [
+        (rng.choices(names, weights=[weights[name] for name in names])[0], first, min(batch_size, records - first))
+        for first in range(0, records, batch_size)
+    ]
+
+    records_by_operation = Counter()
+    errors = Counter()
+    lock = threading.Lock()
+
+    def run_batch(batch):
+        name, first_record, count = batch
+        try:
+            LOADGEN_OPERATIONS[name](client, first_record, count)
+        except Exception as exc:  # pylint: disable=broad-except
+            with lock:
+                errors[f'{name}: {type(exc).__name__}'] += 1
+        else:
+            with lock:
+                records_by_operation[name] += count
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(run_batch, batches))
+    duration_s = time.perf_counter() - start
+
+    requests_made = len(recorder.latencies_s)
+    processed = sum(records_by_operation.values())
+    latency_ms = {f'p{pct}': _to_ms(percentile(recorder.latencies_s, pct)) for pct in LOADGEN_PERCENTILES}
+    latency_ms['max'] = _to_ms(max(recorder.latencies_s, default=None))
+    # Requests without a response, e.g. timeouts, have no status code and count as errors.
+    errored = sum(count for status, count in recorder.status_codes.items() if status is None or status >= 500)
+    return {
+        'duration_s': duration_s,
+        'records': processed,
+        'records_per_s': processed / duration_s if duration_s else 0.0,
+        'records_by_operation': dict(records_by_operation),
+        'requests': requests_made,
+        'requests_per_s': requests_made / duration_s if duration_s else 0.0,
+        'latency_ms': latency_ms,
+        'status_codes': dict(sorted((str(status), count) for status, count in recorder.status_codes.items())),
+        'error_rate': _rate(errored, requests_made),
+        'rate_limited_rate': _rate(recorder.status_codes[429], requests_made),
+        'failed_batches': dict(errors),
+    }
+
+
+def _to_ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def _rate(count, total):
+    return count / total if total else 0.0
+
+
+def format_report(report):
+    """
+    Return a human readable summary of a load run.
+    """
+    latency = ', '.join(f'{name} {value} ms' for name, value in report['latency_ms'].items())
+    lines = [
+        f"duration        {report['duration_s']:.2f} s",
+        f"records         {report['records']} ({report['records_per_s']:.1f}/s) {report['records_by_operation']}",
+        f"requests        {report['requests']} ({report['requests_per_s']:.1f}/s)",
+        f"latency         {latency}",
+        f"status codes    {report['status_codes']}",
+        f"error rate      {report['error_rate']:.2%}",
+        f"429 rate        {report['rate_limited_rate']:.2%}",
+    ]
+    if report['failed_batches']:
+        lines.append(f"failed batches  {report['failed_batches']}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """
+    Run a load test from the command line.
+    """
+    parser = argparse.ArgumentParser(description='Generate load against a Braze API with the Braze client.')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help='The Braze API url, e.g. a fake server started separately')
+    target.add_argument('--fake', action='store_true', help='Run against an in-process FakeBrazeServer')
+    parser.add_argument('--api-key', default='loadgen')
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--batch-size', type=int, default=500, help='Records per operation call')
+    parser.add_argument('--mix', default='track', help="Operation weights, e.g. 'track=8,alias=1,export=1'")
+    parser.add_argument('--concurrency', type=int, default=4, help='Operation calls in flight at once')
+    parser.add_argument('--max-workers', type=int, default=4, help="The client's max_workers")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--fake-latency-ms', type=float, default=0.0)
+    parser.add_argument('--fake-jitter-ms', type=float, default=0.0)
+    parser.add_argument('--fake-error-rate', type=float, default=0.0)
+    parser.add_argument('--fake-rate-limit', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        weights = parse_mix(args.mix)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    server = None
+    url = args.url
+    if args.fake:
+        server = FakeBrazeServer(
+            latency_s=args.fake_latency_ms / 1000,
+            jitter_s=args.fake_jitter_ms / 1000,
+            error_rate=args.fake_error_rate,
+            rate_limit=args.fake_rate_limit,
+            seed=args.seed,
+        ).start()
+        url = server.url
+
+    recorder = LatencyRecorder()
+    client = BrazeClient(
+        api_key=args.api_key,
+        api_url=url,
+        app_id='loadgen',
+        max_workers=args.max_workers,
+        metrics_sink=recorder,
+    )
+    try:
+        report = run_load(client, recorder, weights, args.records, args.batch_size, args.concurrency, args.seed)
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
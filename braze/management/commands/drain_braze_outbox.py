@@ -0,0 +1,61 @@
+"""
+Management command delivering the push notifications queued in the Braze outbox.
+"""
+import logging
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from braze.ace_channel.braze_push_channel import BrazePushNotificationChannel
+
+LOG = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Replays the push notifications queued by BrazePushNotificationChannel when ACE_CHANNEL_BRAZE_OUTBOX_PATH is set.
+
+    Example:
+        ./manage.py lms drain_braze_outbox
+        ./manage.py lms drain_braze_outbox --loop --poll-interval 5
+    """
+    help = 'Deliver the push notifications queued in the Braze outbox.'
+
+    def add_arguments(self, parser):
+        """
+        Add the --loop and --poll-interval options.
+        """
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep draining the outbox until interrupted, instead of draining it once',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds between drains with --loop',
+        )
+
+    def handle(self, *args, **options):  # pylint: disable=unused-argument
+        """
+        Drain the outbox once, or until interrupted with --loop.
+        """
+        drainer = BrazePushNotificationChannel.get_outbox_drainer()
+        if drainer is None:
+            raise CommandError(
+                'The Braze outbox is not configured, set ACE_CHANNEL_BRAZE_OUTBOX_PATH, '
+                'ACE_CHANNEL_BRAZE_PUSH_API_KEY and ACE_CHANNEL_BRAZE_REST_ENDPOINT.'
+            )
+
+        if options['loop']:
+            try:
+                drainer.run(threading.Event(), options['poll_interval'])
+            except KeyboardInterrupt:
+                LOG.info('Stopped draining the Braze outbox')
+            return
+
+        delivered = drainer.drain()
+        self.stdout.write(
+            f'Delivered {delivered} push notifications, {drainer.outbox.pending_count()} waiting for a retry.'
+        )
@@ -0,0 +1,184 @@
+"""
+Request metrics emitted by the Braze client.
+"""
+import logging
+import math
+import threading
+from collections import namedtuple
+
+# Upper bounds, in seconds, of the request latency histogram buckets.
+LATENCY_BUCKETS_S = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf)
+
+RequestMetric = namedtuple(
+    'RequestMetric',
+    ['endpoint', 'request_type', 'latency_s', 'payload_bytes', 'response_bytes', 'status_code', 'attempt'],
+)
+RequestMetric.__doc__ = """
+Measurements of a single Braze API request.
+
+``status_code`` is None when no response was received, and ``attempt`` is
+greater than 1 when the request is a retry.
+"""
+
+
+def status_class(status_code):
+    """
+    Return the status class of a response, e.g. '2xx', or 'error' when no response was received.
+    """
+    if status_code is None:
+        return 'error'
+    return f'{status_code // 100}xx'
+
+
+class MetricsSink:
+    """
+    Receives a RequestMetric for every request made by a BrazeClient.
+    """
+
+    def record(self, metric):
+        """
+        Record the measurements of a single request.
+        """
+        raise NotImplementedError
+
+
+class InMemoryMetricsSink(MetricsSink):
+    """
+    Aggregates request metrics per endpoint in memory.
+    """
+
+    def __init__(self):
+        """
+        Initialize with no recorded requests.
+        """
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, metric):
+        """
+        Add the request to its endpoint's aggregates.
+        """
+        with self._lock:
+            stats = self._stats.get(metric.endpoint)
+            if stats is None:
+                stats = self._stats[metric.endpoint] = {
+                    'count': 0,
+                    'latency_total_s': 0.0,
+                    'latency_histogram': dict.fromkeys(LATENCY_BUCKETS_S, 0),
+                    'payload_bytes': 0,
+                    'response_bytes': 0,
+                    'status_classes': {},
+                    'retries': 0,
+                    'rate_limited': 0,
+                }
+
+            stats['count'] += 1
+            stats['latency_total_s'] += metric.latency_s
+            bucket = next(bound for bound in LATENCY_BUCKETS_S if metric.latency_s <= bound)
+            stats['latency_histogram'][bucket] += 1
+            stats['payload_bytes'] += metric.payload_bytes
+            stats['response_bytes'] += metric.response_bytes
+            metric_status_class = status_class(metric.status_code)
+            stats['status_classes'][metric_status_class] = stats['status_classes'].get(metric_status_class, 0) + 1
+            if metric.attempt > 1:
+                stats['retries'] += 1
+            if metric.status_code == 429:
+                stats['rate_limited'] += 1
+
+    def snapshot(self):
+        """
+        Return a copy of the aggregates recorded so far.
+
+        Returns:
+            stats (dict): Aggregates by endpoint, e.g.
+            {
+                '/users/track': {
+                    'count': 2, 'latency_total_s': 0.3, 'latency_histogram': {0.05: 0, 0.1: 1, ...},
+                    'payload_bytes': 5120, 'response_bytes': 64, 'status_classes': {'2xx': 2},
+                    'retries': 0, 'rate_limited': 0,
+                }
+            }
+        """
+        with self._lock:
+            return {
+                endpoint: {
+                    **stats,
+                    'latency_histogram': dict(stats['latency_histogram']),
+                    'status_classes': dict(stats['status_classes']),
+                }
+                for endpoint, stats in self._stats.items()
+            }
+
+    def reset(self):
+        """
+        Discard everything recorded so far.
+        """
+        with self._lock:
+            self._stats = {}
+
+
+class LoggingMetricsSink(MetricsSink):
+    """
+    Logs one line per request.
+    """
+
+    def __init__(self, logger=None, level=logging.INFO):
+        """
+        Arguments:
+            logger (logging.Logger): Defaults to this module's logger
+            level (int): The level requests are logged at
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def record(self, metric):
+        """
+        Log the request's measurements.
+        """
+        self.logger.log(
+            self.level,
+            'braze request %s %s: status=%s latency_ms=%.1f payload_bytes=%d response_bytes=%d attempt=%d',
+            metric.request_type,
+            metric.endpoint,
+            metric.status_code,
+            metric.latency_s * 1000,
+            metric.payload_bytes,
+            metric.response_bytes,
+            metric.attempt,
+        )
+
+
+class CallbackMetricsSink(MetricsSink):
+    """
+    Forwards requests as statsd-style measurements to a callback.
+
+    The callback is called as ``callback(name, value, metric_type, tags)`` where
+    ``metric_type`` is 'counter', 'timing' or 'histogram' and ``tags`` is a dict
+    holding the endpoint and status class.
+    """
+
+    def __init__(self, callback, prefix='braze.request'):
+        """
+        Arguments:
+            callback (callable): Receives each measurement, e.g. a thin wrapper around a statsd client
+            prefix (str): Prepended to every measurement name
+        """
+        self.callback = callback
+        self.prefix = prefix
+
+    def record(self, metric):
+        """
+        Emit the request's measurements.
+        """
+        tags = {
+            'endpoint': metric.endpoint,
+            'status_class': status_class(metric.status_code),
+        }
+        self.callback(f'{self.prefix}.count', 1, 'counter', tags)
+        self.callback(f'{self.prefix}.latency_ms', metric.latency_s * 1000, 'timing', tags)
+        self.callback(f'{self.prefix}.payload_bytes', metric.payload_bytes, 'histogram', tags)
+        self.callback(f'{self.prefix}.response_bytes', metric.response_bytes, 'histogram', tags)
+        if metric.attempt > 1:
+            self.callback(f'{self.prefix}.retries', 1, 'counter', tags)
+        if metric.status_code == 429:
+            self.callback(f'{self.prefix}.rate_limited', 1, 'counter', tags)
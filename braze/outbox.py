@@ -0,0 +1,359 @@
+"""
+Durable outbox for Braze write operations.
+
+Request handlers enqueue writes in a local SQLite database instead of calling Braze
+directly, and an OutboxDrainer replays them later in batched requests, retrying
+transient failures. Delivery is at least once.
+"""
+import inspect
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+import requests
+
+from .client import BrazeClient
+from .constants import TRACK_USER_COMPONENT_CHUNK_SIZE
+from .exceptions import (
+    BrazeCircuitOpenError,
+    BrazeClientError,
+    BrazeDeadlineExceededError,
+    BrazeInternalServerError,
+    BrazeRateLimitError,
+)
+
+logger = logging.getLogger(__name__)
+
+# Client methods that may be enqueued.
+OUTBOX_OPERATIONS = (
+    'track_user',
+    'create_braze_alias',
+    'identify_users',
+    'send_email',
+    'send_campaign_message',
+    'send_canvas_message',
+    'unsubscribe_user_email',
+)
+
+# Keys of the items track_user sends in requests of up to TRACK_USER_COMPONENT_CHUNK_SIZE each.
+TRACK_USER_ITEM_KEYS = ('attributes', 'events', 'purchases')
+
+OUTBOX_STATUS_PENDING = 'pending'
+OUTBOX_STATUS_FAILED = 'failed'
+
+# Errors after which an operation is retried, anything else fails it permanently.
+RETRYABLE_ERRORS = (
+    BrazeRateLimitError,
+    BrazeInternalServerError,
+    BrazeCircuitOpenError,
+    BrazeDeadlineExceededError,
+    requests.exceptions.RequestException,
+)
+
+
+class OutboxEntry:
+    """
+    A write operation stored in the outbox.
+    """
+
+    def __init__(self, entry_id, operation, kwargs, attempts):
+        self.id = entry_id
+        self.operation = operation
+        self.kwargs = kwargs
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f'OutboxEntry(id={self.id}, operation={self.operation!r}, attempts={self.attempts})'
+
+
+class BrazeOutbox:
+    """
+    Queue of Braze write operations persisted in a SQLite database in WAL mode.
+    """
+
+    def __init__(self, path):
+        """
+        Arguments:
+            path (str): Location of the SQLite database, created if it does not exist
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' operation TEXT NOT NULL,'
+            ' kwargs TEXT NOT NULL,'
+            ' status TEXT NOT NULL DEFAULT \'pending\','
+            ' attempts INTEGER NOT NULL DEFAULT 0,'
+            ' next_attempt_at REAL NOT NULL DEFAULT 0,'
+            ' last_error TEXT,'
+            ' created_at REAL NOT NULL'
+            ')'
+        )
+        self._connection.execute('CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)')
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._connection.close()
+
+    def enqueue(self, operation, **kwargs):
+        """
+        Store a write operation to be replayed by an OutboxDrainer.
+
+        Arguments:
+            operation (str): The name of the BrazeClient method, e.g. 'track_user'
+            kwargs: The JSON serializable keyword arguments of the call
+        Returns:
+            entry_id (int): The id of the stored entry
+        """
+        if operation not in OUTBOX_OPERATIONS:
+            msg = f'Bad arguments, {operation} cannot be enqueued.'
+            raise BrazeClientError(msg)
+
+        # An entry that cannot be replayed would be retried forever ahead of the entries behind it.
+        try:
+            inspect.signature(getattr(BrazeClient, operation)).bind(None, **kwargs)
+        except TypeError as exc:
+            msg = f'Bad arguments, {exc} for {operation}.'
+            raise BrazeClientError(msg) from exc
+
+        try:
+            serialized_kwargs = json.dumps(kwargs)
+        except TypeError as exc:
+            msg = f'Bad arguments, the arguments of {operation} must be JSON serializable.'
+            raise BrazeClientError(msg) from exc
+
+        with self._lock:
+            cursor = self._connection.execute(
+                'INSERT INTO outbox (operation, kwargs, created_at) VALUES (?, ?, ?)',
+                (operation, serialized_kwargs, time.time()),
+            )
+        return cursor.lastrowid
+
+    def track_user(self, attributes=None, events=None, purchases=None):
+        """
+        Enqueue a ``BrazeClient.track_user`` call.
+        """
+        if not (attributes or events or purchases):
+            msg = 'Bad arguments, please check that attributes, events, or purchases are non-empty.'
+            raise BrazeClientError(msg)
+
+        return self.enqueue('track_user', attributes=attributes, events=events, purchases=purchases)
+
+    def due(self, limit, now=None):
+        """
+        Return up to ``limit`` pending entries whose next attempt is due, oldest first.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT id, operation, kwargs, attempts FROM outbox'
+                ' WHERE status = ? AND next_attempt_at <= ? ORDER BY id LIMIT ?',
+                (OUTBOX_STATUS_PENDING, now, limit),
+            ).fetchall()
+        return [OutboxEntry(row[0], row[1], json.loads(row[2]), row[3]) for row in rows]
+
+    def failed(self):
+        """
+        Return the entries that failed permanently, with their last error.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT id, operation, kwargs, attempts, last_error FROM outbox WHERE status = ? ORDER BY id',
+                (OUTBOX_STATUS_FAILED,),
+            ).fetchall()
+        return [(OutboxEntry(row[0], row[1], json.loads(row[2]), row[3]), row[4]) for row in rows]
+
+    def pending_count(self):
+        """
+        Return the number of entries waiting to be delivered.
+        """
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM outbox WHERE status = ?', (OUTBOX_STATUS_PENDING,)
+            ).fetchone()[0]
+
+    def mark_delivered(self, entries):
+        """
+        Remove delivered entries.
+        """
+        with self._lock:
+            self._connection.executemany('DELETE FROM outbox WHERE id = ?', [(entry.id,) for entry in entries])
+
+    def mark_retry(self, entries, error, next_attempt_at):
+        """
+        Schedule another attempt of the entries.
+        """
+        with self._lock:
+            self._connection.executemany(
+                'UPDATE outbox SET attempts = attempts + 1, last_error = ?, next_attempt_at = ? WHERE id = ?',
+                [(str(error), next_attempt_at, entry.id) for entry in entries],
+            )
+
+    def mark_failed(self, entries, error):
+        """
+        Stop retrying the entries, keeping them for inspection.
+        """
+        with self._lock:
+            self._connection.executemany(
+                'UPDATE outbox SET attempts = attempts + 1, last_error = ?, status = ? WHERE id = ?',
+                [(str(error), OUTBOX_STATUS_FAILED, entry.id) for entry in entries],
+            )
+
+
+class OutboxDrainer:
+    """
+    Replays the operations of a BrazeOutbox through a BrazeClient.
+
+    Consecutive ``track_user`` entries are merged into requests of up to 75 items of each kind,
+    the other operations are replayed one call per entry. Each request's entries are retried on
+    their own, so the items of accepted requests are not sent again, unless a single entry holds
+    more than 75 items of a kind. Rate limited entries are retried once the rate limit window
+    resets, entries refused by an open circuit once it lets a trial request through, other
+    transient failures after an exponential backoff. A merged request Braze rejects is split in
+    halves and replayed until only the rejected entries fail.
+    """
+
+    def __init__(self, client, outbox, batch_size=1000, max_attempts=5, backoff_s=1.0):
+        """
+        Arguments:
+            client (BrazeClient): The client the operations are replayed through
+            outbox (BrazeOutbox): The outbox to drain
+            batch_size (int): The maximum number of entries read per drain iteration
+            max_attempts (int): The number of attempts after which an entry fails permanently
+            backoff_s (float): The delay before the first retry, doubled on every attempt
+        """
+        self.client = client
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_s = backoff_s
+
+    def drain(self):
+        """
+        Replay every entry that is due, until none are left.
+
+        Returns:
+            delivered (int): The number of entries delivered
+        """
+        delivered = 0
+        while True:
+            entries = self.outbox.due(self.batch_size)
+            if not entries:
+                return delivered
+
+            # Runs of consecutive track_user entries are merged, preserving the order of operations.
+            track_user_entries = []
+            for entry in entries:
+                if entry.operation == 'track_user':
+                    track_user_entries.append(entry)
+                    continue
+                if track_user_entries:
+                    delivered += self._replay_track_users(track_user_entries)
+                    track_user_entries = []
+                delivered += self._replay([entry], self._call)
+            if track_user_entries:
+                delivered += self._replay_track_users(track_user_entries)
+
+    def run(self, stop_event, poll_interval_s=1.0):
+        """
+        Drain the outbox every ``poll_interval_s`` seconds until ``stop_event`` is set.
+        """
+        while not stop_event.is_set():
+            self.drain()
+            stop_event.wait(poll_interval_s)
+
+    def _replay_track_users(self, entries):
+        """
+        Replay a run of track_user entries, concurrently in requests of up to 75 items of each kind.
+
+        Returns:
+            delivered (int): The number of entries delivered
+        """
+        requests_entries = []
+        items = {}
+        for entry in entries:
+            entry_items = {key: len(entry.kwargs.get(key) or []) for key in TRACK_USER_ITEM_KEYS}
+            if not requests_entries or any(
+                items[key] + entry_items[key] > TRACK_USER_COMPONENT_CHUNK_SIZE for key in TRACK_USER_ITEM_KEYS
+            ):
+                requests_entries.append([])
+                items = dict.fromkeys(TRACK_USER_ITEM_KEYS, 0)
+            requests_entries[-1].append(entry)
+            for key, count in entry_items.items():
+                items[key] += count
+
+        return sum(self.client._run_concurrently(  # pylint: disable=protected-access
+            lambda request_entries: self._replay(request_entries, self._track_users), requests_entries
+        ))
+
+    def _track_users(self, entries):
+        """
+        Replay track_user entries as a single call, merging their attributes, events and purchases.
+        """
+        merged = {key: [] for key in TRACK_USER_ITEM_KEYS}
+        for entry in entries:
+            for key, items in merged.items():
+                items.extend(entry.kwargs.get(key) or [])
+        self.client.track_user(**merged)
+
+    def _call(self, entries):
+        """
+        Replay a single entry of any operation.
+        """
+        entry = entries[0]
+        getattr(self.client, entry.operation)(**entry.kwargs)
+
+    def _replay(self, entries, replay):
+        """
+        Replay ``entries`` with ``replay`` and record the outcome, returning the number delivered.
+        """
+        try:
+            replay(entries)
+        except RETRYABLE_ERRORS as exc:
+            self._retry_later(entries, exc)
+            return 0
+        except (BrazeClientError, TypeError, ValueError) as exc:
+            # Bad arguments fail the entries like a rejection, rather than blocking the outbox.
+            if len(entries) > 1:
+                middle = len(entries) // 2
+                return self._replay(entries[:middle], replay) + self._replay(entries[middle:], replay)
+            logger.error(
+                'Braze outbox %s failed permanently for %d entries: %s', entries[0].operation, len(entries), exc
+            )
+            self.outbox.mark_failed(entries, exc)
+            return 0
+
+        self.outbox.mark_delivered(entries)
+        return len(entries)
+
+    def _retry_later(self, entries, error):
+        """
+        Schedule the next attempt of ``entries`` after a retryable ``error``, failing those out of attempts.
+
+        Rate-limited entries wait for the rate limit to reset and entries refused by an open circuit
+        wait for it to half-open, other entries back off exponentially.
+        """
+        now = time.time()
+        retry_entries = [entry for entry in entries if entry.attempts + 1 < self.max_attempts]
+        exhausted_entries = [entry for entry in entries if entry.attempts + 1 >= self.max_attempts]
+        if exhausted_entries:
+            logger.error('Braze outbox gave up on %d entries: %s', len(exhausted_entries), error)
+            self.outbox.mark_failed(exhausted_entries, error)
+
+        for entry in retry_entries:
+            if isinstance(error, BrazeRateLimitError) and error.reset_epoch_s > now:
+                next_attempt_at = error.reset_epoch_s
+            elif isinstance(error, BrazeCircuitOpenError):
+                next_attempt_at = now + error.retry_after_s
+            else:
+                next_attempt_at = now + self.backoff_s * 2 ** entry.attempts
+            self.outbox.mark_retry([entry], error, next_attempt_at)
@@ -0,0 +1,126 @@
+"""
+Dry-run planning of Braze client operations.
+"""
+import math
+import threading
+
+from .constants import DEFAULT_RATE_LIMIT, ENDPOINT_RATE_LIMITS, BrazeAPIEndpoints
+
+# Latency assumed for each request when estimating how long a plan takes to run.
+DEFAULT_PLAN_LATENCY_S = 0.25
+
+# Keys of /users/track objects identifying the user rather than updating an attribute.
+USER_IDENTIFIER_KEYS = ('external_id', 'user_alias', 'braze_id', '_update_existing_only')
+
+# What planned requests answer, as if Braze had nothing to report.
+PLANNED_RESPONSES = {
+    BrazeAPIEndpoints.EXPORT_IDS: {'users': [], 'message': 'success'},
+    BrazeAPIEndpoints.UNSUBSCRIBED_EMAILS: {'emails': [], 'message': 'success'},
+}
+PLANNED_RESPONSE = {'message': 'success'}
+
+# The external id messages to emails are planned for, as planned exports find no users.
+PLANNED_EXTERNAL_ID = 'planned-external-id'
+
+
+def data_points(data):
+    """
+    Return the number of Braze data points a /users/track request body consumes.
+
+    Each attribute updated counts as a data point, as does each event and purchase.
+    """
+    attribute_updates = sum(
+        len([key for key in attribute if key not in USER_IDENTIFIER_KEYS]) for attribute in data.get('attributes', [])
+    )
+    return (
+        attribute_updates
+        + len(data.get('events', []))
+        + len(data.get('purchases', []))
+    )
+
+
+class RequestPlan:
+    """
+    The requests an operation would make, collected by ``BrazeClient.plan`` instead of sending them.
+    """
+
+    def __init__(self, rate_limits, concurrency, latency_s=DEFAULT_PLAN_LATENCY_S):
+        """
+        Arguments:
+            rate_limits (RateLimitTracker): The rate limits last reported by Braze
+            concurrency (int): The number of requests the client keeps in flight
+            latency_s (float): The latency assumed for each request
+        """
+        self.rate_limits = rate_limits
+        self.concurrency = max(concurrency, 1)
+        self.latency_s = latency_s
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._bytes = {}
+        self._data_points = 0
+
+    def record(self, endpoint, data, body):
+        """
+        Record a request instead of sending it.
+
+        Returns:
+            response (dict): The json body the request is answered with
+        """
+        with self._lock:
+            self._requests[endpoint] = self._requests.get(endpoint, 0) + 1
+            self._bytes[endpoint] = self._bytes.get(endpoint, 0) + (len(body) if body else 0)
+            if endpoint == BrazeAPIEndpoints.TRACK_USER:
+                self._data_points += data_points(data)
+        return dict(PLANNED_RESPONSES.get(endpoint, PLANNED_RESPONSE))
+
+    def _estimate_endpoint_s(self, endpoint, requests):
+        """
+        Return how long sending ``requests`` requests to ``endpoint`` would take.
+
+        The requests take their latency at the client's concurrency, unless the rate limit
+        makes them wait for later windows.
+        """
+        sending_s = math.ceil(requests / self.concurrency) * self.latency_s
+        limit, window_s = ENDPOINT_RATE_LIMITS.get(endpoint, DEFAULT_RATE_LIMIT)
+        available = limit
+        first_reset_s = window_s
+        budget = self.rate_limits.budget(endpoint)
+        if budget is not None:
+            limit, available, first_reset_s = budget.limit, budget.available(), budget.seconds_until_reset()
+        if requests <= available or not limit:
+            return sending_s
+
+        extra_windows = math.ceil((requests - available) / limit)
+        return max(sending_s, first_reset_s + (extra_windows - 1) * window_s)
+
+    def summary(self):
+        """
+        Return the totals of the planned requests.
+
+        Returns:
+            summary (dict): e.g.
+            {
+                'requests': 3, 'requests_by_endpoint': {'/users/track': 2, '/users/alias/new': 1},
+                'bytes': 20480, 'bytes_by_endpoint': {...}, 'data_points': 150,
+                'estimated_duration_s': 0.75, 'estimated_duration_s_by_endpoint': {...},
+            }
+        """
+        with self._lock:
+            requests_by_endpoint = dict(self._requests)
+            bytes_by_endpoint = dict(self._bytes)
+            total_data_points = self._data_points
+
+        # Operations send to their endpoints one after another, e.g. aliases before attributes.
+        duration_by_endpoint = {
+            endpoint: self._estimate_endpoint_s(endpoint, requests)
+            for endpoint, requests in requests_by_endpoint.items()
+        }
+        return {
+            'requests': sum(requests_by_endpoint.values()),
+            'requests_by_endpoint': requests_by_endpoint,
+            'bytes': sum(bytes_by_endpoint.values()),
+            'bytes_by_endpoint': bytes_by_endpoint,
+            'data_points': total_data_points,
+            'estimated_duration_s': sum(duration_by_endpoint.values()),
+            'estimated_duration_s_by_endpoint': duration_by_endpoint,
+        }
@@ -0,0 +1,90 @@
+"""
+Tracking of the Braze API rate limit budget.
+
+https://www.braze.com/docs/api/api_limits/
+"""
+import threading
+import time
+
+
+class RateLimitBudget:
+    """
+    An endpoint's rate limit as last reported by Braze in the X-RateLimit-* response headers.
+    """
+
+    def __init__(self, limit, remaining, reset_epoch_s):
+        """
+        Arguments:
+            limit (int): The number of calls allowed in the current window
+            remaining (int): The number of calls left in the current window
+            reset_epoch_s (float): Unix timestamp at which the window resets
+        """
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_epoch_s = reset_epoch_s
+
+    def __repr__(self):
+        return f'RateLimitBudget(limit={self.limit}, remaining={self.remaining}, reset_epoch_s={self.reset_epoch_s})'
+
+    def seconds_until_reset(self, now=None):
+        """
+        Return how long until the window resets, 0 once it has.
+        """
+        now = time.time() if now is None else now
+        return max(self.reset_epoch_s - now, 0.0)
+
+    def available(self, now=None):
+        """
+        Return the number of calls that can be made now, the full limit once the window has reset.
+        """
+        if self.seconds_until_reset(now) == 0:
+            return self.limit
+        return self.remaining
+
+    def fraction_available(self, now=None):
+        """
+        Return the share of the limit that can still be used now, between 0 and 1.
+        """
+        if not self.limit:
+            return 1.0
+        return self.available(now) / self.limit
+
+
+class RateLimitTracker:
+    """
+    Keeps the latest RateLimitBudget reported for each endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._budgets = {}
+
+    def update(self, endpoint, headers):
+        """
+        Record the rate limit headers of a response, ignoring responses without them.
+        """
+        try:
+            budget = RateLimitBudget(
+                limit=int(headers['X-RateLimit-Limit']),
+                remaining=int(headers['X-RateLimit-Remaining']),
+                reset_epoch_s=float(headers['X-RateLimit-Reset']),
+            )
+        except (KeyError, ValueError):
+            return
+
+        with self._lock:
+            self._budgets[endpoint] = budget
+
+    def budget(self, endpoint):
+        """
+        Return the latest RateLimitBudget of ``endpoint``, or None if Braze has not reported one yet.
+        """
+        with self._lock:
+            return self._budgets.get(endpoint)
+
+    def budgets(self):
+        """
+        Return the latest RateLimitBudget of every endpoint called so far, by endpoint.
+        """
+        with self._lock:
+            return dict(self._budgets)
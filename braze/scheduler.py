@@ -0,0 +1,137 @@
+"""
+Priority scheduling of Braze API requests.
+"""
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+from braze.constants import PRIORITY_HIGH
+from braze.exceptions import BrazeDeadlineExceededError
+
+# Longest time a request held back by the budget reservation sleeps before re-checking the budget.
+MAX_BUDGET_WAIT_S = 1.0
+
+
+class PriorityScheduler:
+    """
+    Admit requests by priority, keeping capacity in reserve for high-priority requests.
+
+    Waiting requests are admitted by priority, then in arrival order. Requests below
+    ``PRIORITY_HIGH`` may only use ``max_concurrent - reserved_slots`` of the concurrent
+    slots, and are held back while their endpoint's rate limit budget is below
+    ``reserved_budget_fraction`` of its limit, until the window resets. Requests held back
+    by their endpoint's budget are skipped, so they do not hold up requests to other endpoints.
+    """
+
+    def __init__(self, max_concurrent=8, reserved_slots=2, reserved_budget_fraction=0.2):
+        """
+        Arguments:
+            max_concurrent (int): The number of requests allowed in flight across all priorities
+            reserved_slots (int): The number of those only high-priority requests may use
+            reserved_budget_fraction (float): The share of each endpoint's rate limit kept for
+            high-priority requests
+        """
+        self.max_concurrent = max_concurrent
+        self.reserved_slots = min(reserved_slots, max_concurrent - 1)
+        self.reserved_budget_fraction = reserved_budget_fraction
+        self._condition = threading.Condition()
+        self._waiting = []
+        # The endpoint and rate limits of each waiting request, by its heap entry.
+        self._waiting_requests = {}
+        self._sequence = itertools.count()
+        self._in_flight = 0
+
+    @contextmanager
+    def slot(self, priority, endpoint=None, rate_limits=None, deadline=None):
+        """
+        Hold a request slot for the duration of the block.
+
+        Arguments:
+            priority (int): e.g. PRIORITY_HIGH or PRIORITY_LOW, lower values are served first
+            endpoint (str): The endpoint being called, used to look up its rate limit budget
+            rate_limits (RateLimitTracker): The budgets reported by Braze, if any
+            deadline (float): The ``time.monotonic()`` value after which to stop waiting, if any
+        Raises:
+            BrazeDeadlineExceededError: If the deadline passes before a slot is free
+        """
+        self.acquire(priority, endpoint, rate_limits, deadline=deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, priority, endpoint=None, rate_limits=None, deadline=None):
+        """
+        Block until a request of ``priority`` may be sent, or ``deadline`` passes.
+
+        Raises:
+            BrazeDeadlineExceededError: If the deadline passes before a slot is free
+        """
+        entry = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            self._waiting_requests[entry] = (endpoint, rate_limits)
+            try:
+                while True:
+                    admitted, wait_s = self._admission(entry)
+                    if admitted:
+                        break
+                    if deadline is not None:
+                        remaining_s = deadline - time.monotonic()
+                        if remaining_s <= 0:
+                            raise BrazeDeadlineExceededError(f'Deadline exceeded waiting to call {endpoint}.')
+                        wait_s = remaining_s if wait_s is None else min(wait_s, remaining_s)
+                    self._condition.wait(wait_s)
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                del self._waiting_requests[entry]
+                self._condition.notify_all()
+            self._in_flight += 1
+
+    def release(self):
+        """
+        Free the slot of a completed request.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _admission(self, entry):
+        """
+        Return whether the waiting request ``entry`` may be sent, and if not how long to wait before re-checking.
+
+        Callers hold the lock. A request waits for the requests ahead of it, except those
+        held back by their endpoint's budget reservation.
+        """
+        priority = entry[0]
+        if not self._has_slot(priority):
+            return False, None
+        budget_wait_s = self._budget_wait_s(priority, *self._waiting_requests[entry])
+        if budget_wait_s:
+            return False, min(budget_wait_s, MAX_BUDGET_WAIT_S)
+        for waiting_entry in self._waiting:
+            if waiting_entry < entry and not self._budget_wait_s(
+                waiting_entry[0], *self._waiting_requests[waiting_entry]
+            ):
+                # Budgets change without notice, the request ahead may be held back by the time it checks.
+                return False, MAX_BUDGET_WAIT_S
+        return True, None
+
+    def _has_slot(self, priority):
+        if priority <= PRIORITY_HIGH:
+            return self._in_flight < self.max_concurrent
+        return self._in_flight < self.max_concurrent - self.reserved_slots
+
+    def _budget_wait_s(self, priority, endpoint, rate_limits):
+        """
+        Return how long a request must wait for the budget reservation, 0 if it may go now.
+        """
+        if priority <= PRIORITY_HIGH or rate_limits is None:
+            return 0
+        budget = rate_limits.budget(endpoint)
+        if budget is None or budget.fraction_available() >= self.reserved_budget_fraction:
+            return 0
+        return budget.seconds_until_reset()
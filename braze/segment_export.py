@@ -0,0 +1,100 @@
+"""
+Download and parsing of Braze segment export files.
+
+https://www.braze.com/docs/api/endpoints/export/user_data/post_users_segment/
+
+Without S3 or Azure credentials, Braze writes a segment export to a zip file behind a url
+that only becomes available once the export is done. The zip holds one or more files of
+newline-delimited JSON user objects, gzipped when the export's ``output_format`` is 'gzip'.
+"""
+import gzip
+import json
+import os
+import tempfile
+import time
+import zipfile
+
+from .constants import (
+    SEGMENT_EXPORT_DOWNLOAD_CHUNK_SIZE,
+    SEGMENT_EXPORT_DOWNLOAD_TIMEOUT,
+    SEGMENT_EXPORT_POLL_INTERVAL_S,
+    SEGMENT_EXPORT_TIMEOUT_S,
+)
+from .exceptions import BrazeExportNotReadyError
+
+GZIP_MAGIC = b'\x1f\x8b'
+# Statuses of the export url until the file is written.
+EXPORT_NOT_READY_STATUSES = (403, 404)
+
+
+def download_export(
+        session,
+        url,
+        poll_interval_s=SEGMENT_EXPORT_POLL_INTERVAL_S,
+        timeout_s=SEGMENT_EXPORT_TIMEOUT_S,
+        chunk_size=SEGMENT_EXPORT_DOWNLOAD_CHUNK_SIZE,
+):
+    """
+    Wait for an export file to become available and stream it to a temporary file.
+
+    Arguments:
+        session (requests.Session): The session downloading the file, it must not send the Braze API key
+        url (str): The export url returned by Braze
+        poll_interval_s (float): How long to wait between checks that the file is available
+        timeout_s (float): How long to wait for the file to become available
+        chunk_size (int): The number of bytes read from the response at a time
+    Returns:
+        path (str): The temporary file, to be removed by the caller
+    Raises:
+        BrazeExportNotReadyError: If the file is not available within ``timeout_s``
+    """
+    deadline = time.monotonic() + timeout_s
+    while True:
+        with session.get(url, stream=True, timeout=SEGMENT_EXPORT_DOWNLOAD_TIMEOUT) as response:
+            if response.status_code not in EXPORT_NOT_READY_STATUSES:
+                response.raise_for_status()
+                fd, path = tempfile.mkstemp(prefix='braze-segment-export-')
+                try:
+                    with os.fdopen(fd, 'wb') as export_file:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            export_file.write(chunk)
+                except BaseException:
+                    os.remove(path)
+                    raise
+                return path
+
+        if time.monotonic() + poll_interval_s > deadline:
+            raise BrazeExportNotReadyError(f'Segment export was not available after {timeout_s}s: {url}')
+        time.sleep(poll_interval_s)
+
+
+def _iter_lines(binary_file):
+    """
+    Yield the JSON objects of a newline-delimited JSON stream, decompressing it if gzipped.
+    """
+    if binary_file.peek(len(GZIP_MAGIC))[:len(GZIP_MAGIC)] == GZIP_MAGIC:
+        binary_file = gzip.GzipFile(fileobj=binary_file)
+    for line in binary_file:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_export_records(path):
+    """
+    Yield the user objects of a downloaded export file, one file line at a time.
+
+    Handles zip files of plain or gzipped newline-delimited JSON, as well as single gzipped
+    or plain newline-delimited JSON files.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.infolist():
+                if member.is_dir():
+                    continue
+                with archive.open(member) as member_file:
+                    yield from _iter_lines(member_file)
+        return
+
+    with open(path, 'rb') as export_file:
+        yield from _iter_lines(export_file)
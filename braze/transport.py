@@ -0,0 +1,183 @@
+"""
+Record-and-replay transports for reproducible performance tests of the Braze client.
+
+A RecordingTransport saves every request and response the client makes, with its latency,
+to a JSON Lines file. A ReplayTransport answers the same requests from that file without
+any network access, taking the original latencies or scaled ones, so a production run can
+be reproduced offline and optimizations compared against identical traffic.
+
+Example:
+    client = BrazeClient(api_key, api_url, app_id, transport=RecordingTransport('alias_run.jsonl'))
+    client.create_braze_alias(emails, 'Enterprise')
+
+    client = BrazeClient(api_key, api_url, app_id, transport=ReplayTransport('alias_run.jsonl'))
+    client.create_braze_alias(emails, 'Enterprise')
+"""
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .exceptions import BrazeClientError
+
+
+def _body_text(body):
+    if isinstance(body, bytes):
+        return body.decode('utf-8')
+    return body
+
+
+def _read_timeout(timeout):
+    """
+    Return the read timeout of a requests ``timeout`` argument, None if there is none.
+    """
+    if isinstance(timeout, tuple):
+        return timeout[1]
+    return timeout
+
+
+class RecordingTransport(BaseAdapter):
+    """
+    Sends requests through another adapter and appends each exchange to a JSON Lines file.
+
+    The Authorization header is never recorded.
+    """
+
+    def __init__(self, path, adapter=None):
+        """
+        Arguments:
+            path (str): The file exchanges are appended to
+            adapter (requests.adapters.BaseAdapter): The adapter sending the requests, an HTTPAdapter by default
+        """
+        super().__init__()
+        self.path = path
+        self.adapter = adapter or HTTPAdapter()
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        """
+        Send the request and record it along with its response or error.
+        """
+        exchange = {
+            'offset_s': time.monotonic() - self._start,
+            'method': request.method,
+            'path': request.path_url,
+            'body': _body_text(request.body),
+        }
+        start = time.perf_counter()
+        try:
+            response = self.adapter.send(request, **kwargs)
+        except requests.exceptions.RequestException as exc:
+            exchange.update(elapsed_s=time.perf_counter() - start, error=type(exc).__name__)
+            self._write(exchange)
+            raise
+
+        exchange.update(
+            elapsed_s=time.perf_counter() - start,
+            status_code=response.status_code,
+            reason=response.reason,
+            headers=dict(response.headers),
+            content=response.text,
+        )
+        self._write(exchange)
+        return response
+
+    def _write(self, exchange):
+        line = json.dumps(exchange) + '\n'
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as recording:
+                recording.write(line)
+
+    def close(self):
+        self.adapter.close()
+
+
+class ReplayTransport(BaseAdapter):
+    """
+    Answers requests with the responses of a recording, without network access.
+
+    Each request is matched to a recorded exchange with the same method, path and body.
+    Identical requests receive their recorded responses in the order they were recorded,
+    so concurrent operations replay deterministically. Each response is delayed by its
+    recorded latency times ``latency_scale``, and a latency beyond the request's read
+    timeout raises a ReadTimeout as it would have against Braze.
+    """
+
+    def __init__(self, path, latency_scale=1.0, match_body=True):
+        """
+        Arguments:
+            path (str): A file written by a RecordingTransport
+            latency_scale (float): Multiplier of the recorded latencies, 0 replays without delay
+            match_body (bool): Whether requests must have the recorded body to match
+        """
+        super().__init__()
+        self.latency_scale = latency_scale
+        self.match_body = match_body
+        self._lock = threading.Lock()
+        self._exchanges = defaultdict(deque)
+        with open(path, encoding='utf-8') as recording:
+            for line in recording:
+                if line.strip():
+                    exchange = json.loads(line)
+                    self._exchanges[self._key(exchange['method'], exchange['path'], exchange['body'])].append(exchange)
+
+    def _key(self, method, path, body):
+        return (method, path, body if self.match_body else None)
+
+    def remaining(self):
+        """
+        Return the number of recorded exchanges not replayed yet.
+        """
+        with self._lock:
+            return sum(len(exchanges) for exchanges in self._exchanges.values())
+
+    def send(self, request, timeout=None, **kwargs):  # pylint: disable=arguments-differ,unused-argument
+        """
+        Return the recorded response of the request after its scaled latency.
+
+        Raises:
+            BrazeClientError: If the recording has no response left for the request
+        """
+        key = self._key(request.method, request.path_url, _body_text(request.body))
+        with self._lock:
+            exchanges = self._exchanges.get(key)
+            if not exchanges:
+                raise BrazeClientError(f'No recorded response left for {request.method} {request.path_url}.')
+            exchange = exchanges.popleft()
+
+        delay_s = exchange['elapsed_s'] * self.latency_scale
+        read_timeout_s = _read_timeout(timeout)
+        if read_timeout_s is not None and delay_s > read_timeout_s:
+            time.sleep(read_timeout_s)
+            raise requests.exceptions.ReadTimeout(f'Replayed response took {delay_s:.3f}s.', request=request)
+        time.sleep(delay_s)
+
+        if 'error' in exchange:
+            error_class = getattr(requests.exceptions, exchange['error'], requests.exceptions.ConnectionError)
+            raise error_class(f"Replayed {exchange['error']}.", request=request)
+        return self._response(request, exchange, delay_s)
+
+    @staticmethod
+    def _response(request, exchange, delay_s):
+        """
+        Build the response of a recorded exchange to ``request``.
+        """
+        response = requests.Response()
+        response.status_code = exchange['status_code']
+        response.reason = exchange['reason']
+        response.headers = CaseInsensitiveDict(exchange['headers'])
+        response._content = exchange['content'].encode('utf-8')  # pylint: disable=protected-access
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=delay_s)
+        return response
+
+    def close(self):
+        pass
@@ -144,6 +144,9 @@ setup(
         'braze',
     ],
     entry_points={
+        'console_scripts': [
+            'braze-loadgen = braze.loadgen:main',
+        ],
         'lms.djangoapp': [
             'braze = braze.apps:BrazeAppConfig',
         ],
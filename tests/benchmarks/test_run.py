@@ -0,0 +1,47 @@
+"""
+Tests for the benchmark runner.
+"""
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from benchmarks import run
+from benchmarks.cases import BENCHMARKS
+
+
+class BenchmarkRunTests(TestCase):
+    """
+    Tests for the benchmark runner and its baseline comparison.
+    """
+
+    def test_every_benchmark_runs(self):
+        """
+        Tests that every benchmark can be timed.
+        """
+        timings = run.run_benchmarks(list(BENCHMARKS), repeat=1, min_repeat_time_s=0)
+        self.assertEqual(set(timings), set(BENCHMARKS))
+        self.assertTrue(all(seconds > 0 for seconds in timings.values()))
+
+    def test_find_regressions(self):
+        """
+        Tests that only benchmarks slower than their baseline by more than the threshold regressed.
+        """
+        timings = {'fast': 1.0, 'slightly_slower': 1.2, 'slower': 1.5, 'new': 9.0}
+        baseline = {'fast': 1.0, 'slightly_slower': 1.0, 'slower': 1.0}
+        self.assertEqual(run.find_regressions(timings, baseline, threshold=0.25), ['slower'])
+
+    def test_main(self):
+        """
+        Tests that main stores the baseline and fails once a benchmark regressed.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            baseline_path = os.path.join(tmp_dir, 'baseline.json')
+            args = ['--only', 'chunks', '--repeat', '1', '--baseline', baseline_path]
+
+            with mock.patch.object(run, 'run_benchmarks', return_value={'chunks': 1.0}):
+                self.assertEqual(run.main(args + ['--update-baseline']), 0)
+                self.assertEqual(run.load_baseline(baseline_path), {'chunks': 1.0})
+                self.assertEqual(run.main(args), 0)
+
+            with mock.patch.object(run, 'run_benchmarks', return_value={'chunks': 2.0}):
+                self.assertEqual(run.main(args), 1)
@@ -0,0 +1,67 @@
+"""
+Tests for the Braze alias indexes.
+"""
+import os
+import tempfile
+from unittest import TestCase
+
+from braze.alias_index import AliasIndex, FileAliasIndex
+
+
+class AliasIndexTests(TestCase):
+    """
+    Tests for AliasIndex and FileAliasIndex.
+    """
+
+    def setUp(self):
+        super().setUp()
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.index_path = os.path.join(temp_dir.name, 'aliases.jsonl')
+
+    def test_unknown(self):
+        """
+        Tests that only alias names not yet added for the label are returned, in order.
+        """
+        index = AliasIndex()
+        index.add('label', ['a@example.com', 'c@example.com'])
+        index.add('other_label', ['b@example.com'])
+
+        assert index.unknown('label', ['a@example.com', 'b@example.com', 'c@example.com', 'd@example.com']) == [
+            'b@example.com', 'd@example.com'
+        ]
+        assert ('label', 'a@example.com') in index
+        assert len(index) == 3
+
+    def test_file_index_persists(self):
+        """
+        Tests that pairs added to a FileAliasIndex are reloaded by a new index, without duplicates.
+        """
+        index = FileAliasIndex(self.index_path)
+        index.add('label', ['a@example.com', 'b@example.com', 'a@example.com'])
+        index.add('label', ['b@example.com'])
+
+        reloaded_index = FileAliasIndex(self.index_path)
+        assert ('label', 'a@example.com') in reloaded_index
+        assert ('label', 'b@example.com') in reloaded_index
+        assert len(reloaded_index) == 2
+        with open(self.index_path, encoding='utf8') as index_file:
+            assert len(index_file.readlines()) == 2
+
+    def test_discard(self):
+        """
+        Tests that discarded pairs are no longer known, including after reloading a FileAliasIndex.
+        """
+        index = FileAliasIndex(self.index_path)
+        index.add('label', ['a@example.com', 'b@example.com'])
+        index.discard('label', ['a@example.com', 'c@example.com'])
+
+        assert ('label', 'a@example.com') not in index
+        assert len(index) == 1
+
+        index.add('label', ['a@example.com'])
+        index.discard('label', ['b@example.com'])
+        reloaded_index = FileAliasIndex(self.index_path)
+        assert ('label', 'a@example.com') in reloaded_index
+        assert ('label', 'b@example.com') not in reloaded_index
+        assert len(reloaded_index) == 1
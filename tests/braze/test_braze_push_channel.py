@@ -0,0 +1,102 @@
+"""
+Tests for the Braze push notification ACE channel.
+"""
+import json
+import os
+import tempfile
+from unittest import TestCase, mock
+
+import responses
+from django.test import override_settings
+
+from braze.ace_channel.braze_push_channel import BrazePushNotificationChannel
+from braze.constants import BrazeAPIEndpoints
+
+BRAZE_URL = 'https://braze.example.com'
+CHANNEL_SETTINGS = {
+    'ACE_CHANNEL_BRAZE_PUSH_API_KEY': 'api_key',
+    'ACE_CHANNEL_BRAZE_REST_ENDPOINT': 'braze.example.com',
+    'ACE_CHANNEL_BRAZE_PUSH_CAMPAIGNS': {'new_response': 'campaign_id'},
+}
+
+
+class BrazePushNotificationChannelTests(TestCase):
+    """
+    Tests for BrazePushNotificationChannel.
+    """
+
+    def setUp(self):
+        super().setUp()
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.outbox_path = os.path.join(temp_dir.name, 'outbox.db')
+        self.addCleanup(self._close_outboxes)
+        self.message = mock.Mock(
+            options={'notification_type': 'new_response', 'emails': ['test@example.com']},
+            context={'post_data': {'topic': 'Welcome'}},
+        )
+
+    def _close_outboxes(self):
+        for outbox in BrazePushNotificationChannel._outboxes.values():  # pylint: disable=protected-access
+            outbox.close()
+        BrazePushNotificationChannel._outboxes.clear()  # pylint: disable=protected-access
+
+    def _mock_braze(self):
+        """
+        Mock the Braze endpoints a campaign send to an email uses.
+        """
+        responses.add(
+            responses.POST,
+            BRAZE_URL + BrazeAPIEndpoints.EXPORT_IDS,
+            json={'users': [{'external_id': '1'}], 'message': 'success'},
+            status=201,
+        )
+        responses.add(responses.POST, BRAZE_URL + BrazeAPIEndpoints.SEND_CAMPAIGN, json={'message': 'success'})
+
+    def _campaign_sends(self):
+        return [
+            json.loads(call.request.body)
+            for call in responses.calls
+            if call.request.url == BRAZE_URL + BrazeAPIEndpoints.SEND_CAMPAIGN
+        ]
+
+    @responses.activate
+    def test_deliver(self):
+        """
+        Tests that without an outbox notifications are sent directly.
+        """
+        self._mock_braze()
+        with override_settings(**CHANNEL_SETTINGS):
+            BrazePushNotificationChannel().deliver(self.message, rendered_message=None)
+
+        sends = self._campaign_sends()
+        assert len(sends) == 1
+        assert sends[0]['campaign_id'] == 'campaign_id'
+        assert sends[0]['recipients'] == [{'external_user_id': '1'}]
+
+    @responses.activate
+    def test_deliver_through_outbox(self):
+        """
+        Tests that with an outbox notifications are queued, and sent once the outbox is drained.
+        """
+        self._mock_braze()
+        with override_settings(ACE_CHANNEL_BRAZE_OUTBOX_PATH=self.outbox_path, **CHANNEL_SETTINGS):
+            BrazePushNotificationChannel().deliver(self.message, rendered_message=None)
+            assert not self._campaign_sends()
+            assert BrazePushNotificationChannel.get_braze_outbox().pending_count() == 1
+
+            delivered = BrazePushNotificationChannel.get_outbox_drainer().drain()
+
+        assert delivered == 1
+        sends = self._campaign_sends()
+        assert len(sends) == 1
+        assert sends[0]['trigger_properties'] == {'topic': 'Welcome'}
+
+    def test_outbox_drainer_not_configured(self):
+        """
+        Tests that there is no drainer unless the outbox and the client are configured.
+        """
+        with override_settings(**CHANNEL_SETTINGS):
+            assert BrazePushNotificationChannel.get_outbox_drainer() is None
+        with override_settings(ACE_CHANNEL_BRAZE_OUTBOX_PATH=self.outbox_path):
+            assert BrazePushNotificationChannel.get_outbox_drainer() is None
@@ -0,0 +1,130 @@
+"""
+Tests for the Braze catalog sync.
+"""
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import responses
+
+from braze.catalog import CatalogSnapshot, FileCatalogSnapshot, diff_catalog, item_hash
+from braze.client import BrazeClient
+from braze.constants import BrazeAPIEndpoints
+from braze.dead_letter import DeadLetterStore
+from braze.exceptions import BrazeClientError
+
+
+class CatalogSnapshotTests(TestCase):
+    """
+    Tests for diff_catalog and the catalog snapshots.
+    """
+
+    def setUp(self):
+        super().setUp()
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.snapshot_path = os.path.join(temp_dir.name, 'courses.json')
+
+    def test_diff_catalog(self):
+        """
+        Tests that items are split into new, changed and deleted ones, unchanged items being left out.
+        """
+        snapshot_hashes = {
+            'unchanged': item_hash({'id': 'unchanged', 'title': 'Same'}),
+            'changed': item_hash({'id': 'changed', 'title': 'Before'}),
+            'deleted': item_hash({'id': 'deleted'}),
+        }
+        items = [
+            {'title': 'Same', 'id': 'unchanged'},
+            {'id': 'changed', 'title': 'After'},
+            {'id': 'new', 'title': 'New'},
+        ]
+
+        created, updated, deleted, hashes = diff_catalog(items, snapshot_hashes)
+
+        assert created == [{'id': 'new', 'title': 'New'}]
+        assert updated == [{'id': 'changed', 'title': 'After'}]
+        assert deleted == ['deleted']
+        assert sorted(hashes) == ['changed', 'new', 'unchanged']
+
+    def test_diff_catalog_bad_items(self):
+        """
+        Tests that items without an id or with a duplicate id are refused.
+        """
+        with self.assertRaises(BrazeClientError):
+            diff_catalog([{'title': 'No id'}], {})
+        with self.assertRaises(BrazeClientError):
+            diff_catalog([{'id': 1}, {'id': '1'}], {})
+
+    def test_file_snapshot_persists(self):
+        """
+        Tests that a saved FileCatalogSnapshot is reloaded by a new snapshot.
+        """
+        snapshot = FileCatalogSnapshot(self.snapshot_path)
+        snapshot.update({'a': 'hash_a', 'b': 'hash_b'})
+        snapshot.remove(['b'])
+        snapshot.save()
+
+        assert FileCatalogSnapshot(self.snapshot_path).hashes() == {'a': 'hash_a'}
+        assert not os.path.exists(self.snapshot_path + '.tmp')
+
+
+class SyncCatalogTests(TestCase):
+    """
+    Tests for BrazeClient.sync_catalog.
+    """
+    BRAZE_URL = 'http://braze-api-url.com'
+    CATALOG_ITEMS_URL = BRAZE_URL + BrazeAPIEndpoints.CATALOG_ITEMS.format(catalog_name='courses')
+
+    def setUp(self):
+        super().setUp()
+        self.client = BrazeClient(api_key='api_key', api_url=self.BRAZE_URL, app_id='app_id')
+
+    def _payloads(self, method, since=0):
+        return [json.loads(call.request.body) for call in responses.calls[since:] if call.request.method == method]
+
+    @responses.activate
+    def test_sync_catalog(self):
+        """
+        Tests that only new, changed and deleted items are sent, in chunks of 50, and a repeated sync sends nothing.
+        """
+        for method in (responses.PUT, responses.DELETE):
+            responses.add(method, self.CATALOG_ITEMS_URL, json={'message': 'success'}, status=202)
+        snapshot = CatalogSnapshot()
+        items = [{'id': str(i), 'title': f'Course {i}'} for i in range(60)]
+        assert self.client.sync_catalog('courses', items, snapshot) == {
+            'created': 60, 'updated': 0, 'deleted': 0, 'unchanged': 0,
+        }
+        assert sorted(len(payload['items']) for payload in self._payloads('PUT')) == [10, 50]
+
+        first_sync_calls = len(responses.calls)
+        items = items[1:]
+        items[0] = {'id': '1', 'title': 'Renamed'}
+        summary = self.client.sync_catalog('courses', items, snapshot)
+
+        assert summary == {'created': 0, 'updated': 1, 'deleted': 1, 'unchanged': 58}
+        assert self._payloads('PUT', since=first_sync_calls) == [{'items': [{'id': '1', 'title': 'Renamed'}]}]
+        assert self._payloads('DELETE') == [{'items': [{'id': '0'}]}]
+
+        second_sync_calls = len(responses.calls)
+        self.client.sync_catalog('courses', items, snapshot)
+        assert len(responses.calls) == second_sync_calls
+
+    @responses.activate
+    def test_sync_catalog_dead_lettered_batch(self):
+        """
+        Tests that a rejected batch is kept out of the snapshot, so the next sync sends it again.
+        """
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        store = DeadLetterStore(os.path.join(temp_dir.name, 'dead_letters.sqlite'))
+        self.addCleanup(store.close)
+        client = BrazeClient(api_key='api_key', api_url=self.BRAZE_URL, app_id='app_id', dead_letter_store=store)
+        snapshot = FileCatalogSnapshot(os.path.join(temp_dir.name, 'courses.json'))
+        responses.add(responses.PUT, self.CATALOG_ITEMS_URL, json={'message': 'invalid-fields'}, status=400)
+
+        client.sync_catalog('courses', [{'id': 'a', 'title': 'A'}], snapshot)
+
+        assert not FileCatalogSnapshot(snapshot.path).hashes()
+        assert len(store.entries()) == 1
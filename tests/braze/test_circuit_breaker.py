@@ -0,0 +1,119 @@
+"""
+Tests for the Braze circuit breaker.
+"""
+import time
+from unittest import TestCase
+
+import requests
+import responses
+
+from braze.circuit_breaker import CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, CircuitBreaker
+from braze.client import BrazeClient
+from braze.constants import BrazeAPIEndpoints
+from braze.exceptions import BrazeBadRequestError, BrazeCircuitOpenError, BrazeInternalServerError
+
+
+class CircuitBreakerTests(TestCase):
+    """
+    Tests for CircuitBreaker and the client's use of it.
+    """
+    BRAZE_URL = 'http://braze-api-url.com'
+    USERS_TRACK_URL = BRAZE_URL + BrazeAPIEndpoints.TRACK_USER
+
+    def setUp(self):
+        super().setUp()
+        self.circuit_breaker = CircuitBreaker(
+            failure_rate_threshold=0.5,
+            minimum_requests=4,
+            recovery_timeout_s=0.05,
+        )
+        self.client = BrazeClient(
+            api_key='api_key',
+            api_url=self.BRAZE_URL,
+            app_id='app_id',
+            circuit_breaker=self.circuit_breaker,
+        )
+
+    def _track_user(self):
+        self.client.track_user(attributes=[{'external_id': '1'}])
+
+    def _open_circuit(self):
+        """
+        Fail enough /users/track requests to open its circuit.
+        """
+        responses.add(responses.POST, self.USERS_TRACK_URL, body=requests.exceptions.ConnectTimeout())
+        for _ in range(4):
+            with self.assertRaises(requests.exceptions.ConnectTimeout):
+                self._track_user()
+        responses.reset()
+
+    @responses.activate
+    def test_opens_on_failure_rate(self):
+        """
+        Tests that the circuit opens once enough requests failed, and then fails fast.
+        """
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'error'}, status=500)
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'error'}, status=400)
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'success'}, status=201)
+        with self.assertRaises(BrazeInternalServerError):
+            self._track_user()
+        with self.assertRaises(BrazeBadRequestError):
+            self._track_user()
+        self._track_user()
+        assert self.circuit_breaker.state(BrazeAPIEndpoints.TRACK_USER) == CIRCUIT_CLOSED
+
+        responses.replace(responses.POST, self.USERS_TRACK_URL, json={'message': 'error'}, status=500)
+        with self.assertRaises(BrazeInternalServerError):
+            self._track_user()
+        assert self.circuit_breaker.state(BrazeAPIEndpoints.TRACK_USER) == CIRCUIT_OPEN
+
+        with self.assertRaises(BrazeCircuitOpenError) as context_manager:
+            self._track_user()
+        assert context_manager.exception.endpoint == BrazeAPIEndpoints.TRACK_USER
+        assert 0 < context_manager.exception.retry_after_s <= 0.05
+        assert len(responses.calls) == 4
+        assert self.circuit_breaker.state(BrazeAPIEndpoints.EXPORT_IDS) == CIRCUIT_CLOSED
+
+    @responses.activate
+    def test_half_open_trial_success(self):
+        """
+        Tests that a successful trial request closes the circuit.
+        """
+        self._open_circuit()
+        time.sleep(0.06)
+        assert self.circuit_breaker.state(BrazeAPIEndpoints.TRACK_USER) == CIRCUIT_HALF_OPEN
+
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'success'}, status=201)
+        self._track_user()
+
+        assert self.circuit_breaker.state(BrazeAPIEndpoints.TRACK_USER) == CIRCUIT_CLOSED
+
+    @responses.activate
+    def test_half_open_trial_failure(self):
+        """
+        Tests that a failed trial request opens the circuit again.
+        """
+        self._open_circuit()
+        time.sleep(0.06)
+
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'error'}, status=503)
+        with self.assertRaises(BrazeInternalServerError):
+            self._track_user()
+
+        assert self.circuit_breaker.state(BrazeAPIEndpoints.TRACK_USER) == CIRCUIT_OPEN
+        with self.assertRaises(BrazeCircuitOpenError):
+            self._track_user()
+
+    def test_half_open_trial_limit(self):
+        """
+        Tests that only ``half_open_max_requests`` trials are let through at once.
+        """
+        circuit_breaker = CircuitBreaker(minimum_requests=1, recovery_timeout_s=0)
+        circuit_breaker.after_request('/endpoint', BrazeInternalServerError('error'))
+
+        circuit_breaker.before_request('/endpoint')
+        with self.assertRaises(BrazeCircuitOpenError):
+            circuit_breaker.before_request('/endpoint')
+
+        circuit_breaker.after_request('/endpoint')
+        circuit_breaker.before_request('/endpoint')
@@ -1,15 +1,21 @@
 """
 Tests for Braze client.
 """
+import datetime
 import json
 import math
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
 
 import ddt
 import responses
 
+from braze.alias_index import AliasIndex
 from braze.client import BrazeClient
+from braze.concurrency import AdaptiveConcurrencyLimiter
 from braze.constants import (
+    DELETE_OUTCOME_DELETED,
     GET_EXTERNAL_IDS_CHUNK_SIZE,
     MAX_NUM_IDENTIFY_USERS_ALIASES,
     UNSUBSCRIBED_EMAILS_API_LIMIT,
@@ -25,6 +31,7 @@ from braze.exceptions import (
     BrazeRateLimitError,
     BrazeUnauthorizedError,
 )
+from braze.hooks import HOOK_BEFORE_SEND
 from test_utils.utils import generate_emails_and_ids
 
 
@@ -36,6 +43,10 @@ class BrazeClientTests(TestCase):
     BRAZE_URL = 'http://braze-api-url.com'
     CAMPAIGN_SEND_URL = BRAZE_URL + BrazeAPIEndpoints.SEND_CAMPAIGN
     CANVAS_SEND_URL = BRAZE_URL + BrazeAPIEndpoints.SEND_CANVAS
+    CAMPAIGN_SCHEDULE_URL = BRAZE_URL + BrazeAPIEndpoints.SCHEDULE_CAMPAIGN
+    CANVAS_SCHEDULE_URL = BRAZE_URL + BrazeAPIEndpoints.SCHEDULE_CANVAS
+    DELETE_USERS_URL = BRAZE_URL + BrazeAPIEndpoints.DELETE_USERS
+    SET_SUBSCRIPTION_STATUS_URL = BRAZE_URL + BrazeAPIEndpoints.SET_SUBSCRIPTION_STATUS
     EXPORT_ID_URL = BRAZE_URL + BrazeAPIEndpoints.EXPORT_IDS
     MESSAGE_SEND_URL = BRAZE_URL + BrazeAPIEndpoints.SEND_MESSAGE
     NEW_ALIAS_URL = BRAZE_URL + BrazeAPIEndpoints.NEW_ALIAS
@@ -100,6 +111,88 @@ class BrazeClientTests(TestCase):
         assert len(responses.calls) == 1
         assert responses.calls[0].request.url == self.EXPORT_ID_URL
 
+    @responses.activate
+    def test_get_braze_external_id_coalesced(self):
+        """
+        Tests that concurrent lookups of the same email share a single request.
+        """
+        def export_ids_callback(request):  # pylint: disable=unused-argument
+            time.sleep(0.1)
+            return 201, {}, json.dumps({'users': [{'external_id': '1'}], 'message': 'success'})
+
+        responses.add_callback(responses.POST, self.EXPORT_ID_URL, callback=export_ids_callback)
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            external_ids = list(executor.map(self.client.get_braze_external_id, ['test@example.com'] * 5))
+
+        assert external_ids == ['1'] * 5
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_get_braze_external_id_micro_batched(self):
+        """
+        Tests that concurrent lookups are resolved through one alias export, with a per-email
+        request only for the emails it did not find.
+        """
+        def export_ids_callback(request):
+            payload = json.loads(request.body)
+            if 'user_aliases' in payload:
+                users = [
+                    {'external_id': alias['alias_name'].split('@')[0], 'email': alias['alias_name']}
+                    for alias in payload['user_aliases']
+                    if alias['alias_name'] != '0@example.com'
+                ]
+            else:
+                users = [{'external_id': 'unaliased'}]
+            return 201, {}, json.dumps({'users': users, 'message': 'success'})
+
+        responses.add_callback(responses.POST, self.EXPORT_ID_URL, callback=export_ids_callback)
+        client = BrazeClient(
+            api_key='api_key',
+            api_url=self.BRAZE_URL,
+            app_id='app_id',
+            lookup_alias_label='Enterprise',
+            lookup_batch_window_s=0.1,
+        )
+        emails = [f'{i}@example.com' for i in range(10)]
+
+        with ThreadPoolExecutor(max_workers=len(emails)) as executor:
+            external_ids = list(executor.map(client.get_braze_external_id, emails))
+
+        assert external_ids == ['unaliased'] + [str(i) for i in range(1, 10)]
+        assert len(responses.calls) == 2
+        alias_payload = json.loads(responses.calls[0].request.body)
+        assert sorted(alias['alias_name'] for alias in alias_payload['user_aliases']) == sorted(emails)
+        assert alias_payload['user_aliases'][0]['alias_label'] == 'Enterprise'
+        assert json.loads(responses.calls[1].request.body)['email_address'] == '0@example.com'
+
+    @responses.activate
+    def test_get_braze_external_id_batch(self):
+        """
+        Tests that batches are exported concurrently and merged in input order.
+        """
+        def export_ids_callback(request):
+            user_aliases = json.loads(request.body)['user_aliases']
+            # Braze makes no promise about ordering, answer in reverse and skip every third alias.
+            users = [
+                {'external_id': alias['alias_name'].split('@')[0], 'email': alias['alias_name']}
+                for index, alias in enumerate(user_aliases)
+                if index % 3
+            ]
+            return 201, {}, json.dumps({'users': users[::-1], 'message': 'success'})
+
+        responses.add_callback(responses.POST, self.EXPORT_ID_URL, callback=export_ids_callback)
+        emails = [f'{i}@example.com' for i in range(GET_EXTERNAL_IDS_CHUNK_SIZE * 2 + 20)]
+
+        external_ids_by_email = self.client.get_braze_external_id_batch(emails, 'alias_label')
+
+        expected_emails = [
+            email for email in emails if emails.index(email) % GET_EXTERNAL_IDS_CHUNK_SIZE % 3
+        ]
+        assert list(external_ids_by_email) == expected_emails
+        assert external_ids_by_email['1@example.com'] == '1'
+        assert len(responses.calls) == 3
+
     def test_identify_users_bad_args(self):
         """
         Tests that arguments are validated.
@@ -195,19 +288,41 @@ class BrazeClientTests(TestCase):
         assert len(recipients) == 2
         assert recipients == mock_expected_recipients
 
-    def test_create_recipients_exceed_max_emails(self):
+    @responses.activate
+    def test_create_recipients_batching(self):
         """
-        Tests the maximum number of emails allowed per identify_users call
-        used within this function.
+        Tests that recipients beyond the identify_users limit are identified in batches.
         """
-        mock_exceed_email_length = generate_emails_and_ids(MAX_NUM_IDENTIFY_USERS_ALIASES + 10)
-        try:
-            self.client.create_recipients(
-                alias_label='Enterprise',
-                user_id_by_email=mock_exceed_email_length,
-            )
-        except BrazeClientError as error:
-            assert str(error) == "Max recipient limit reached."
+        responses.add(
+            responses.POST,
+            self.USERS_IDENTIFY_URL,
+            json={'message': 'success'},
+            status=201
+        )
+        mock_user_id_by_email = generate_emails_and_ids(MAX_NUM_IDENTIFY_USERS_ALIASES * 2 + 10)
+
+        recipients = self.client.create_recipients(
+            alias_label='Enterprise',
+            user_id_by_email=mock_user_id_by_email,
+        )
+
+        assert list(recipients) == list(mock_user_id_by_email)
+        assert len(responses.calls) == 3
+        identified_ids = {}
+        for call in responses.calls:
+            assert call.request.headers['Authorization'] == 'Bearer api_key'
+            aliases_to_identify = json.loads(call.request.body)['aliases_to_identify']
+            assert len(aliases_to_identify) <= MAX_NUM_IDENTIFY_USERS_ALIASES
+            for alias in aliases_to_identify:
+                identified_ids[alias['user_alias']['alias_name']] = alias['external_id']
+        assert identified_ids == mock_user_id_by_email
+
+    def test_create_recipients_bad_args(self):
+        """
+        Tests that arguments are validated.
+        """
+        with self.assertRaises(BrazeClientError):
+            self.client.create_recipients(alias_label='Enterprise', user_id_by_email={})
 
     @responses.activate
     def test_create_recipients_none_type_trigger_properties(self):
@@ -291,6 +406,35 @@ class BrazeClientTests(TestCase):
 
         assert len(responses.calls) == 1
 
+    @responses.activate
+    def test_track_user_adaptive_concurrency(self):
+        """
+        Tests that bulk requests go through the concurrency limiter, which backs off on 429s.
+        """
+        responses.add(
+            responses.POST,
+            self.USERS_TRACK_URL,
+            json={'message': 'success'},
+            status=201
+        )
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=8, latency_tolerance=1000)
+        client = BrazeClient(
+            api_key='api_key',
+            api_url=self.BRAZE_URL,
+            app_id='app_id',
+            concurrency_limiter=limiter,
+        )
+
+        client.track_user(attributes=[{'external_id': str(i)} for i in range(75 * 8)])
+        assert len(responses.calls) == 8
+        assert limiter.limit > 4
+        assert limiter.baseline_latency_s(BrazeAPIEndpoints.TRACK_USER) is not None
+
+        responses.replace(responses.POST, self.USERS_TRACK_URL, json={'message': 'error'}, status=429)
+        with self.assertRaises(BrazeRateLimitError):
+            client.track_user(attributes=[{'external_id': '1'}])
+        assert limiter.limit <= 3
+
     @ddt.data(
         {'emails': [], 'alias_label': 'alias_label'},
         {'emails': ['test@example.com'], 'alias_label': ''},
@@ -427,6 +571,153 @@ class BrazeClientTests(TestCase):
         assert len(new_alias_calls) == create_alias_num_batches
         assert len(track_user_calls) == track_user_num_batches
 
+    @ddt.data(False, True)
+    @responses.activate
+    def test_create_braze_alias_skips_known_aliases(self, pipelined):
+        """
+        Tests that aliases created or resolved by an earlier call are not looked up or created again.
+        """
+        responses.add(
+            responses.POST,
+            self.EXPORT_ID_URL,
+            json={'users': [{'external_id': '1', 'email': 'test-1@example.com'}], 'message': 'success'},
+            status=201
+        )
+        responses.add(
+            responses.POST,
+            self.NEW_ALIAS_URL,
+            json={'message': 'success'},
+            status=201
+        )
+        responses.add(
+            responses.POST,
+            self.USERS_TRACK_URL,
+            json={'message': 'success'},
+            status=201
+        )
+        client = BrazeClient(
+            api_key='api_key',
+            api_url=self.BRAZE_URL,
+            app_id='app_id',
+            alias_index=AliasIndex(),
+        )
+
+        client.get_braze_external_id_batch(['test-1@example.com'], 'alias_label')
+        client.create_braze_alias(
+            emails=['test-1@example.com', 'test-2@example.com'],
+            alias_label='alias_label',
+            pipelined=pipelined,
+        )
+        alias_data = json.loads(responses.calls[2].request.body)
+        assert [alias['alias_name'] for alias in alias_data['user_aliases']] == ['test-2@example.com']
+        assert len(responses.calls) == 4
+
+        client.create_braze_alias(
+            emails=['test-1@example.com', 'test-2@example.com'],
+            alias_label='alias_label',
+            pipelined=pipelined,
+        )
+        assert len(responses.calls) == 4
+
+    @responses.activate
+    def test_create_braze_alias_pipelined(self):
+        """
+        Tests that the pipelined mode looks up, aliases and tracks every email in full batches.
+        """
+        existing_email = 'test-3@example.com'
+        responses.add(
+            responses.POST,
+            self.EXPORT_ID_URL,
+            json={'users': [{'external_id': '3', 'email': existing_email}], 'message': 'success'},
+            status=201
+        )
+        responses.add(
+            responses.POST,
+            self.NEW_ALIAS_URL,
+            json={'message': 'success'},
+            status=201
+        )
+        responses.add(
+            responses.POST,
+            self.USERS_TRACK_URL,
+            json={'message': 'success'},
+            status=201
+        )
+
+        emails = [f'test-{i}@example.com' for i in range(160)]
+        extra_attributes = [{'external_id': '1', 'attribute': 'value'}]
+        self.client.create_braze_alias(
+            emails=emails,
+            alias_label='alias_label',
+            attributes=extra_attributes,
+            pipelined=True,
+        )
+
+        export_id_calls = [call for call in responses.calls if call.request.url == self.EXPORT_ID_URL]
+        new_alias_calls = [call for call in responses.calls if call.request.url == self.NEW_ALIAS_URL]
+        track_user_calls = [call for call in responses.calls if call.request.url == self.USERS_TRACK_URL]
+        assert len(export_id_calls) == math.ceil(len(emails) / GET_EXTERNAL_IDS_CHUNK_SIZE)
+        assert len(new_alias_calls) == math.ceil(len(emails) / 50)
+        assert len(track_user_calls) == math.ceil((len(emails) + len(extra_attributes)) / 75)
+
+        user_aliases = [
+            alias
+            for call in new_alias_calls
+            for alias in json.loads(call.request.body)['user_aliases']
+        ]
+        assert sorted(alias['alias_name'] for alias in user_aliases) == sorted(emails)
+        assert [alias['external_id'] for alias in user_aliases if 'external_id' in alias] == ['3']
+
+        tracked_attributes = [
+            attribute
+            for call in track_user_calls
+            for attribute in json.loads(call.request.body)['attributes']
+        ]
+        assert extra_attributes[0] in tracked_attributes
+        assert sorted(attribute['email'] for attribute in tracked_attributes if 'email' in attribute) == sorted(emails)
+
+    @responses.activate
+    def test_create_braze_alias_pipelined_overlaps_tracking(self):
+        """
+        Tests that the pipelined mode starts tracking before every chunk has been looked up and aliased.
+        """
+        responses.add(responses.POST, self.EXPORT_ID_URL, json={'users': [], 'message': 'success'}, status=201)
+        responses.add(responses.POST, self.NEW_ALIAS_URL, json={'message': 'success'}, status=201)
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'success'}, status=201)
+        endpoints = []
+        self.client.register_hook(HOOK_BEFORE_SEND, lambda endpoint, *args: endpoints.append(endpoint))
+
+        self.client.create_braze_alias(
+            emails=[f'test-{i}@example.com' for i in range(1000)],
+            alias_label='alias_label',
+            pipelined=True,
+        )
+
+        last_lookup = max(index for index, endpoint in enumerate(endpoints) if endpoint == BrazeAPIEndpoints.EXPORT_IDS)
+        assert endpoints.index(BrazeAPIEndpoints.TRACK_USER) < last_lookup
+
+    @responses.activate
+    def test_create_braze_alias_pipelined_error(self):
+        """
+        Tests that an error in any stage of the pipelined mode is raised to the caller.
+        """
+        responses.add(
+            responses.POST,
+            self.EXPORT_ID_URL,
+            json={'users': [], 'message': 'success'},
+            status=201
+        )
+        self._mock_braze_error_response(url=self.NEW_ALIAS_URL, status=400)
+
+        with self.assertRaises(BrazeBadRequestError):
+            self.client.create_braze_alias(
+                emails=[f'test-{i}@example.com' for i in range(101)],
+                alias_label='alias_label',
+                pipelined=True,
+            )
+
+        assert not [call for call in responses.calls if call.request.url == self.USERS_TRACK_URL]
+
     @ddt.data(
         {'emails': [], 'subject': 'subject', 'body': 'body', 'from_email': 'support@email.com'},
         {'emails': ['test@example.com'], 'subject': '', 'body': 'body', 'from_email': 'support@email.com'},
@@ -595,6 +886,99 @@ class BrazeClientTests(TestCase):
                 canvas_id='canvas_id'
             )
 
+    @responses.activate
+    def test_schedule_campaign_message(self):
+        """
+        Tests that recipients are scheduled in chunks of 50, at the same time and with the same properties.
+        """
+        responses.add(
+            responses.POST,
+            self.CAMPAIGN_SCHEDULE_URL,
+            json={'dispatch_id': 'dispatch_id', 'schedule_id': 'schedule_id', 'message': 'success'},
+            status=201
+        )
+        recipients = [{'external_user_id': str(i)} for i in range(120)]
+        send_at = datetime.datetime(2030, 1, 1, 9, tzinfo=datetime.timezone.utc)
+
+        results = self.client.schedule_campaign_message(
+            'campaign_id', send_at, recipients=recipients, trigger_properties={'course': 'Demo'}, in_local_time=True
+        )
+
+        assert [result['schedule_id'] for result in results] == ['schedule_id'] * 3
+        payloads = [json.loads(call.request.body) for call in responses.calls]
+        assert sorted(len(payload['recipients']) for payload in payloads) == [20, 50, 50]
+        assert sorted(
+            recipient['external_user_id'] for payload in payloads for recipient in payload['recipients']
+        ) == sorted(str(i) for i in range(120))
+        for payload in payloads:
+            assert payload['campaign_id'] == 'campaign_id'
+            assert payload['trigger_properties'] == {'course': 'Demo'}
+            assert payload['schedule'] == {
+                'time': '2030-01-01T09:00:00+00:00', 'in_local_time': True, 'at_optimal_time': False,
+            }
+
+    @responses.activate
+    def test_schedule_message_failed_request(self):
+        """
+        Tests that a failed request is reported as its outcome, keeping the schedule_ids of the accepted ones.
+        """
+        def schedule_callback(request):
+            recipients = json.loads(request.body)['recipients']
+            if {'external_user_id': '60'} in recipients:
+                return 500, {}, json.dumps({'message': 'error'})
+            return 201, {}, json.dumps({'schedule_id': recipients[0]['external_user_id'], 'message': 'success'})
+
+        responses.add_callback(responses.POST, self.CAMPAIGN_SCHEDULE_URL, callback=schedule_callback)
+        recipients = [{'external_user_id': str(i)} for i in range(120)]
+        send_at = datetime.datetime(2030, 1, 1, 9, tzinfo=datetime.timezone.utc)
+
+        with self.assertLogs('braze.client', level='WARNING'):
+            outcomes = self.client.schedule_campaign_message('campaign_id', send_at, recipients=recipients)
+
+        assert outcomes[0]['schedule_id'] == '0'
+        assert isinstance(outcomes[1], BrazeInternalServerError)
+        assert outcomes[2]['schedule_id'] == '100'
+
+    @responses.activate
+    def test_schedule_canvas_message(self):
+        """
+        Tests that emails are resolved to recipients and scheduled through /canvas/trigger/schedule/create.
+        """
+        responses.add(
+            responses.POST,
+            self.CANVAS_SCHEDULE_URL,
+            json={'dispatch_id': 'dispatch_id', 'schedule_id': 'schedule_id', 'message': 'success'},
+            status=201
+        )
+        responses.add(
+            responses.POST,
+            self.EXPORT_ID_URL,
+            json={'users': [{'external_id': '1'}], 'message': 'success'},
+            status=201
+        )
+
+        results = self.client.schedule_canvas_message('canvas_id', '2030-01-01T09:00:00Z', emails=['test@example.com'])
+
+        assert len(results) == 1
+        payload = json.loads(responses.calls[1].request.body)
+        assert payload['canvas_id'] == 'canvas_id'
+        assert payload['recipients'] == [{'external_user_id': '1'}]
+        assert payload['schedule']['time'] == '2030-01-01T09:00:00Z'
+
+    @ddt.data(
+        {'send_at': '2030-01-01T09:00:00Z'},
+        {'send_at': '', 'recipients': [{'external_user_id': '1'}]},
+        {'send_at': datetime.datetime(2030, 1, 1), 'recipients': [{'external_user_id': '1'}]},
+    )
+    def test_schedule_message_bad_args(self, kwargs):
+        """
+        Tests that schedules without recipients, a time or a timezone are refused.
+        """
+        with self.assertRaises(BrazeClientError):
+            self.client.schedule_campaign_message('campaign_id', **kwargs)
+        with self.assertRaises(BrazeClientError):
+            self.client.schedule_canvas_message('canvas_id', **kwargs)
+
     @responses.activate
     def test_braze_bad_request_error(self):
         """
@@ -919,3 +1303,95 @@ class BrazeClientTests(TestCase):
         self.assertEqual(expected_calls[0].request.url, url_1)
         self.assertEqual(expected_calls[1].request.url, url_2)
         self.assertEqual(expected_calls[2].request.url, url_3)
+
+    @responses.activate
+    def test_delete_users(self):
+        """
+        Tests that users are deduplicated and deleted in concurrent chunks of 50 mixing identifier kinds.
+        """
+        responses.add(responses.POST, self.DELETE_USERS_URL, json={'deleted': 50, 'message': 'success'}, status=201)
+        alias_index = AliasIndex()
+        alias_index.add('Enterprise', ['test0@example.com', 'other@example.com'])
+        client = BrazeClient(api_key='api_key', api_url=self.BRAZE_URL, app_id='app_id', alias_index=alias_index)
+        external_ids = [str(i) for i in range(80)] + ['0']
+        user_aliases = [{'alias_label': 'Enterprise', 'alias_name': f'test{i}@example.com'} for i in range(30)]
+
+        outcomes = client.delete_users(external_ids=iter(external_ids), user_aliases=user_aliases)
+
+        self.assertEqual(len(outcomes), 110)
+        self.assertEqual(set(outcomes.values()), {DELETE_OUTCOME_DELETED})
+        self.assertEqual(outcomes[('Enterprise', 'test0@example.com')], DELETE_OUTCOME_DELETED)
+        payloads = sorted((json.loads(call.request.body) for call in responses.calls), key=len)
+        self.assertEqual(len(payloads), 3)
+        self.assertEqual(sum(len(payload.get('external_ids', [])) for payload in payloads), 80)
+        self.assertEqual(sum(len(payload.get('user_aliases', [])) for payload in payloads), 30)
+        self.assertTrue(all(sum(map(len, payload.values())) <= 50 for payload in payloads))
+        self.assertNotIn(('Enterprise', 'test0@example.com'), alias_index)
+        self.assertIn(('Enterprise', 'other@example.com'), alias_index)
+
+    @responses.activate
+    def test_delete_users_failed_chunk(self):
+        """
+        Tests that a failed chunk reports its error for its users without stopping the others.
+        """
+        responses.add(responses.POST, self.DELETE_USERS_URL, json={'deleted': 50, 'message': 'success'}, status=201)
+        responses.add(responses.POST, self.DELETE_USERS_URL, json={'message': 'error'}, status=500)
+        client = BrazeClient(api_key='api_key', api_url=self.BRAZE_URL, app_id='app_id', max_workers=1)
+
+        outcomes = client.delete_users(external_ids=[str(i) for i in range(60)])
+
+        self.assertEqual(outcomes['0'], DELETE_OUTCOME_DELETED)
+        self.assertIsInstance(outcomes['59'], BrazeInternalServerError)
+
+    def test_delete_users_bad_args(self):
+        """
+        Tests that users to delete are required.
+        """
+        with self.assertRaises(BrazeClientError):
+            self.client.delete_users(external_ids=[], user_aliases=[])
+
+    @responses.activate
+    def test_set_subscription_status(self):
+        """
+        Tests that updates are grouped by group, state and identifier kind in chunks of 50, the last update winning.
+        """
+        responses.add(responses.POST, self.SET_SUBSCRIPTION_STATUS_URL, json={'message': 'success'}, status=201)
+        updates = [
+            {'subscription_group_id': 'group_a', 'subscription_state': 'subscribed', 'external_id': str(i)}
+            for i in range(70)
+        ]
+        updates += [
+            {'subscription_group_id': 'group_a', 'subscription_state': 'unsubscribed', 'external_id': '0'},
+            {'subscription_group_id': 'group_a', 'subscription_state': 'subscribed', 'email': 'test@example.com'},
+            {'subscription_group_id': 'group_b', 'subscription_state': 'subscribed', 'external_id': '1'},
+        ]
+
+        self.client.set_subscription_status(iter(updates))
+
+        payloads = sorted(
+            (json.loads(call.request.body) for call in responses.calls),
+            key=lambda payload: json.dumps(payload, sort_keys=True),
+        )
+        self.assertEqual(payloads, sorted([
+            {'subscription_group_id': 'group_a', 'subscription_state': 'subscribed',
+             'external_id': [str(i) for i in range(1, 51)]},
+            {'subscription_group_id': 'group_a', 'subscription_state': 'subscribed',
+             'external_id': [str(i) for i in range(51, 70)]},
+            {'subscription_group_id': 'group_a', 'subscription_state': 'unsubscribed', 'external_id': ['0']},
+            {'subscription_group_id': 'group_a', 'subscription_state': 'subscribed', 'email': ['test@example.com']},
+            {'subscription_group_id': 'group_b', 'subscription_state': 'subscribed', 'external_id': ['1']},
+        ], key=lambda payload: json.dumps(payload, sort_keys=True)))
+
+    @ddt.data(
+        [],
+        [{'subscription_state': 'subscribed', 'external_id': '1'}],
+        [{'subscription_group_id': 'group', 'subscription_state': 'pending', 'external_id': '1'}],
+        [{'subscription_group_id': 'group', 'subscription_state': 'subscribed'}],
+        [{'subscription_group_id': 'group', 'subscription_state': 'subscribed', 'external_id': '1', 'email': 'e'}],
+    )
+    def test_set_subscription_status_bad_args(self, updates):
+        """
+        Tests that updates without a single identifier, a group or a valid state are refused.
+        """
+        with self.assertRaises(BrazeClientError):
+            self.client.set_subscription_status(updates)
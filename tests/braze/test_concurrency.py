@@ -0,0 +1,249 @@
+"""
+Tests for the Braze client concurrency primitives.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+
+from braze.concurrency import AdaptiveConcurrencyLimiter, MicroBatcher, SingleFlight
+from braze.exceptions import BrazeRateLimitError
+
+
+class SingleFlightTests(TestCase):
+    """
+    Tests for SingleFlight.
+    """
+
+    def test_concurrent_calls_are_shared(self):
+        """
+        Tests that concurrent calls for the same key run once and share the result.
+        """
+        single_flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def slow_lookup(key):
+            calls.append(key)
+            release.wait(1)
+            return key.upper()
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(single_flight.do, 'key', slow_lookup, 'key') for _ in range(5)]
+            time.sleep(0.05)
+            release.set()
+            results = [future.result() for future in futures]
+
+        assert results == ['KEY'] * 5
+        assert calls == ['key']
+        assert single_flight.do('key', slow_lookup, 'key') == 'KEY'
+        assert len(calls) == 2
+
+    def test_error_is_shared(self):
+        """
+        Tests that waiters receive the exception raised by the shared call.
+        """
+        single_flight = SingleFlight()
+        release = threading.Event()
+
+        def failing_lookup():
+            release.wait(1)
+            raise ValueError('lookup failed')
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(single_flight.do, 'key', failing_lookup) for _ in range(3)]
+            time.sleep(0.05)
+            release.set()
+            for future in futures:
+                with self.assertRaises(ValueError):
+                    future.result()
+
+
+class MicroBatcherTests(TestCase):
+    """
+    Tests for MicroBatcher.
+    """
+
+    def test_concurrent_keys_are_batched(self):
+        """
+        Tests that keys submitted within the window are resolved together.
+        """
+        batches = []
+
+        def resolve_batch(keys):
+            batches.append(sorted(keys))
+            return {key: key * 2 for key in keys if key != 3}
+
+        micro_batcher = MicroBatcher(resolve_batch, max_batch_size=50, window_s=0.1)
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            results = list(executor.map(micro_batcher.submit, [1, 2, 3, 4, 4, 5]))
+
+        assert results == [2, 4, None, 8, 8, 10]
+        assert batches == [[1, 2, 3, 4, 5]]
+
+    def test_full_batch_is_resolved_early(self):
+        """
+        Tests that a batch reaching its maximum size is resolved without waiting out the window.
+        """
+        batches = []
+
+        def resolve_batch(keys):
+            batches.append(sorted(keys))
+            return {key: key for key in keys}
+
+        micro_batcher = MicroBatcher(resolve_batch, max_batch_size=2, window_s=5)
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(micro_batcher.submit, [1, 2, 3, 4]))
+
+        assert results == [1, 2, 3, 4]
+        assert sorted(batches) == [[1, 2], [3, 4]]
+        assert time.monotonic() - start < 5
+
+    def test_error_is_shared(self):
+        """
+        Tests that every caller in a batch receives the error raised while resolving it.
+        """
+        def resolve_batch(keys):
+            raise ValueError(keys)
+
+        micro_batcher = MicroBatcher(resolve_batch, max_batch_size=50, window_s=0.05)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(micro_batcher.submit, key) for key in (1, 2)]
+            for future in futures:
+                with self.assertRaises(ValueError):
+                    future.result()
+
+
+class AdaptiveConcurrencyLimiterTests(TestCase):
+    """
+    Tests for AdaptiveConcurrencyLimiter.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.clock_s = 0.0
+
+    def test_additive_increase(self):
+        """
+        Tests that the limit grows by about one per window of successful calls, up to the maximum.
+        """
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=4, latency_tolerance=1000)
+
+        for _ in range(3):
+            limiter.run(lambda: None)
+        assert limiter.limit == 3
+
+        for _ in range(20):
+            limiter.run(lambda: None)
+        assert limiter.limit == 4
+
+    def test_rate_limit_backoff(self):
+        """
+        Tests that a rate limit error halves the limit once for calls started before the decrease.
+        """
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=8)
+
+        def rate_limited():
+            raise BrazeRateLimitError(0)
+
+        with self.assertRaises(BrazeRateLimitError):
+            limiter.run(rate_limited)
+        assert limiter.limit == 4
+
+        release = threading.Event()
+
+        def slow_rate_limited():
+            release.wait(1)
+            rate_limited()
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(limiter.run, slow_rate_limited) for _ in range(3)]
+            time.sleep(0.05)
+            release.set()
+            for future in futures:
+                with self.assertRaises(BrazeRateLimitError):
+                    future.result()
+        assert limiter.limit == 2
+
+        for _ in range(10):
+            with self.assertRaises(BrazeRateLimitError):
+                limiter.run(rate_limited)
+        assert limiter.limit == 1
+
+    def test_latency_backoff(self):
+        """
+        Tests that a call much slower than the baseline latency decreases the limit.
+        """
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, latency_tolerance=2.0)
+        limiter.run(time.sleep, 0.01)
+        limit = limiter.limit
+
+        limiter.run(time.sleep, 0.1)
+
+        assert limiter.limit == limit // 2
+
+    def _run_timed(self, limiter, latency_s, latency_key=None):
+        """
+        Run a call that takes ``latency_s`` on the limiter's clock, mocked by the test.
+        """
+        def call():
+            self.clock_s += latency_s
+
+        limiter.run(call, latency_key=latency_key)
+
+    def _mock_clock(self):
+        patcher = mock.patch('braze.concurrency.time.monotonic', side_effect=lambda: self.clock_s)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_baseline_follows_sustained_latency(self):
+        """
+        Tests that a latency that shifts and stays there becomes the baseline, letting the limit grow again.
+        """
+        self._mock_clock()
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=16, latency_tolerance=2.0)
+        for _ in range(20):
+            self._run_timed(limiter, 0.001)
+
+        for _ in range(200):
+            self._run_timed(limiter, 0.01)
+
+        assert limiter.baseline_latency_s() > 0.005
+        assert limiter.limit == 16
+
+    def test_baselines_per_latency_key(self):
+        """
+        Tests that calls are compared with the baseline of their own key, e.g. their endpoint.
+        """
+        self._mock_clock()
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=4, latency_tolerance=2.0)
+        for _ in range(10):
+            self._run_timed(limiter, 0.001, latency_key='export')
+            self._run_timed(limiter, 0.1, latency_key='track')
+
+        assert limiter.limit == 4
+        self.assertAlmostEqual(limiter.baseline_latency_s('export'), 0.001)
+        self.assertAlmostEqual(limiter.baseline_latency_s('track'), 0.1)
+
+    def test_limit_is_enforced(self):
+        """
+        Tests that no more than ``limit`` calls run at once.
+        """
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def call():
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.pop()
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(lambda _: limiter.run(call), range(6)))
+
+        assert max(peak) == 2
@@ -0,0 +1,178 @@
+"""
+Tests for the Braze dead-letter store.
+"""
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import responses
+
+from braze.client import BrazeClient
+from braze.constants import BrazeAPIEndpoints
+from braze.dead_letter import DeadLetterStore, batch_items, with_batch_items
+from braze.exceptions import BrazeBadRequestError
+from braze.metrics import InMemoryMetricsSink
+
+
+class DeadLetterStoreTests(TestCase):
+    """
+    Tests for DeadLetterStore and the client's use of it.
+    """
+    BRAZE_URL = 'http://braze-api-url.com'
+    USERS_TRACK_URL = BRAZE_URL + BrazeAPIEndpoints.TRACK_USER
+    BAD_EXTERNAL_IDS = ('bad-1', 'bad-2')
+
+    def setUp(self):
+        super().setUp()
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.store = DeadLetterStore(os.path.join(temp_dir.name, 'dead_letters.db'))
+        self.addCleanup(self.store.close)
+        self.metrics_sink = InMemoryMetricsSink()
+        self.client = BrazeClient(
+            api_key='api_key',
+            api_url=self.BRAZE_URL,
+            app_id='app_id',
+            dead_letter_store=self.store,
+            metrics_sink=self.metrics_sink,
+        )
+
+    def _track_user_callback(self, request):
+        """
+        Reject any request containing one of the bad records.
+        """
+        payload = json.loads(request.body)
+        external_ids = {item['external_id'] for key in ('attributes', 'events') for item in payload.get(key, [])}
+        if external_ids.intersection(self.BAD_EXTERNAL_IDS):
+            return 400, {}, json.dumps({'message': 'invalid attribute'})
+        return 201, {}, json.dumps({'message': 'success'})
+
+    def test_batch_items(self):
+        """
+        Tests that payload records are split and recombined with the other fields.
+        """
+        payload = {'attributes': [{'a': 1}, {'a': 2}], 'events': [{'e': 1}], 'fields_to_export': ['email']}
+
+        items = batch_items(payload)
+
+        assert items == [('attributes', {'a': 1}), ('attributes', {'a': 2}), ('events', {'e': 1})]
+        assert with_batch_items(payload, items[1:]) == {
+            'attributes': [{'a': 2}], 'events': [{'e': 1}], 'fields_to_export': ['email']
+        }
+
+    def test_batch_items_single_user(self):
+        """
+        Tests that a single user held by a records key is kept as a field rather than split.
+        """
+        payload = {'email': 'test@example.com', 'subscription_state': 'unsubscribed'}
+
+        assert not batch_items(payload)
+        assert with_batch_items(payload, []) == payload
+
+    @responses.activate
+    def test_bad_chunk_is_stored(self):
+        """
+        Tests that a rejected chunk is stored while the remaining chunks are still sent.
+        """
+        responses.add_callback(responses.POST, self.USERS_TRACK_URL, callback=self._track_user_callback)
+        attributes = [{'external_id': str(i)} for i in range(150)]
+        attributes[10] = {'external_id': 'bad-1'}
+
+        self.client.track_user(attributes=attributes)
+
+        assert len(responses.calls) == 2
+        dead_letters = self.store.entries()
+        assert len(dead_letters) == 1
+        assert dead_letters[0].endpoint == BrazeAPIEndpoints.TRACK_USER
+        assert dead_letters[0].payload == {'attributes': attributes[:75]}
+        assert 'invalid attribute' in dead_letters[0].error
+
+    @responses.activate
+    def test_bad_request_raised_without_store(self):
+        """
+        Tests that bad requests are still raised by clients without a dead-letter store.
+        """
+        responses.add_callback(responses.POST, self.USERS_TRACK_URL, callback=self._track_user_callback)
+        client = BrazeClient(api_key='api_key', api_url=self.BRAZE_URL, app_id='app_id')
+
+        with self.assertRaises(BrazeBadRequestError):
+            client.track_user(attributes=[{'external_id': 'bad-1'}])
+
+    @responses.activate
+    def test_reprocess_bisects(self):
+        """
+        Tests that reprocessing isolates the rejected records and resubmits the others.
+        """
+        responses.add_callback(responses.POST, self.USERS_TRACK_URL, callback=self._track_user_callback)
+        attributes = [{'external_id': str(i)} for i in range(75)]
+        attributes[3] = {'external_id': 'bad-1'}
+        events = [{'external_id': 'bad-2', 'name': 'event'}, {'external_id': '1', 'name': 'event'}]
+        self.store.add(BrazeAPIEndpoints.TRACK_USER, 'post', {'attributes': attributes, 'events': events}, 'error')
+
+        summary = self.store.reprocess(self.client)
+
+        assert summary == {'reprocessed': 1, 'resubmitted': 75, 'isolated': 2}
+        accepted_ids = [
+            item['external_id']
+            for call in responses.calls
+            if call.response.status_code == 201
+            for key in ('attributes', 'events')
+            for item in json.loads(call.request.body).get(key, [])
+        ]
+        assert len(accepted_ids) == 75
+        assert not set(accepted_ids).intersection(self.BAD_EXTERNAL_IDS)
+        isolated = self.store.entries()
+        assert [dead_letter.payload for dead_letter in isolated] == [
+            {'attributes': [{'external_id': 'bad-1'}]},
+            {'events': [events[0]]},
+        ]
+        assert all(dead_letter.isolated for dead_letter in isolated)
+        assert self.metrics_sink.snapshot()[BrazeAPIEndpoints.TRACK_USER]['retries'] == len(responses.calls)
+
+        assert self.store.reprocess(self.client)['reprocessed'] == 0
+
+    @responses.activate
+    def test_reprocess_bisects_delete_users(self):
+        """
+        Tests that reprocessing a delete users request isolates the rejected external id.
+        """
+        def delete_users_callback(request):
+            if 'bad-1' in json.loads(request.body)['external_ids']:
+                return 400, {}, json.dumps({'message': 'invalid external id'})
+            return 201, {}, json.dumps({'deleted': 1, 'message': 'success'})
+
+        responses.add_callback(responses.POST, self.BRAZE_URL + BrazeAPIEndpoints.DELETE_USERS, delete_users_callback)
+        self.client.delete_users(external_ids=[str(i) for i in range(49)] + ['bad-1'])
+        assert len(self.store.entries()) == 1
+
+        summary = self.store.reprocess(self.client)
+
+        assert summary == {'reprocessed': 1, 'resubmitted': 49, 'isolated': 1}
+        assert [dead_letter.payload for dead_letter in self.store.entries()] == [{'external_ids': ['bad-1']}]
+
+    @responses.activate
+    def test_reprocess_bisects_subscription_status(self):
+        """
+        Tests that reprocessing a subscription status request isolates the rejected user.
+        """
+        def subscription_status_callback(request):
+            if 'bad@example.com' in json.loads(request.body)['email']:
+                return 400, {}, json.dumps({'message': 'invalid email'})
+            return 201, {}, json.dumps({'message': 'success'})
+
+        responses.add_callback(
+            responses.POST, self.BRAZE_URL + BrazeAPIEndpoints.SET_SUBSCRIPTION_STATUS, subscription_status_callback
+        )
+        emails = [f'test-{i}@example.com' for i in range(49)] + ['bad@example.com']
+        self.client.set_subscription_status([
+            {'subscription_group_id': 'group', 'subscription_state': 'subscribed', 'email': email} for email in emails
+        ])
+        assert len(self.store.entries()) == 1
+
+        summary = self.store.reprocess(self.client)
+
+        assert summary == {'reprocessed': 1, 'resubmitted': 49, 'isolated': 1}
+        assert [dead_letter.payload for dead_letter in self.store.entries()] == [
+            {'subscription_group_id': 'group', 'subscription_state': 'subscribed', 'email': ['bad@example.com']},
+        ]
@@ -0,0 +1,236 @@
+"""
+Tests for the fake Braze server.
+"""
+from unittest import TestCase
+
+import requests
+
+from braze.catalog import CatalogSnapshot
+from braze.client import BrazeClient
+from braze.constants import BrazeAPIEndpoints
+from braze.exceptions import BrazeInternalServerError, BrazeRateLimitError, BrazeUnauthorizedError
+from braze.fake_server import FakeBrazeServer
+
+
+class FakeBrazeServerTests(TestCase):
+    """
+    Tests for FakeBrazeServer, driven through the Braze client.
+    """
+
+    def _start_server(self, **kwargs):
+        server = FakeBrazeServer(**kwargs).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def _get_braze_client(self, server, api_key='api_key'):
+        return BrazeClient(api_key=api_key, api_url=server.url, app_id='app_id')
+
+    def test_alias_and_identify_round_trip(self):
+        """
+        Tests that users aliased and identified through the server can be exported back.
+        """
+        server = self._start_server()
+        client = self._get_braze_client(server)
+        emails = ['test1@example.com', 'test2@example.com']
+
+        client.create_braze_alias(emails, 'Enterprise')
+        self.assertEqual(client.get_braze_external_id_batch(emails, 'Enterprise'), {})
+
+        client.create_recipients('Enterprise', {'test1@example.com': 1})
+        client.track_user(attributes=[{'external_id': '1', 'email': 'test1@example.com'}])
+
+        self.assertEqual(client.get_braze_external_id('test1@example.com'), '1')
+        self.assertEqual(client.get_braze_external_id_batch(emails, 'Enterprise'), {'test1@example.com': '1'})
+
+    def test_send_and_unsubscribe_endpoints(self):
+        """
+        Tests the campaign, canvas, message and email subscription endpoints.
+        """
+        server = self._start_server()
+        client = self._get_braze_client(server)
+
+        recipients = [{'external_user_id': '1'}]
+        client.track_user(attributes=[{'external_id': '1', 'email': 'test@example.com'}])
+
+        self.assertIn('dispatch_id', client.send_campaign_message('campaign_id', recipients=recipients))
+        self.assertIn('dispatch_id', client.send_canvas_message('canvas_id', recipients=recipients))
+        self.assertIn('dispatch_id', client.send_email(['test@example.com'], 'subject', 'body', 'from@example.com'))
+
+        client.unsubscribe_user_email('test@example.com')
+        self.assertEqual(
+            client.retrieve_unsubscribed_emails('2001-01-01', '2002-02-02'),
+            ['test@example.com'],
+        )
+
+    def test_unknown_endpoint(self):
+        """
+        Tests that paths outside BrazeAPIEndpoints are answered with a 404.
+        """
+        server = self._start_server()
+        response = requests.post(server.url + '/unknown', json={}, timeout=2)
+        self.assertEqual(response.status_code, 404)
+
+    def test_unauthorized(self):
+        """
+        Tests that requests with another API key are answered with a 401.
+        """
+        server = self._start_server(api_key='api_key')
+        client = self._get_braze_client(server, api_key='wrong_key')
+        with self.assertRaises(BrazeUnauthorizedError):
+            client.track_user(attributes=[{'external_id': '1'}])
+
+    def test_rate_limit(self):
+        """
+        Tests that the rate limit is reported in the response headers and enforced with 429s.
+        """
+        server = self._start_server(rate_limit=2)
+        client = self._get_braze_client(server)
+
+        client.track_user(attributes=[{'external_id': '1'}])
+        self.assertEqual(client.rate_limit_budget(BrazeAPIEndpoints.TRACK_USER).remaining, 1)
+        client.track_user(attributes=[{'external_id': '1'}])
+        with self.assertRaises(BrazeRateLimitError):
+            client.track_user(attributes=[{'external_id': '1'}])
+
+        # Each endpoint has its own limit.
+        client.get_braze_external_id('test@example.com')
+        self.assertEqual(server.stats()['statuses'], {201: 3, 429: 1})
+
+    def test_error_rate(self):
+        """
+        Tests that an error rate of 1 fails every request with a 500.
+        """
+        server = self._start_server(error_rate=1)
+        client = self._get_braze_client(server)
+        with self.assertRaises(BrazeInternalServerError):
+            client.track_user(attributes=[{'external_id': '1'}])
+
+    def test_invalid_error_rate(self):
+        """
+        Tests that an error rate outside [0, 1] is refused.
+        """
+        with self.assertRaises(ValueError):
+            FakeBrazeServer(error_rate=2)
+
+    def test_stats(self):
+        """
+        Tests that the stats count requests, reused connections and concurrency.
+        """
+        server = self._start_server(latency_s=0.01)
+        client = self._get_braze_client(server)
+
+        client.create_recipients('Enterprise', {f'test{i}@example.com': i for i in range(200)})
+
+        stats = server.stats()
+        self.assertEqual(stats['requests'], {BrazeAPIEndpoints.IDENTIFY_USERS: 4})
+        self.assertLessEqual(stats['connections'], client.max_workers)
+        self.assertGreater(stats['max_in_flight'], 1)
+
+    def test_every_endpoint_is_routed(self):
+        """
+        Tests that the server answers every path in BrazeAPIEndpoints.
+        """
+        server = self._start_server()
+        endpoints = [value for name, value in vars(BrazeAPIEndpoints).items() if not name.startswith('_')]
+        for endpoint in endpoints:
+            self.assertTrue(
+                any(path == endpoint for _, path in server._routes),  # pylint: disable=protected-access
+                endpoint,
+            )
+
+    def test_delete_users(self):
+        """
+        Tests that deleted users can no longer be exported.
+        """
+        server = self._start_server()
+        client = self._get_braze_client(server)
+        client.track_user(attributes=[{'external_id': '1', 'email': 'test@example.com'}])
+
+        client.delete_users(external_ids=['1'])
+
+        self.assertIsNone(client.get_braze_external_id('test@example.com'))
+
+    def test_profile_indexes(self):
+        """
+        Tests that profiles stay findable by alias and email through identification and deletion.
+        """
+        server = self._start_server()
+        client = self._get_braze_client(server)
+        alias = {'alias_label': 'Enterprise', 'alias_name': 'test@example.com'}
+        client.create_braze_alias(['test@example.com'], 'Enterprise')
+        client.track_user(attributes=[{'user_alias': alias, 'email': 'test@example.com'}])
+
+        client.create_recipients('Enterprise', {'test@example.com': 1})
+
+        profile = server.state.find(external_id='1')
+        self.assertIs(server.state.find(user_alias=alias), profile)
+        self.assertIs(server.state.find(email='test@example.com'), profile)
+        self.assertEqual(len(server.state.profiles), 1)
+
+        client.delete_users(external_ids=['1'])
+
+        self.assertIsNone(server.state.find(user_alias=alias))
+        self.assertIsNone(server.state.find(email='test@example.com'))
+
+    def test_set_subscription_status(self):
+        """
+        Tests that subscription states are recorded by group and user.
+        """
+        server = self._start_server()
+        client = self._get_braze_client(server)
+
+        client.set_subscription_status([
+            {'subscription_group_id': 'group', 'subscription_state': 'subscribed', 'external_id': str(i)}
+            for i in range(60)
+        ])
+
+        self.assertEqual(len(server.state.subscriptions), 60)
+        self.assertEqual(server.state.subscriptions[('group', 'external_id', '59')], 'subscribed')
+
+    def test_sync_catalog(self):
+        """
+        Tests that synced catalog items are created, replaced and deleted on the server.
+        """
+        server = self._start_server()
+        client = self._get_braze_client(server)
+        items = [{'id': str(i), 'title': f'Course {i}'} for i in range(60)]
+        snapshot = CatalogSnapshot()
+        client.sync_catalog('courses', items, snapshot)
+        self.assertEqual(len(server.state.catalogs['courses']), 60)
+
+        client.sync_catalog('courses', [{'id': '0', 'title': 'Renamed'}] + items[2:], snapshot)
+
+        self.assertEqual(len(server.state.catalogs['courses']), 59)
+        self.assertEqual(server.state.catalogs['courses']['0'], {'id': '0', 'title': 'Renamed'})
+        self.assertNotIn('1', server.state.catalogs['courses'])
+
+    def test_sync_catalog_without_snapshot(self):
+        """
+        Tests that items already in the catalog are synced again once the snapshot is lost.
+        """
+        server = self._start_server()
+        client = self._get_braze_client(server)
+        items = [{'id': str(i), 'title': f'Course {i}'} for i in range(60)]
+        client.sync_catalog('courses', items, CatalogSnapshot())
+
+        items[0] = {'id': '0', 'title': 'Renamed'}
+        summary = client.sync_catalog('courses', items, CatalogSnapshot())
+
+        self.assertEqual(summary['created'], 60)
+        self.assertEqual(len(server.state.catalogs['courses']), 60)
+        self.assertEqual(server.state.catalogs['courses']['0'], {'id': '0', 'title': 'Renamed'})
+
+    def test_schedule_campaign_message(self):
+        """
+        Tests that scheduled recipients are recorded by schedule id.
+        """
+        server = self._start_server()
+        client = self._get_braze_client(server)
+        recipients = [{'external_user_id': str(i)} for i in range(60)]
+
+        results = client.schedule_campaign_message('campaign_id', '2030-01-01T09:00:00Z', recipients=recipients)
+
+        self.assertEqual(
+            sorted(len(server.state.schedules[result['schedule_id']]['recipients']) for result in results),
+            [10, 50],
+        )
@@ -0,0 +1,117 @@
+"""
+Tests for Braze client request lifecycle hooks.
+"""
+import json
+from unittest import TestCase
+
+import responses
+
+from braze.client import BrazeClient
+from braze.constants import BrazeAPIEndpoints
+from braze.exceptions import BrazeBadRequestError, BrazeClientError
+from braze.hooks import HOOK_AFTER_RESPONSE, HOOK_BEFORE_SEND, HOOK_ON_ERROR, ROOT_SPAN, SpanTimer
+
+
+class HooksTests(TestCase):
+    """
+    Tests for register_hook and SpanTimer.
+    """
+    BRAZE_URL = 'http://braze-api-url.com'
+    EXPORT_ID_URL = BRAZE_URL + BrazeAPIEndpoints.EXPORT_IDS
+    NEW_ALIAS_URL = BRAZE_URL + BrazeAPIEndpoints.NEW_ALIAS
+    USERS_IDENTIFY_URL = BRAZE_URL + BrazeAPIEndpoints.IDENTIFY_USERS
+    USERS_TRACK_URL = BRAZE_URL + BrazeAPIEndpoints.TRACK_USER
+
+    def setUp(self):
+        super().setUp()
+        self.client = BrazeClient(
+            api_key='api_key',
+            api_url=self.BRAZE_URL,
+            app_id='app_id',
+        )
+
+    @responses.activate
+    def test_hooks(self):
+        """
+        Tests that hooks are called with the serialized payload, the response and the timings.
+        """
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'success'}, status=201)
+        responses.add(responses.POST, self.EXPORT_ID_URL, json={'message': 'error'}, status=400)
+        events = []
+        self.client.register_hook(HOOK_BEFORE_SEND, lambda *args: events.append((HOOK_BEFORE_SEND, args)))
+        self.client.register_hook(HOOK_AFTER_RESPONSE, lambda *args: events.append((HOOK_AFTER_RESPONSE, args)))
+        self.client.register_hook(HOOK_ON_ERROR, lambda *args: events.append((HOOK_ON_ERROR, args)))
+
+        self.client.track_user(attributes=[{'external_id': '1'}])
+        with self.assertRaises(BrazeBadRequestError):
+            self.client.get_braze_external_id('test@example.com')
+
+        assert [event for event, _ in events] == [
+            HOOK_BEFORE_SEND, HOOK_AFTER_RESPONSE, HOOK_BEFORE_SEND, HOOK_ON_ERROR
+        ]
+        endpoint, request_type, payload = events[0][1]
+        assert (endpoint, request_type) == (BrazeAPIEndpoints.TRACK_USER, 'post')
+        assert json.loads(payload) == {'attributes': [{'external_id': '1'}]}
+        _, _, response, timings = events[1][1]
+        assert response.status_code == 201
+        assert timings.network_s > 0
+        assert timings.total_s >= timings.network_s
+        _, _, exception, _ = events[3][1]
+        assert isinstance(exception, BrazeBadRequestError)
+
+    @responses.activate
+    def test_failing_hook(self):
+        """
+        Tests that an exception raised by a hook does not affect the request.
+        """
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'success'}, status=201)
+
+        def failing_hook(*args):
+            raise ValueError(args)
+
+        self.client.register_hook(HOOK_BEFORE_SEND, failing_hook)
+
+        with self.assertLogs('braze.client', level='ERROR'):
+            self.client.track_user(attributes=[{'external_id': '1'}])
+
+        assert len(responses.calls) == 1
+
+    def test_unknown_hook(self):
+        """
+        Tests that hook events are validated.
+        """
+        with self.assertRaises(BrazeClientError):
+            self.client.register_hook('after_send', print)
+
+    @responses.activate
+    def test_span_timer(self):
+        """
+        Tests that requests, including those made from worker threads, are attributed to their span.
+        """
+        responses.add(responses.POST, self.EXPORT_ID_URL, json={'users': [], 'message': 'success'}, status=201)
+        responses.add(responses.POST, self.NEW_ALIAS_URL, json={'message': 'success'}, status=201)
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'success'}, status=201)
+        responses.add(responses.POST, self.USERS_IDENTIFY_URL, json={'message': 'error'}, status=400)
+        timer = SpanTimer().install(self.client)
+
+        with timer.span('import'):
+            with timer.span('aliases'):
+                self.client.create_braze_alias([f'{i}@example.com' for i in range(120)], 'alias_label')
+            self.client.track_user(attributes=[{'external_id': '1'}])
+        with self.assertRaises(BrazeBadRequestError):
+            self.client.identify_users([{'external_id': '1', 'user_alias': {'alias_label': 'a', 'alias_name': 'b'}}])
+
+        report = timer.report()
+        assert set(report) == {'import', 'import/aliases', ROOT_SPAN}
+        alias_endpoints = report['import/aliases']['endpoints']
+        assert alias_endpoints[BrazeAPIEndpoints.EXPORT_IDS]['requests'] == 3
+        assert alias_endpoints[BrazeAPIEndpoints.NEW_ALIAS]['requests'] == 3
+        assert alias_endpoints[BrazeAPIEndpoints.TRACK_USER]['requests'] == 2
+        assert report['import/aliases']['requests'] == 8
+        assert report['import/aliases']['network_s'] > 0
+        assert report['import']['requests'] == 1
+        assert report['import']['wall_s'] >= report['import/aliases']['wall_s']
+        assert report[ROOT_SPAN]['errors'] == 1
+
+        timer.reset()
+        assert not timer.report()
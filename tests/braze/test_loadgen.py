@@ -0,0 +1,77 @@
+"""
+Tests for the Braze load generator.
+"""
+import io
+import json
+from contextlib import redirect_stdout
+from unittest import TestCase
+
+from braze.client import BrazeClient
+from braze.fake_server import FakeBrazeServer
+from braze.loadgen import LatencyRecorder, main, parse_mix, percentile, run_load
+
+
+class LoadgenTests(TestCase):
+    """
+    Tests for the load generator.
+    """
+
+    def test_parse_mix(self):
+        """
+        Tests that a mix is parsed into weights, an operation without a weight weighing 1.
+        """
+        self.assertEqual(parse_mix('track=8, alias=1,export'), {'track': 8.0, 'alias': 1.0, 'export': 1.0})
+
+    def test_parse_mix_invalid(self):
+        """
+        Tests that unknown operations, negative weights and empty mixes are refused.
+        """
+        for mix in ('track,unknown', 'track=-1', 'track=0'):
+            with self.assertRaises(ValueError):
+                parse_mix(mix)
+
+    def test_percentile(self):
+        """
+        Tests the nearest-rank percentiles.
+        """
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3], 90), 3)
+        self.assertIsNone(percentile([], 50))
+
+    def test_run_load(self):
+        """
+        Tests that every record is processed and every request is reported.
+        """
+        server = FakeBrazeServer(rate_limit=5).start()
+        self.addCleanup(server.stop)
+        recorder = LatencyRecorder()
+        client = BrazeClient(api_key='api_key', api_url=server.url, app_id='app_id', metrics_sink=recorder)
+
+        report = run_load(
+            client, recorder, {'track': 1, 'send': 1}, records=1000, batch_size=100, concurrency=2, seed=1,
+        )
+
+        stats = server.stats()
+        self.assertEqual(report['requests'], sum(stats['requests'].values()))
+        self.assertEqual(report['status_codes'], {str(status): count for status, count in stats['statuses'].items()})
+        self.assertGreater(report['rate_limited_rate'], 0)
+        self.assertEqual(report['error_rate'], 0)
+        failed = sum(report['failed_batches'].values())
+        self.assertEqual(report['records'], 1000 - failed * 100)
+        self.assertEqual(set(report['latency_ms']), {'p50', 'p90', 'p99', 'max'})
+
+    def test_main(self):
+        """
+        Tests a run of the command line against an in-process fake server.
+        """
+        output = io.StringIO()
+        args = ['--fake', '--records', '200', '--batch-size', '50', '--mix', 'track,alias,export', '--json']
+        with redirect_stdout(output):
+            exit_code = main(args)
+
+        self.assertEqual(exit_code, 0)
+        report = json.loads(output.getvalue())
+        self.assertEqual(report['records'], 200)
+        self.assertEqual(report['failed_batches'], {})
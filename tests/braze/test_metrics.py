@@ -0,0 +1,112 @@
+"""
+Tests for Braze client request metrics.
+"""
+import logging
+from unittest import TestCase
+
+import requests
+import responses
+
+from braze.client import BrazeClient
+from braze.constants import BrazeAPIEndpoints
+from braze.exceptions import BrazeRateLimitError
+from braze.metrics import CallbackMetricsSink, InMemoryMetricsSink, LoggingMetricsSink, RequestMetric
+
+
+class MetricsTests(TestCase):
+    """
+    Tests for the metrics sinks.
+    """
+    BRAZE_URL = 'http://braze-api-url.com'
+    EXPORT_ID_URL = BRAZE_URL + BrazeAPIEndpoints.EXPORT_IDS
+    USERS_TRACK_URL = BRAZE_URL + BrazeAPIEndpoints.TRACK_USER
+
+    def _get_braze_client(self, metrics_sink):
+        return BrazeClient(
+            api_key='api_key',
+            api_url=self.BRAZE_URL,
+            app_id='app_id',
+            metrics_sink=metrics_sink,
+        )
+
+    @responses.activate
+    def test_in_memory_sink(self):
+        """
+        Tests that requests are aggregated per endpoint.
+        """
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'success'}, status=201)
+        responses.add(responses.POST, self.EXPORT_ID_URL, json={'message': 'error'}, status=429)
+        responses.add(responses.POST, self.EXPORT_ID_URL, body=requests.exceptions.ConnectionError())
+        metrics_sink = InMemoryMetricsSink()
+        client = self._get_braze_client(metrics_sink)
+
+        client.track_user(attributes=[{'external_id': str(i)} for i in range(100)])
+        with self.assertRaises(BrazeRateLimitError):
+            client.get_braze_external_id('test@example.com')
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.get_braze_external_id('test@example.com')
+
+        snapshot = metrics_sink.snapshot()
+        track_stats = snapshot[BrazeAPIEndpoints.TRACK_USER]
+        assert track_stats['count'] == 2
+        assert track_stats['status_classes'] == {'2xx': 2}
+        assert sum(track_stats['latency_histogram'].values()) == 2
+        assert track_stats['payload_bytes'] == sum(len(call.request.body) for call in responses.calls[:2])
+        assert track_stats['response_bytes'] == 2 * len(responses.calls[0].response.content)
+        export_stats = snapshot[BrazeAPIEndpoints.EXPORT_IDS]
+        assert export_stats['count'] == 2
+        assert export_stats['status_classes'] == {'4xx': 1, 'error': 1}
+        assert export_stats['rate_limited'] == 1
+        assert export_stats['retries'] == 0
+
+        metrics_sink.reset()
+        assert not metrics_sink.snapshot()
+
+    @responses.activate
+    def test_failing_sink(self):
+        """
+        Tests that a failing sink is logged without affecting the request or hiding its error.
+        """
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'success'}, status=201)
+        responses.add(responses.POST, self.EXPORT_ID_URL, json={'message': 'error'}, status=429)
+
+        def failing_callback(*measurement):
+            raise RuntimeError('statsd is down')
+
+        client = self._get_braze_client(CallbackMetricsSink(failing_callback))
+
+        with self.assertLogs('braze.client', level=logging.ERROR):
+            client.track_user(attributes=[{'external_id': '1'}])
+        with self.assertRaises(BrazeRateLimitError), self.assertLogs('braze.client', level=logging.ERROR):
+            client.get_braze_external_id('test@example.com')
+
+    def test_callback_sink(self):
+        """
+        Tests that measurements are forwarded with endpoint and status class tags.
+        """
+        measurements = []
+        metrics_sink = CallbackMetricsSink(lambda *measurement: measurements.append(measurement))
+
+        metrics_sink.record(RequestMetric(BrazeAPIEndpoints.TRACK_USER, 'post', 0.25, 100, 20, 429, 2))
+
+        tags = {'endpoint': BrazeAPIEndpoints.TRACK_USER, 'status_class': '4xx'}
+        assert measurements == [
+            ('braze.request.count', 1, 'counter', tags),
+            ('braze.request.latency_ms', 250.0, 'timing', tags),
+            ('braze.request.payload_bytes', 100, 'histogram', tags),
+            ('braze.request.response_bytes', 20, 'histogram', tags),
+            ('braze.request.retries', 1, 'counter', tags),
+            ('braze.request.rate_limited', 1, 'counter', tags),
+        ]
+
+    def test_logging_sink(self):
+        """
+        Tests that each request is logged.
+        """
+        metrics_sink = LoggingMetricsSink()
+
+        with self.assertLogs('braze.metrics', level=logging.INFO) as logs:
+            metrics_sink.record(RequestMetric(BrazeAPIEndpoints.TRACK_USER, 'post', 0.25, 100, 20, 201, 1))
+
+        assert '/users/track' in logs.output[0]
+        assert 'latency_ms=250.0' in logs.output[0]
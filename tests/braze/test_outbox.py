@@ -0,0 +1,263 @@
+"""
+Tests for the Braze outbox.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from unittest import TestCase
+
+import responses
+
+from braze.circuit_breaker import CircuitBreaker
+from braze.client import BrazeClient
+from braze.constants import BrazeAPIEndpoints
+from braze.exceptions import BrazeClientError
+from braze.outbox import BrazeOutbox, OutboxDrainer
+
+
+class OutboxTests(TestCase):
+    """
+    Tests for BrazeOutbox and OutboxDrainer.
+    """
+    BRAZE_URL = 'http://braze-api-url.com'
+    CAMPAIGN_SEND_URL = BRAZE_URL + BrazeAPIEndpoints.SEND_CAMPAIGN
+    EXPORT_ID_URL = BRAZE_URL + BrazeAPIEndpoints.EXPORT_IDS
+    USERS_TRACK_URL = BRAZE_URL + BrazeAPIEndpoints.TRACK_USER
+
+    def setUp(self):
+        super().setUp()
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.outbox_path = os.path.join(temp_dir.name, 'outbox.db')
+        self.outbox = self._get_outbox()
+        self.client = BrazeClient(api_key='api_key', api_url=self.BRAZE_URL, app_id='app_id')
+
+    def _get_outbox(self):
+        outbox = BrazeOutbox(self.outbox_path)
+        self.addCleanup(outbox.close)
+        return outbox
+
+    def test_enqueue_bad_args(self):
+        """
+        Tests that only known operations with serializable arguments can be enqueued.
+        """
+        with self.assertRaises(BrazeClientError):
+            self.outbox.enqueue('get_braze_external_id', email='test@example.com')
+        with self.assertRaises(BrazeClientError):
+            self.outbox.enqueue('track_user', attributes=[object()])
+        with self.assertRaises(BrazeClientError):
+            self.outbox.track_user()
+        with self.assertRaises(BrazeClientError):
+            self.outbox.enqueue('send_email', emails=['test@example.com'])
+        with self.assertRaises(BrazeClientError):
+            self.outbox.enqueue('track_user', attributes=[{'external_id': '1'}], event=[])
+
+        assert self.outbox.pending_count() == 0
+
+    def test_entries_are_durable(self):
+        """
+        Tests that enqueued entries are visible to a new outbox on the same database.
+        """
+        self.outbox.track_user(attributes=[{'external_id': '1'}])
+
+        entries = self._get_outbox().due(10)
+
+        assert len(entries) == 1
+        assert entries[0].operation == 'track_user'
+        assert entries[0].kwargs == {'attributes': [{'external_id': '1'}], 'events': None, 'purchases': None}
+
+    @responses.activate
+    def test_drain_batches_track_user(self):
+        """
+        Tests that consecutive track_user entries are merged into full requests, in order with other operations.
+        """
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'success'}, status=201)
+        responses.add(
+            responses.POST, self.EXPORT_ID_URL, json={'users': [{'external_id': '1'}], 'message': 'success'}, status=201
+        )
+        responses.add(responses.POST, self.CAMPAIGN_SEND_URL, json={'message': 'success'}, status=201)
+        for i in range(6):
+            self.outbox.track_user(attributes=[{'external_id': f'{i}-{j}'} for j in range(25)])
+        self.outbox.enqueue('send_campaign_message', campaign_id='campaign_id', emails=['test@example.com'])
+        self.outbox.track_user(events=[{'external_id': '1', 'name': 'event'}])
+
+        delivered = OutboxDrainer(self.client, self.outbox).drain()
+
+        assert delivered == 8
+        assert self.outbox.pending_count() == 0
+        assert [call.request.url for call in responses.calls] == [
+            self.USERS_TRACK_URL,
+            self.USERS_TRACK_URL,
+            self.EXPORT_ID_URL,
+            self.CAMPAIGN_SEND_URL,
+            self.USERS_TRACK_URL,
+        ]
+        tracked_attributes = [
+            attribute['external_id']
+            for call in responses.calls[:2]
+            for attribute in json.loads(call.request.body)['attributes']
+        ]
+        assert sorted(tracked_attributes) == sorted(f'{i}-{j}' for i in range(6) for j in range(25))
+
+    @responses.activate
+    def test_drain_retries(self):
+        """
+        Tests that transient failures are retried after a backoff, until the maximum number of attempts.
+        """
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'error'}, status=500)
+        self.outbox.track_user(attributes=[{'external_id': '1'}])
+        drainer = OutboxDrainer(self.client, self.outbox, max_attempts=2, backoff_s=60)
+
+        assert drainer.drain() == 0
+        assert self.outbox.pending_count() == 1
+        assert not self.outbox.due(10)
+        entry = self.outbox.due(10, now=time.time() + 61)[0]
+        assert entry.attempts == 1
+
+        drainer.backoff_s = 0
+        self.outbox.mark_retry([entry], 'retry now', next_attempt_at=0)
+        assert drainer.drain() == 0
+        assert self.outbox.pending_count() == 0
+        failed_entry, last_error = self.outbox.failed()[0]
+        assert failed_entry.attempts == 3
+        assert 'error' in last_error
+
+    @responses.activate
+    def test_drain_rate_limited(self):
+        """
+        Tests that rate limited entries are retried once the rate limit window resets.
+        """
+        reset_epoch_s = time.time() + 30
+        responses.add(
+            responses.POST,
+            self.USERS_TRACK_URL,
+            json={'message': 'error'},
+            headers={'X-RateLimit-Reset': str(reset_epoch_s)},
+            status=429,
+        )
+        self.outbox.track_user(attributes=[{'external_id': '1'}])
+
+        OutboxDrainer(self.client, self.outbox).drain()
+
+        assert not self.outbox.due(10, now=reset_epoch_s - 1)
+        assert len(self.outbox.due(10, now=reset_epoch_s)) == 1
+
+    @responses.activate
+    def test_drain_circuit_open(self):
+        """
+        Tests that entries refused by an open circuit are retried once it lets a trial request through.
+        """
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'error'}, status=500)
+        client = BrazeClient(
+            api_key='api_key',
+            api_url=self.BRAZE_URL,
+            app_id='app_id',
+            circuit_breaker=CircuitBreaker(minimum_requests=1, recovery_timeout_s=60),
+        )
+        drainer = OutboxDrainer(client, self.outbox)
+        self.outbox.track_user(attributes=[{'external_id': '1'}])
+        drainer.drain()
+
+        entry_id = self.outbox.track_user(attributes=[{'external_id': '2'}])
+        drainer.drain()
+
+        assert len(responses.calls) == 1
+        assert not self.outbox.failed()
+        assert self.outbox.pending_count() == 2
+        assert entry_id not in [entry.id for entry in self.outbox.due(10, now=time.time() + 30)]
+        assert entry_id in [entry.id for entry in self.outbox.due(10, now=time.time() + 61)]
+
+    def test_drain_deadline_exceeded(self):
+        """
+        Tests that entries not sent because a deadline passed are retried rather than failed.
+        """
+        self.outbox.track_user(attributes=[{'external_id': '1'}])
+
+        with self.client.timeout(deadline_s=0.01):
+            time.sleep(0.02)
+            delivered = OutboxDrainer(self.client, self.outbox).drain()
+
+        assert delivered == 0
+        assert not self.outbox.failed()
+        assert self.outbox.pending_count() == 1
+
+    @responses.activate
+    def test_drain_retries_failed_requests_only(self):
+        """
+        Tests that only the entries of a merged request that failed are retried, accepted items are not sent again.
+        """
+        def track_user(request):
+            events = json.loads(request.body)['events']
+            if any(event['external_id'] == 'throttled' for event in events):
+                return 429, {'X-RateLimit-Reset': str(time.time() + 30)}, json.dumps({'message': 'error'})
+            return 201, {}, json.dumps({'message': 'success'})
+
+        responses.add_callback(responses.POST, self.USERS_TRACK_URL, callback=track_user)
+        entry_ids = [
+            self.outbox.track_user(events=[{'external_id': str(i), 'name': 'event'}] * 24) for i in range(6)
+        ]
+        entry_ids.append(self.outbox.track_user(events=[{'external_id': 'throttled', 'name': 'event'}]))
+
+        delivered = OutboxDrainer(self.client, self.outbox).drain()
+
+        assert delivered == 3
+        assert len(responses.calls) == 2
+        assert [entry.id for entry in self.outbox.due(10, now=time.time() + 31)] == entry_ids[3:]
+
+    @responses.activate
+    def test_drain_permanent_failure(self):
+        """
+        Tests that entries rejected by Braze are not retried.
+        """
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'error'}, status=400)
+        self.outbox.track_user(attributes=[{'external_id': '1'}])
+
+        OutboxDrainer(self.client, self.outbox).drain()
+
+        assert self.outbox.pending_count() == 0
+        assert len(self.outbox.failed()) == 1
+
+    @responses.activate
+    def test_drain_bad_arguments(self):
+        """
+        Tests that an entry whose arguments the client refuses fails without blocking the entries behind it.
+        """
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'success'}, status=201)
+        # Entries enqueued before their arguments were checked.
+        with sqlite3.connect(self.outbox_path) as connection:
+            bad_entry_id = connection.execute(
+                'INSERT INTO outbox (operation, kwargs, created_at) VALUES (?, ?, ?)',
+                ('send_email', json.dumps({'emails': ['test@example.com']}), time.time()),
+            ).lastrowid
+        self.outbox.track_user(attributes=[{'external_id': '1'}])
+
+        delivered = OutboxDrainer(self.client, self.outbox).drain()
+
+        assert delivered == 1
+        assert self.outbox.pending_count() == 0
+        assert [entry.id for entry, _ in self.outbox.failed()] == [bad_entry_id]
+
+    @responses.activate
+    def test_drain_merged_run_rejected(self):
+        """
+        Tests that when a merged track_user run is rejected, only the entry Braze rejects fails.
+        """
+        def track_user(request):
+            attributes = json.loads(request.body)['attributes']
+            if any('bad' in attribute for attribute in attributes):
+                return 400, {}, json.dumps({'message': 'error'})
+            return 201, {}, json.dumps({'message': 'success'})
+
+        responses.add_callback(responses.POST, self.USERS_TRACK_URL, callback=track_user)
+        for i in range(4):
+            self.outbox.track_user(attributes=[{'external_id': str(i)}])
+        bad_entry_id = self.outbox.track_user(attributes=[{'external_id': '4', 'bad': True}])
+        self.outbox.track_user(attributes=[{'external_id': '5'}])
+
+        delivered = OutboxDrainer(self.client, self.outbox).drain()
+
+        assert delivered == 5
+        assert self.outbox.pending_count() == 0
+        assert [entry.id for entry, _ in self.outbox.failed()] == [bad_entry_id]
@@ -0,0 +1,138 @@
+"""
+Tests for the dry-run planning of Braze client operations.
+"""
+import time
+from unittest import TestCase
+
+import responses
+
+from braze.alias_index import AliasIndex
+from braze.circuit_breaker import CircuitBreaker
+from braze.client import BrazeClient
+from braze.concurrency import AdaptiveConcurrencyLimiter
+from braze.constants import BrazeAPIEndpoints
+from braze.hooks import HOOK_BEFORE_SEND
+from braze.metrics import InMemoryMetricsSink
+from braze.plan import data_points
+from braze.scheduler import PriorityScheduler
+
+
+class RequestPlanTests(TestCase):
+    """
+    Tests for BrazeClient.plan and RequestPlan.
+    """
+    BRAZE_URL = 'http://braze-api-url.com'
+
+    def _get_braze_client(self, **kwargs):
+        return BrazeClient(api_key='api_key', api_url=self.BRAZE_URL, app_id='app_id', **kwargs)
+
+    @responses.activate
+    def test_plan_create_braze_alias(self):
+        """
+        Tests that a planned operation builds every request without sending any.
+        """
+        alias_index = AliasIndex()
+        metrics_sink = InMemoryMetricsSink()
+        client = self._get_braze_client(alias_index=alias_index, metrics_sink=metrics_sink)
+        sent = []
+        client.register_hook(HOOK_BEFORE_SEND, lambda *args: sent.append(args))
+        emails = [f'test{i}@example.com' for i in range(120)]
+
+        with client.plan(latency_s=0.1) as plan:
+            client.create_braze_alias(emails, 'Enterprise')
+
+        summary = plan.summary()
+        self.assertEqual(summary['requests_by_endpoint'], {
+            BrazeAPIEndpoints.EXPORT_IDS: 3,
+            BrazeAPIEndpoints.NEW_ALIAS: 3,
+            BrazeAPIEndpoints.TRACK_USER: 2,
+        })
+        self.assertEqual(summary['requests'], 8)
+        self.assertEqual(summary['bytes'], sum(summary['bytes_by_endpoint'].values()))
+        self.assertGreater(summary['bytes'], 0)
+        # Each of the 120 attributes updates the email.
+        self.assertEqual(summary['data_points'], 120)
+        # 3, 3 and 2 requests sent 4 at a time.
+        self.assertAlmostEqual(summary['estimated_duration_s'], 0.3)
+
+        self.assertEqual(len(responses.calls), 0)
+        self.assertEqual(sent, [])
+        self.assertEqual(metrics_sink.snapshot(), {})
+        self.assertEqual(len(alias_index), 0)
+
+    @responses.activate
+    def test_plan_send_email(self):
+        """
+        Tests that planned lookups find no users and do not join lookups being sent, and that
+        messages to emails are planned for a placeholder external id.
+        """
+        client = self._get_braze_client()
+        with client.plan() as plan:
+            self.assertIsNone(client.get_braze_external_id('test@example.com'))
+            self.assertEqual(client.retrieve_unsubscribed_emails('2001-01-01', '2002-02-02'), [])
+            client.send_email(['test@example.com'], 'subject', 'body', 'support@example.com')
+            client.send_campaign_message('campaign_id', emails=['test@example.com'])
+
+        self.assertEqual(plan.summary()['requests_by_endpoint'], {
+            BrazeAPIEndpoints.EXPORT_IDS: 3,
+            BrazeAPIEndpoints.UNSUBSCRIBED_EMAILS: 1,
+            BrazeAPIEndpoints.SEND_MESSAGE: 1,
+            BrazeAPIEndpoints.SEND_CAMPAIGN: 1,
+        })
+        self.assertEqual(len(responses.calls), 0)
+
+    @responses.activate
+    def test_plan_leaves_limiter_untouched(self):
+        """
+        Tests that planned requests bypass the concurrency limiter, the scheduler and the circuit breaker.
+        """
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=8)
+        circuit_breaker = CircuitBreaker()
+        client = self._get_braze_client(
+            concurrency_limiter=limiter, circuit_breaker=circuit_breaker, scheduler=PriorityScheduler(),
+        )
+        with client.plan() as plan:
+            client.track_user(attributes=[{'external_id': str(i), 'attribute': 'value'} for i in range(200)])
+
+        self.assertEqual(plan.summary()['requests_by_endpoint'], {BrazeAPIEndpoints.TRACK_USER: 3})
+        self.assertEqual(limiter.limit, 4)
+        self.assertIsNone(limiter.baseline_latency_s(BrazeAPIEndpoints.TRACK_USER))
+        self.assertEqual(len(responses.calls), 0)
+
+    def test_estimate_rate_limited(self):
+        """
+        Tests that requests beyond the reported rate limit wait for the following windows.
+        """
+        client = self._get_braze_client()
+        client.rate_limits.update(BrazeAPIEndpoints.TRACK_USER, {
+            'X-RateLimit-Limit': '10',
+            'X-RateLimit-Remaining': '2',
+            'X-RateLimit-Reset': str(time.time() + 30),
+        })
+
+        with client.plan(latency_s=0) as plan:
+            client.track_user(attributes=[{'external_id': str(i), 'pref': i} for i in range(75 * 25)])
+
+        # 2 requests now, 10 when the window resets in 30s, then 10 and 3 in the following 3s windows.
+        self.assertAlmostEqual(plan.summary()['estimated_duration_s'], 36, delta=0.5)
+
+    def test_estimate_default_rate_limit(self):
+        """
+        Tests that Braze's documented rate limits are used until Braze reports them.
+        """
+        client = self._get_braze_client()
+        with client.plan(latency_s=0) as plan:
+            for i in range(2501):
+                plan.record(BrazeAPIEndpoints.EXPORT_IDS, {'email_address': f'test{i}@example.com'}, '{}')
+
+        self.assertEqual(plan.summary()['estimated_duration_s'], 60)
+
+    def test_data_points(self):
+        """
+        Tests that identifiers are not counted as data points.
+        """
+        self.assertEqual(data_points({
+            'attributes': [{'external_id': '1', 'email': 'test@example.com', 'pref': 1}, {'user_alias': {}}],
+            'events': [{'external_id': '1', 'name': 'event'}],
+            'purchases': [{'external_id': '1'}, {'external_id': '2'}],
+        }), 5)
@@ -0,0 +1,63 @@
+"""
+Tests for Braze rate limit tracking.
+"""
+from unittest import TestCase
+
+import responses
+
+from braze.client import BrazeClient
+from braze.constants import BrazeAPIEndpoints
+from braze.exceptions import BrazeRateLimitError
+from braze.rate_limit import RateLimitBudget
+
+
+class RateLimitTests(TestCase):
+    """
+    Tests for RateLimitBudget and the client's rate limit tracking.
+    """
+    BRAZE_URL = 'http://braze-api-url.com'
+    USERS_TRACK_URL = BRAZE_URL + BrazeAPIEndpoints.TRACK_USER
+
+    def test_budget(self):
+        """
+        Tests that the budget is replenished once the window resets.
+        """
+        budget = RateLimitBudget(limit=100, remaining=25, reset_epoch_s=1000)
+
+        assert budget.seconds_until_reset(now=990) == 10
+        assert budget.available(now=990) == 25
+        assert budget.fraction_available(now=990) == 0.25
+        assert budget.seconds_until_reset(now=1001) == 0
+        assert budget.available(now=1001) == 100
+
+    @responses.activate
+    def test_client_tracks_budget(self):
+        """
+        Tests that the budget is updated from every response, including 429s.
+        """
+        responses.add(
+            responses.POST,
+            self.USERS_TRACK_URL,
+            json={'message': 'success'},
+            headers={'X-RateLimit-Limit': '50000', 'X-RateLimit-Remaining': '49999', 'X-RateLimit-Reset': '1700000060'},
+            status=201,
+        )
+        responses.add(
+            responses.POST,
+            self.USERS_TRACK_URL,
+            json={'message': 'error'},
+            headers={'X-RateLimit-Limit': '50000', 'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '1700000120'},
+            status=429,
+        )
+        client = BrazeClient(api_key='api_key', api_url=self.BRAZE_URL, app_id='app_id')
+        assert client.rate_limit_budget(BrazeAPIEndpoints.TRACK_USER) is None
+
+        client.track_user(attributes=[{'external_id': '1'}])
+        budget = client.rate_limit_budget(BrazeAPIEndpoints.TRACK_USER)
+        assert (budget.limit, budget.remaining, budget.reset_epoch_s) == (50000, 49999, 1700000060)
+
+        with self.assertRaises(BrazeRateLimitError):
+            client.track_user(attributes=[{'external_id': '1'}])
+        budget = client.rate_limit_budget(BrazeAPIEndpoints.TRACK_USER)
+        assert (budget.remaining, budget.reset_epoch_s) == (0, 1700000120)
+        assert list(client.rate_limits.budgets()) == [BrazeAPIEndpoints.TRACK_USER]
@@ -0,0 +1,175 @@
+"""
+Tests for Braze request priority scheduling.
+"""
+import threading
+import time
+from unittest import TestCase
+
+import responses
+
+from braze.client import BrazeClient
+from braze.constants import PRIORITY_HIGH, PRIORITY_LOW, BrazeAPIEndpoints
+from braze.rate_limit import RateLimitTracker
+from braze.scheduler import PriorityScheduler
+
+
+class RecordingScheduler(PriorityScheduler):
+    """
+    A scheduler recording the endpoint and priority of every admitted request.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.admitted = []
+
+    def acquire(self, priority, endpoint=None, rate_limits=None, deadline=None):
+        super().acquire(priority, endpoint, rate_limits, deadline)
+        self.admitted.append((endpoint, priority))
+
+
+class PrioritySchedulerTests(TestCase):
+    """
+    Tests for PriorityScheduler.
+    """
+    BRAZE_URL = 'http://braze-api-url.com'
+
+    def _start_waiting(self, scheduler, priority, name, admitted, **kwargs):
+        """
+        Start a thread waiting for a slot at ``priority``, appending ``name`` to ``admitted`` once admitted.
+        """
+        def wait_for_slot():
+            with scheduler.slot(priority, **kwargs):
+                admitted.append(name)
+
+        thread = threading.Thread(target=wait_for_slot)
+        thread.start()
+        time.sleep(0.02)
+        return thread
+
+    def test_high_priority_served_first(self):
+        """
+        Tests that a waiting high-priority request is admitted before earlier low-priority ones.
+        """
+        scheduler = PriorityScheduler(max_concurrent=1, reserved_slots=0)
+        admitted = []
+        scheduler.acquire(PRIORITY_LOW)
+        threads = [
+            self._start_waiting(scheduler, PRIORITY_LOW, 'low-1', admitted),
+            self._start_waiting(scheduler, PRIORITY_LOW, 'low-2', admitted),
+            self._start_waiting(scheduler, PRIORITY_HIGH, 'high', admitted),
+        ]
+
+        scheduler.release()
+        for thread in threads:
+            thread.join(1)
+
+        assert admitted == ['high', 'low-1', 'low-2']
+
+    def test_reserved_slots(self):
+        """
+        Tests that low-priority requests cannot use the reserved slots.
+        """
+        scheduler = PriorityScheduler(max_concurrent=2, reserved_slots=1)
+        admitted = []
+        scheduler.acquire(PRIORITY_LOW)
+        low_thread = self._start_waiting(scheduler, PRIORITY_LOW, 'low', admitted)
+        high_thread = self._start_waiting(scheduler, PRIORITY_HIGH, 'high', admitted)
+
+        high_thread.join(1)
+        assert admitted == ['high']
+
+        scheduler.release()
+        low_thread.join(1)
+        assert admitted == ['high', 'low']
+
+    def test_reserved_budget(self):
+        """
+        Tests that low-priority requests wait for the window to reset once the budget runs low.
+        """
+        scheduler = PriorityScheduler(reserved_budget_fraction=0.2)
+        rate_limits = RateLimitTracker()
+        rate_limits.update(BrazeAPIEndpoints.TRACK_USER, {
+            'X-RateLimit-Limit': '100',
+            'X-RateLimit-Remaining': '10',
+            'X-RateLimit-Reset': str(time.time() + 0.2),
+        })
+        admitted = []
+        slot_kwargs = {'endpoint': BrazeAPIEndpoints.TRACK_USER, 'rate_limits': rate_limits}
+
+        start = time.monotonic()
+        low_thread = self._start_waiting(scheduler, PRIORITY_LOW, 'low', admitted, **slot_kwargs)
+        high_thread = self._start_waiting(scheduler, PRIORITY_HIGH, 'high', admitted, **slot_kwargs)
+        high_thread.join(1)
+        assert admitted == ['high']
+
+        low_thread.join(2)
+        assert admitted == ['high', 'low']
+        assert time.monotonic() - start >= 0.15
+
+    def test_reserved_budget_per_endpoint(self):
+        """
+        Tests that a request held back by its endpoint's budget does not hold up requests to other endpoints.
+        """
+        scheduler = PriorityScheduler(max_concurrent=1, reserved_slots=0, reserved_budget_fraction=0.2)
+        rate_limits = RateLimitTracker()
+        rate_limits.update(BrazeAPIEndpoints.NEW_ALIAS, {
+            'X-RateLimit-Limit': '100',
+            'X-RateLimit-Remaining': '10',
+            'X-RateLimit-Reset': str(time.time() + 60),
+        })
+        admitted = []
+
+        alias_thread = self._start_waiting(
+            scheduler, PRIORITY_LOW, 'alias', admitted, endpoint=BrazeAPIEndpoints.NEW_ALIAS, rate_limits=rate_limits
+        )
+        track_thread = self._start_waiting(
+            scheduler, PRIORITY_LOW, 'track', admitted, endpoint=BrazeAPIEndpoints.TRACK_USER, rate_limits=rate_limits
+        )
+        track_thread.join(1)
+        assert admitted == ['track']
+
+        rate_limits.update(BrazeAPIEndpoints.NEW_ALIAS, {
+            'X-RateLimit-Limit': '100',
+            'X-RateLimit-Remaining': '100',
+            'X-RateLimit-Reset': str(time.time() + 60),
+        })
+        alias_thread.join(2)
+        assert admitted == ['track', 'alias']
+
+    @responses.activate
+    def test_client_priorities(self):
+        """
+        Tests that transactional sends, including their lookups, are sent at high priority.
+        """
+        responses.add(
+            responses.POST,
+            self.BRAZE_URL + BrazeAPIEndpoints.EXPORT_IDS,
+            json={'users': [{'external_id': '1'}], 'message': 'success'},
+            status=201
+        )
+        responses.add(
+            responses.POST,
+            self.BRAZE_URL + BrazeAPIEndpoints.SEND_CAMPAIGN,
+            json={'dispatch_id': 'dispatch_id', 'message': 'success'},
+            status=201
+        )
+        responses.add(
+            responses.POST,
+            self.BRAZE_URL + BrazeAPIEndpoints.TRACK_USER,
+            json={'message': 'success'},
+            status=201
+        )
+        scheduler = RecordingScheduler()
+        client = BrazeClient(api_key='api_key', api_url=self.BRAZE_URL, app_id='app_id', scheduler=scheduler)
+
+        client.send_campaign_message(campaign_id='campaign_id', emails=['test@example.com'])
+        client.track_user(attributes=[{'external_id': '1'}])
+        with client.priority(PRIORITY_HIGH):
+            client.track_user(attributes=[{'external_id': '1'}])
+
+        assert scheduler.admitted == [
+            (BrazeAPIEndpoints.EXPORT_IDS, PRIORITY_HIGH),
+            (BrazeAPIEndpoints.SEND_CAMPAIGN, PRIORITY_HIGH),
+            (BrazeAPIEndpoints.TRACK_USER, PRIORITY_LOW),
+            (BrazeAPIEndpoints.TRACK_USER, PRIORITY_HIGH),
+        ]
@@ -0,0 +1,180 @@
+"""
+Tests for the segment export of the Braze client.
+"""
+import glob
+import gzip
+import io
+import json
+import os
+import tempfile
+import zipfile
+from unittest import TestCase, mock
+
+import responses
+
+from braze.client import BrazeClient
+from braze.constants import BrazeAPIEndpoints
+from braze.exceptions import BrazeClientError, BrazeExportNotReadyError
+from braze.fake_server import FakeBrazeServer
+from braze.segment_export import iter_export_records
+
+USERS = [{'external_id': str(i), 'email': f'test{i}@example.com'} for i in range(5)]
+
+
+def _ndjson(users):
+    return ''.join(json.dumps(user) + '\n' for user in users).encode('utf-8')
+
+
+def _zip(members):
+    """
+    Return the content of a zip archive holding ``members``, a dict of file names and contents.
+    """
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as export_zip:
+        for name, content in members.items():
+            export_zip.writestr(name, content)
+    return archive.getvalue()
+
+
+class SegmentExportTests(TestCase):
+    """
+    Tests for BrazeClient.export_segment.
+    """
+    BRAZE_URL = 'http://braze-api-url.com'
+    EXPORT_SEGMENT_URL = BRAZE_URL + BrazeAPIEndpoints.EXPORT_SEGMENT
+    DOWNLOAD_URL = 'https://braze-exports.s3.amazonaws.com/export.zip'
+
+    def setUp(self):
+        super().setUp()
+        self.client = BrazeClient(api_key='api_key', api_url=self.BRAZE_URL, app_id='app_id')
+
+    def _mock_export(self, content, not_ready_polls=0):
+        self._mock_export_trigger()
+        for _ in range(not_ready_polls):
+            responses.add(responses.GET, self.DOWNLOAD_URL, status=404)
+        responses.add(responses.GET, self.DOWNLOAD_URL, body=content, status=200)
+
+    def _mock_export_trigger(self):
+        responses.add(
+            responses.POST,
+            self.EXPORT_SEGMENT_URL,
+            json={'url': self.DOWNLOAD_URL, 'object_prefix': 'prefix', 'message': 'success'},
+            status=201,
+        )
+
+    @responses.activate
+    def test_export_segment(self):
+        """
+        Tests that the export is polled until ready, then every file of the zip is parsed.
+        """
+        self._mock_export(
+            _zip({'segment-0.txt': _ndjson(USERS[:3]), 'segment-1.txt': _ndjson(USERS[3:]) + b'\n'}),
+            not_ready_polls=2,
+        )
+
+        users = list(self.client.export_segment('segment_id', ['external_id', 'email'], poll_interval_s=0))
+
+        self.assertEqual(users, USERS)
+        self.assertEqual(json.loads(responses.calls[0].request.body), {
+            'segment_id': 'segment_id',
+            'fields_to_export': ['external_id', 'email'],
+            'output_format': 'zip',
+        })
+        self.assertEqual(len(responses.calls), 4)
+        # The presigned download url is not sent the API key.
+        self.assertNotIn('Authorization', responses.calls[-1].request.headers)
+
+    @responses.activate
+    def test_export_segment_gzip(self):
+        """
+        Tests that gzipped files are decompressed.
+        """
+        self._mock_export(_zip({'segment-0.txt.gz': gzip.compress(_ndjson(USERS))}))
+
+        users = self.client.export_segment('segment_id', ['external_id', 'email'], output_format='gzip')
+
+        self.assertEqual(list(users), USERS)
+
+    @responses.activate
+    def test_export_segment_removes_temporary_file(self):
+        """
+        Tests that the downloaded file is removed when the iterator is closed early.
+        """
+        self._mock_export(_zip({'segment-0.txt': _ndjson(USERS)}))
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, tmp_dir)
+
+        with mock.patch('tempfile.tempdir', tmp_dir):
+            users = self.client.export_segment('segment_id', ['external_id'])
+            self.assertEqual(next(users), USERS[0])
+            self.assertEqual(len(glob.glob(os.path.join(tmp_dir, '*'))), 1)
+            users.close()
+
+        self.assertEqual(glob.glob(os.path.join(tmp_dir, '*')), [])
+
+    @responses.activate
+    def test_export_segment_not_ready(self):
+        """
+        Tests that polling gives up once the timeout has passed.
+        """
+        self._mock_export_trigger()
+        responses.add(responses.GET, self.DOWNLOAD_URL, status=404)
+
+        users = self.client.export_segment('segment_id', ['external_id'], poll_interval_s=0.01, timeout_s=0.05)
+        with self.assertRaises(BrazeExportNotReadyError):
+            list(users)
+
+    @responses.activate
+    def test_export_segment_to_cloud_storage(self):
+        """
+        Tests that exports written to cloud storage cannot be downloaded.
+        """
+        responses.add(
+            responses.POST, self.EXPORT_SEGMENT_URL, json={'object_prefix': 'prefix', 'message': 'success'}, status=201
+        )
+        with self.assertRaises(BrazeClientError):
+            self.client.export_segment('segment_id', ['external_id'])
+
+    def test_export_segment_bad_args(self):
+        """
+        Tests that a segment id and fields to export are required.
+        """
+        with self.assertRaises(BrazeClientError):
+            self.client.export_segment('', ['external_id'])
+        with self.assertRaises(BrazeClientError):
+            self.client.export_segment('segment_id', [])
+
+    @responses.activate
+    def test_export_segment_plan(self):
+        """
+        Tests that a planned export triggers nothing and exports no users.
+        """
+        with self.client.plan() as plan:
+            self.assertEqual(list(self.client.export_segment('segment_id', ['external_id'])), [])
+
+        self.assertEqual(plan.summary()['requests_by_endpoint'], {BrazeAPIEndpoints.EXPORT_SEGMENT: 1})
+        self.assertEqual(len(responses.calls), 0)
+
+    def test_iter_export_records_plain_files(self):
+        """
+        Tests that single plain and gzipped newline-delimited JSON files are parsed.
+        """
+        tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmp_dir.cleanup)
+        for name, content in (('plain.txt', _ndjson(USERS)), ('gzipped.txt.gz', gzip.compress(_ndjson(USERS)))):
+            path = os.path.join(tmp_dir.name, name)
+            with open(path, 'wb') as export_file:
+                export_file.write(content)
+            self.assertEqual(list(iter_export_records(path)), USERS)
+
+    def test_export_segment_fake_server(self):
+        """
+        Tests an export end to end against the fake server.
+        """
+        with FakeBrazeServer(export_delay_s=0.05) as server:
+            client = BrazeClient(api_key='api_key', api_url=server.url, app_id='app_id')
+            client.track_user(attributes=USERS)
+
+            users = client.export_segment('segment_id', ['external_id', 'email'], poll_interval_s=0.02)
+
+            self.assertEqual(sorted(list(users), key=lambda user: user['external_id']), USERS)
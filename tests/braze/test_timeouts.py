@@ -0,0 +1,192 @@
+"""
+Tests for the request timeouts of the Braze client.
+"""
+import threading
+import time
+from unittest import TestCase
+
+import responses
+
+from braze.client import BrazeClient
+from braze.constants import DEFAULT_TIMEOUT, ENDPOINT_TIMEOUTS, LOOKUP_TIMEOUT_KEY, PRIORITY_LOW, BrazeAPIEndpoints
+from braze.exceptions import BrazeDeadlineExceededError
+from braze.scheduler import PriorityScheduler
+
+
+class BrazeClientTimeoutTests(TestCase):
+    """
+    Tests for the per-endpoint and per-call timeouts of the Braze client.
+    """
+    BRAZE_URL = 'http://braze-api-url.com'
+    EXPORT_ID_URL = BRAZE_URL + BrazeAPIEndpoints.EXPORT_IDS
+    USERS_TRACK_URL = BRAZE_URL + BrazeAPIEndpoints.TRACK_USER
+
+    def _get_braze_client(self, **kwargs):
+        return BrazeClient(api_key='api_key', api_url=self.BRAZE_URL, app_id='app_id', **kwargs)
+
+    def _mock_export(self):
+        responses.add(responses.POST, self.EXPORT_ID_URL, json={'users': [], 'message': 'success'}, status=201)
+
+    @staticmethod
+    def _sent_timeout(call_index=0):
+        return responses.calls[call_index].request.req_kwargs['timeout']
+
+    @responses.activate
+    def test_endpoint_default_timeouts(self):
+        """
+        Tests that each endpoint is called with its default timeout.
+        """
+        self._mock_export()
+        responses.add(responses.POST, self.USERS_TRACK_URL, json={'message': 'success'}, status=201)
+        client = self._get_braze_client()
+
+        client.get_braze_external_id('test@example.com')
+        client.track_user(attributes=[{'external_id': '1', 'pref': 'value'}])
+
+        self.assertEqual(self._sent_timeout(0), ENDPOINT_TIMEOUTS[LOOKUP_TIMEOUT_KEY])
+        self.assertEqual(self._sent_timeout(1), (2, 10))
+
+    @responses.activate
+    def test_lookup_and_export_timeouts(self):
+        """
+        Tests that single-user lookups, batched ones included, fail faster than batch exports.
+        """
+        self._mock_export()
+        client = self._get_braze_client(lookup_alias_label='Enterprise', lookup_batch_window_s=0.001)
+
+        client.get_braze_external_id('test@example.com')
+        client.get_braze_external_id_batch(['test@example.com'], 'Enterprise')
+
+        self.assertEqual(self._sent_timeout(0), ENDPOINT_TIMEOUTS[LOOKUP_TIMEOUT_KEY])
+        self.assertEqual(self._sent_timeout(1), ENDPOINT_TIMEOUTS[LOOKUP_TIMEOUT_KEY])
+        self.assertEqual(self._sent_timeout(2), ENDPOINT_TIMEOUTS[BrazeAPIEndpoints.EXPORT_IDS])
+        self.assertLess(ENDPOINT_TIMEOUTS[LOOKUP_TIMEOUT_KEY], DEFAULT_TIMEOUT)
+
+    @responses.activate
+    def test_templated_endpoint_timeouts(self):
+        """
+        Tests that requests to a formatted endpoint use the timeouts of its template.
+        """
+        responses.add(
+            responses.PUT,
+            self.BRAZE_URL + BrazeAPIEndpoints.CATALOG_ITEMS.format(catalog_name='courses'),
+            json={'message': 'success'},
+            status=202,
+        )
+        client = self._get_braze_client(timeouts={BrazeAPIEndpoints.CATALOG_ITEMS: (3, 30)})
+
+        client.sync_catalog('courses', [{'id': '1'}])
+
+        self.assertEqual(self._sent_timeout(), (3, 30))
+
+    @responses.activate
+    def test_client_timeouts_override_defaults(self):
+        """
+        Tests that the timeouts passed to the client replace the endpoint defaults.
+        """
+        self._mock_export()
+        client = self._get_braze_client(timeouts={LOOKUP_TIMEOUT_KEY: (1, 5), BrazeAPIEndpoints.EXPORT_IDS: (3, 30)})
+
+        client.get_braze_external_id('test@example.com')
+        client.get_braze_external_id_batch(['test@example.com'], 'Enterprise')
+
+        self.assertEqual(self._sent_timeout(0), (1, 5))
+        self.assertEqual(self._sent_timeout(1), (3, 30))
+
+    @responses.activate
+    def test_timeout_block_overrides_timeouts(self):
+        """
+        Tests that the timeout block overrides the timeouts of the requests made inside it only.
+        """
+        self._mock_export()
+        client = self._get_braze_client()
+
+        with client.timeout(read_s=0.5):
+            client.get_braze_external_id('inside@example.com')
+        client.get_braze_external_id('outside@example.com')
+
+        self.assertEqual(self._sent_timeout(0), (ENDPOINT_TIMEOUTS[LOOKUP_TIMEOUT_KEY][0], 0.5))
+        self.assertEqual(self._sent_timeout(1), ENDPOINT_TIMEOUTS[LOOKUP_TIMEOUT_KEY])
+
+    @responses.activate
+    def test_deadline_caps_timeouts(self):
+        """
+        Tests that the timeouts of a request are capped to the time left before the deadline.
+        """
+        self._mock_export()
+        client = self._get_braze_client()
+
+        with client.timeout(deadline_s=1):
+            client.get_braze_external_id('test@example.com')
+
+        connect_s, read_s = self._sent_timeout()
+        self.assertLessEqual(connect_s, 1)
+        self.assertLessEqual(read_s, 1)
+
+    @responses.activate
+    def test_deadline_exceeded(self):
+        """
+        Tests that no request is sent once the deadline has passed.
+        """
+        self._mock_export()
+        client = self._get_braze_client()
+
+        with client.timeout(deadline_s=0.01):
+            time.sleep(0.02)
+            with self.assertRaises(BrazeDeadlineExceededError):
+                client.get_braze_external_id('test@example.com')
+
+        self.assertEqual(len(responses.calls), 0)
+
+    @responses.activate
+    def test_deadline_bounds_scheduler_wait(self):
+        """
+        Tests that the wait for a scheduler slot stops at the deadline, and counts against the timeouts.
+        """
+        self._mock_export()
+        scheduler = PriorityScheduler(max_concurrent=1, reserved_slots=0)
+        client = self._get_braze_client(scheduler=scheduler)
+        scheduler.acquire(PRIORITY_LOW)
+
+        start = time.monotonic()
+        with client.timeout(deadline_s=0.1):
+            with self.assertRaises(BrazeDeadlineExceededError):
+                client.get_braze_external_id('test@example.com')
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(len(responses.calls), 0)
+
+        threading.Timer(0.3, scheduler.release).start()
+        with client.timeout(deadline_s=1):
+            client.get_braze_external_id('test@example.com')
+        connect_s, read_s = self._sent_timeout()
+        self.assertLessEqual(connect_s, 0.75)
+        self.assertLessEqual(read_s, 0.75)
+
+    @responses.activate
+    def test_deadline_exceeded_in_worker_threads(self):
+        """
+        Tests that the deadline applies to the requests made from worker threads.
+        """
+        self._mock_export()
+        client = self._get_braze_client()
+
+        with client.timeout(deadline_s=0.01):
+            time.sleep(0.02)
+            with self.assertRaises(BrazeDeadlineExceededError):
+                client.get_braze_external_id_batch(['test@example.com'], 'Enterprise')
+
+        self.assertEqual(len(responses.calls), 0)
+
+    @responses.activate
+    def test_nested_deadline_cannot_extend(self):
+        """
+        Tests that a nested deadline cannot extend the enclosing one.
+        """
+        self._mock_export()
+        client = self._get_braze_client()
+
+        with client.timeout(deadline_s=0.01):
+            time.sleep(0.02)
+            with client.timeout(deadline_s=60):
+                with self.assertRaises(BrazeDeadlineExceededError):
+                    client.get_braze_external_id('test@example.com')
@@ -0,0 +1,123 @@
+"""
+Tests for the record-and-replay transports.
+"""
+import json
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+import requests
+
+from braze.client import BrazeClient
+from braze.exceptions import BrazeClientError, BrazeInternalServerError
+from braze.fake_server import FakeBrazeServer
+from braze.transport import RecordingTransport, ReplayTransport
+
+EMAILS = [f'test{i}@example.com' for i in range(120)]
+
+
+class TransportTests(TestCase):
+    """
+    Tests for RecordingTransport and ReplayTransport.
+    """
+
+    def setUp(self):
+        super().setUp()
+        tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'recording.jsonl')
+        self.server = FakeBrazeServer(latency_s=0.02).start()
+        self.addCleanup(self.server.stop)
+
+    def _get_braze_client(self, transport, api_url=None):
+        return BrazeClient(
+            api_key='api_key', api_url=api_url or self.server.url, app_id='app_id', transport=transport
+        )
+
+    def _record_alias_run(self):
+        self._get_braze_client(RecordingTransport(self.path)).create_braze_alias(EMAILS, 'Enterprise')
+
+    def test_record(self):
+        """
+        Tests that every exchange is recorded with its latency, without the API key.
+        """
+        self._record_alias_run()
+
+        with open(self.path, encoding='utf-8') as recording:
+            content = recording.read()
+        exchanges = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(exchanges), sum(self.server.stats()['requests'].values()))
+        self.assertTrue(all(exchange['elapsed_s'] >= 0.02 for exchange in exchanges))
+        self.assertTrue(all(exchange['status_code'] == 201 for exchange in exchanges))
+        self.assertNotIn('api_key', content)
+
+    def test_replay(self):
+        """
+        Tests that a recording is replayed without network access.
+        """
+        self._record_alias_run()
+        self.server.stop()
+        replay = ReplayTransport(self.path, latency_scale=0)
+        # Nothing listens on this url, any request reaching the network would fail.
+        client = self._get_braze_client(replay, api_url='http://braze-api-url.invalid')
+
+        client.create_braze_alias(EMAILS, 'Enterprise')
+
+        self.assertEqual(replay.remaining(), 0)
+
+    def test_replay_latency_scale(self):
+        """
+        Tests that recorded latencies are scaled.
+        """
+        self._get_braze_client(RecordingTransport(self.path)).track_user(attributes=[{'external_id': '1'}])
+        client = self._get_braze_client(ReplayTransport(self.path, latency_scale=5))
+
+        start = time.perf_counter()
+        client.track_user(attributes=[{'external_id': '1'}])
+        self.assertGreaterEqual(time.perf_counter() - start, 0.1)
+
+    def test_replay_read_timeout(self):
+        """
+        Tests that a replayed latency beyond the read timeout raises a ReadTimeout.
+        """
+        self._get_braze_client(RecordingTransport(self.path)).track_user(attributes=[{'external_id': '1'}])
+        client = self._get_braze_client(ReplayTransport(self.path))
+
+        with client.timeout(read_s=0.001):
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                client.track_user(attributes=[{'external_id': '1'}])
+
+    def test_replay_errors(self):
+        """
+        Tests that recorded error responses and connection errors are replayed.
+        """
+        with FakeBrazeServer(error_rate=1) as erroring_server:
+            client = self._get_braze_client(RecordingTransport(self.path), api_url=erroring_server.url)
+            with self.assertRaises(BrazeInternalServerError):
+                client.track_user(attributes=[{'external_id': '1'}])
+        # The server is stopped, its port no longer accepts connections.
+        client = self._get_braze_client(RecordingTransport(self.path), api_url=erroring_server.url)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.track_user(attributes=[{'external_id': '1'}])
+
+        client = self._get_braze_client(ReplayTransport(self.path, latency_scale=0))
+        with self.assertRaises(BrazeInternalServerError):
+            client.track_user(attributes=[{'external_id': '1'}])
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.track_user(attributes=[{'external_id': '1'}])
+
+    def test_replay_unrecorded_request(self):
+        """
+        Tests that a request missing from the recording is refused, unless bodies are not matched.
+        """
+        self._get_braze_client(RecordingTransport(self.path)).track_user(attributes=[{'external_id': '1'}])
+
+        client = self._get_braze_client(ReplayTransport(self.path, latency_scale=0))
+        with self.assertRaises(BrazeClientError):
+            client.track_user(attributes=[{'external_id': '2'}])
+
+        client = self._get_braze_client(ReplayTransport(self.path, latency_scale=0, match_body=False))
+        client.track_user(attributes=[{'external_id': '2'}])
+        with self.assertRaises(BrazeClientError):
+            client.track_user(attributes=[{'external_id': '2'}])